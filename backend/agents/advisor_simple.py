@@ -1,16 +1,51 @@
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import PromptTemplate
 from dotenv import load_dotenv
+from functools import lru_cache
+from typing import Callable
+import os
+import time
+
+from utils import llm_cache
+from utils import metrics
 
 load_dotenv()
 
-def run_advisor_agent(analysis_json: dict) -> str:
-    """Simple advisor that generates recommendations based on analysis"""
-    
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.7)
-    
+MODEL_NAME = os.getenv("ADVISOR_MODEL", "gpt-4o-mini")
+TEMPERATURE = 0.7
+
+
+@lru_cache(maxsize=None)
+def get_llm(model: str = MODEL_NAME, temperature: float = TEMPERATURE):
+    """
+    One shared client per model config, so HTTP connections are pooled across
+    requests. langchain_openai takes over a second to import, so it is only
+    loaded here, on first use or by the startup warm-up.
+    """
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(model=model, temperature=temperature)
+
 
+def anomaly_summary(analysis_json: dict, limit: int = 5, row_ids: bool = True) -> str:
+    """One line on the columns with the most outliers and their worst rows (numbered with `row_ids`)."""
+    columns = (analysis_json.get("anomalies") or {}).get("columns", {})
+    flagged = sorted(
+        ((col, e) for col, e in columns.items() if e.get("iqr_outliers")),
+        key=lambda item: -item[1]["iqr_outliers"],
+    )[:limit]
+    if not flagged:
+        return "None detected"
+    parts = []
+    for col, e in flagged:
+        part = f"{col}: {e['iqr_outliers']} rows outside [{e['lower_fence']:.4g}, {e['upper_fence']:.4g}]"
+        if e["top_rows"]:
+            worst = e["top_rows"][0]
+            row = f"row {worst['row']}" if row_ids else "value"
+            part += f" (worst {row}: {worst['value']:.4g}, robust z {worst['robust_z']:.1f})"
+        parts.append(part)
+    return "; ".join(parts)
 
+
+def build_prompt(analysis_json: dict, row_ids: bool = True) -> str:
     stats = analysis_json.get("statistics", {})
     quality = analysis_json.get("quality_analysis", {})
     
@@ -21,6 +56,7 @@ def run_advisor_agent(analysis_json: dict) -> str:
     - Data Quality Score: {quality.get('score', 0)}/100
     - Row Count: {stats.get('rows', 0)}
     - Issues: {', '.join(quality.get('issues', ['None']))}
+    - Anomalies: {anomaly_summary(analysis_json, row_ids=row_ids)}
 
     **Output Requirements:**
     Return the response in strict **Markdown** format with the following sections:
@@ -41,6 +77,48 @@ def run_advisor_agent(analysis_json: dict) -> str:
     
     **CONSTRAINT:** Do NOT use any emojis or icons in the output. The output must be strictly text-based.
     """
-    
-    result = llm.invoke(prompt_text)
-    return result.content
+    return prompt_text
+
+
+def run_advisor_agent(analysis_json: dict, use_cache: bool = True, on_token: Callable[[str], None] = None) -> str:
+    """
+    Simple advisor that generates recommendations based on analysis. With
+    `on_token`, the response is streamed and each piece is passed to it as
+    the model produces it (a cached response arrives as one piece).
+    """
+    prompt_text = build_prompt(analysis_json)
+
+    # Keyed on the prompt without row numbers: a hit needs the same score, row count, issues and
+    # outlier figures, i.e. a re-upload of the same data (possibly reordered), not merely a similar one
+    key = llm_cache.cache_key(build_prompt(analysis_json, row_ids=False), model=MODEL_NAME, temperature=TEMPERATURE)
+    if use_cache:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            metrics.record_llm(cached=True)
+            if on_token is not None:
+                on_token(cached)
+            return cached
+
+    started = time.perf_counter()
+    first_token = None
+    if on_token is None:
+        result = get_llm().invoke(prompt_text)
+        content = result.content
+    else:
+        result, pieces = None, []
+        for chunk in get_llm().stream(prompt_text, stream_usage=True):
+            if chunk.content:
+                if first_token is None:
+                    first_token = time.perf_counter() - started
+                pieces.append(chunk.content)
+                on_token(chunk.content)
+            # Chunks add up to the full message, usage included
+            result = chunk if result is None else result + chunk
+        content = "".join(pieces)
+    usage = getattr(result, "usage_metadata", None) or {}
+    metrics.record_llm(
+        time.perf_counter() - started, usage.get("input_tokens", 0), usage.get("output_tokens", 0),
+        first_token_seconds=first_token,
+    )
+    llm_cache.put(key, MODEL_NAME, content)
+    return content
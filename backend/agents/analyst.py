@@ -1,13 +1,15 @@
+import io
 import json
 import pandas as pd
 import os
+from functools import lru_cache
 from typing import TypedDict, Dict, Any
 
-from langchain_openai import ChatOpenAI
 from langchain_core.tools import tool
-from langgraph.graph import StateGraph, END
 from dotenv import load_dotenv
 
+from agents.quality_rules import RuleEngine, violation_issues
+
 load_dotenv()
 
 # Load configs relative to this file
@@ -27,138 +29,137 @@ PROMPT_CFG = load_config("prompt_config.json")
 
 class PipelineState(TypedDict, total=False):
     raw_df: pd.DataFrame
-    quality_json: str
-    cleaned_json: str
-    preprocessed_json: str
+    mode: str
+    quality: Dict[str, Any]
+    cleaned_df: pd.DataFrame
+    preprocessed_df: pd.DataFrame
+    narrative: str
 
-@tool
-def check_quality(data_json: str, config_json: str):
+
+# Stage functions: DataFrames in, DataFrames out. Serialization happens only at
+# the boundaries (the LLM tool wrappers below and run_analyst_pipeline's output).
+
+def assess_quality(df: pd.DataFrame, cfg: Dict[str, Any]) -> Dict[str, Any]:
     """Checks data quality based on constraints."""
-    df = pd.read_json(data_json)
-    cfg = json.loads(config_json)
-    issues = []
-    score = 100
-    
-    # Check required columns
-    for col in cfg.get("required_columns", []):
-        if col not in df.columns:
-            issues.append(f"Missing required column: {col}")
-            score -= 20
-            
-    # Check missing values
-    for col in df.columns:
-        m = df[col].isna().mean()
-        if m > cfg.get("max_missing_per_column", 0.5):
-            issues.append(f"{col}: missing ratio {m:.2f} too high")
-            score -= 10
-            
-    # Check row count
-    if df.shape[0] < cfg.get("min_rows", 10):
-        issues.append("Dataset too small")
-        score -= 20
+    engine = RuleEngine(cfg)
+    result = engine.evaluate(df)
+
+    # Frame-level checks (required columns, missing ratios, row count) then row rules
+    found = engine.dataset_issues(df.shape[0], df.columns.tolist(), df.isna().sum().to_dict())
+    found += violation_issues(result.rules, result.counts)
         
-    return json.dumps({"score": score, "issues": issues})
+    return {
+        "score": 100 - sum(penalty for _, penalty in found),
+        "issues": [issue for issue, _ in found],
+        "rule_violations": result.counts,
+    }
 
-@tool
-def clean_dataset(data_json: str, config_json: str):
-    """Cleans the dataset by filling missing values and filtering ranges."""
-    df = pd.read_json(data_json)
-    cfg = json.loads(config_json)
-    
-    # Fill numeric
+def clean_frame(df: pd.DataFrame, cfg: Dict[str, Any]) -> pd.DataFrame:
+    """Fills missing numeric values with the column median and drops rows violating "drop" rules."""
+    # Fill numeric (returns a new frame; the input is left untouched)
     num_cols = df.select_dtypes(include="number").columns
-    for col in num_cols:
-        df[col] = df[col].fillna(df[col].median())
+    df = df.fillna(df[num_cols].median())
         
-    # Range checks
-    for col, (low, high) in cfg.get("allowed_ranges", {}).items():
-        if col in df.columns:
-            df = df[(df[col] >= low) & (df[col] <= high)]
+    # Range checks and other "drop" rules, combined into a single row filter
+    drop = RuleEngine(cfg).evaluate(df).any_violation(action="drop")
+    if drop.any():
+        df = df[~drop]
             
-    return df.to_json()
+    return df
 
-@tool
-def preprocess_dataset(data_json: str, config_json: str):
+def preprocess_frame(df: pd.DataFrame, cfg: Dict[str, Any]) -> pd.DataFrame:
     """Normalizes numeric columns."""
-    df = pd.read_json(data_json)
-    cfg = json.loads(config_json)
-    
     if cfg.get("normalize_numeric", True):
         num = df.select_dtypes("number").columns
         if not num.empty:
-            df[num] = (df[num] - df[num].mean()) / df[num].std().replace(0, 1) # avoid div by zero
+            normalized = (df[num] - df[num].mean()) / df[num].std().replace(0, 1) # avoid div by zero
+            df = df.copy(deep=False)
+            for col in num:
+                df[col] = normalized[col]
             
-    return df.to_json()
+    return df
+
+@tool
+def check_quality(data_json: str, config_json: str):
+    """Checks data quality based on constraints."""
+    df = pd.read_json(io.StringIO(data_json))
+    return json.dumps(assess_quality(df, json.loads(config_json)))
+
+@tool
+def clean_dataset(data_json: str, config_json: str):
+    """Cleans the dataset by filling missing values and filtering ranges."""
+    df = pd.read_json(io.StringIO(data_json))
+    return clean_frame(df, json.loads(config_json)).to_json()
+
+@tool
+def preprocess_dataset(data_json: str, config_json: str):
+    """Normalizes numeric columns."""
+    df = pd.read_json(io.StringIO(data_json))
+    return preprocess_frame(df, json.loads(config_json)).to_json()
+
+# "local" runs the tools in-process; "llm" additionally asks the model for a short narrative
+ANALYST_MODE = os.getenv("ANALYST_MODE", "local")
+
+
+@lru_cache(maxsize=None)
+def get_llm():
+    """Built on first use; only needed for the optional narrative."""
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(model="gpt-4o", temperature=0)
 
-# Initialize LLM
-llm = ChatOpenAI(
-    model="gpt-4o", # Updated model name for better availability/cost if needed, or keep user's choice
-    temperature=0,
-).bind_tools([check_quality, clean_dataset, preprocess_dataset])
 
 def n_quality(state: PipelineState):
-    result = llm.invoke({
-        "role": "user",
-        "content": PROMPT_CFG.get("quality_prompt", "Check quality of this data."),
-        "data_json": state["raw_df"].to_json(),
-        "config_json": json.dumps(QUALITY_CFG),
-    })
-    # If the LLM returns tool calls, we should execute them? 
-    # In the original code, it seemed to rely on binding tools but maybe didn't execute them in a loop?
-    # Wait, the original code assign result directly to state["quality_json"]. 
-    # Usually we need to actually call the tool if the LLM wants to.
-    # For simplicity, assuming the LLM returns the analysis text or tool call result directly if using invoke with bound tools...
-    
-    # Actually, with .bind_tools(), the LLM response will contain tool_calls.
-    # We need to run them. The original code was a bit unfinished or assumed a specific behavior.
-    # Let's make it robust: extract tool call or just use the content if it's a direct answer.
-    # But looking at prompt_config.json might reveal the intent.
-    # For now, I will assume the original logic was intended to just get a response or I'll implement a simple tool executor if needed.
-    # However, to be safe, I'll just save the result.content for now.
-    
-    state["quality_json"] = result.content
+    state["quality"] = assess_quality(state["raw_df"], QUALITY_CFG)
     return state
 
 def n_clean(state: PipelineState):
-    # This step seems to want to invoke the 'clean_dataset' tool.
-    # We can force the tool usage or ask the LLM to do it.
-    result = llm.invoke([
-        {"role": "system", "content": PROMPT_CFG.get("clean_prompt", "Clean the dataset.")},
-        {"role": "user", "content": state["raw_df"].to_json()}
-    ])
-    state["cleaned_json"] = result.content # Should ideally contain the cleaned JSON or tool output
+    state["cleaned_df"] = clean_frame(state["raw_df"], QUALITY_CFG)
     return state
 
 def n_preprocess(state: PipelineState):
-    result = llm.invoke([
-        {"role": "system", "content": PROMPT_CFG.get("preprocess_prompt", "Preprocess the dataset.")},
-        {"role": "user", "content": state.get("cleaned_json", state["raw_df"].to_json())}
-    ])
-    state["preprocessed_json"] = result.content
+    state["preprocessed_df"] = preprocess_frame(state.get("cleaned_df", state["raw_df"]), QUALITY_CFG)
     return state
 
 def n_output(state: PipelineState):
+    # The model only sees the small quality summary, never the dataset itself
+    if state.get("mode", ANALYST_MODE) == "llm":
+        result = get_llm().invoke([
+            {"role": "system", "content": PROMPT_CFG.get("narrative_prompt", "Summarize these data quality findings for an auditor.")},
+            {"role": "user", "content": json.dumps(state["quality"])},
+        ])
+        state["narrative"] = result.content
     return state
 
-# Graph Setup
-graph = StateGraph(PipelineState)
-graph.add_node("quality", n_quality)
-graph.add_node("clean", n_clean)
-graph.add_node("preprocess", n_preprocess)
-graph.add_node("output", n_output)
-
-graph.set_entry_point("quality")
-graph.add_edge("quality", "clean")
-graph.add_edge("clean", "preprocess")
-graph.add_edge("preprocess", "output")
-
-app = graph.compile()
-
-def run_analyst_pipeline(df: pd.DataFrame) -> Dict[str, Any]:
-    """Runs the analyst pipeline on a dataframe."""
-    state = app.invoke({"raw_df": df})
-    return {
-        "quality_analysis": state.get("quality_json"),
-        "cleaned_data": state.get("cleaned_json"), # this might need parsing if it's a string representation of json
-        "final_data": state.get("preprocessed_json")
+@lru_cache(maxsize=1)
+def get_graph():
+    """The compiled analyst graph, built on first run rather than at import."""
+    from langgraph.graph import StateGraph
+
+    graph = StateGraph(PipelineState)
+    graph.add_node("quality", n_quality)
+    graph.add_node("clean", n_clean)
+    graph.add_node("preprocess", n_preprocess)
+    graph.add_node("output", n_output)
+
+    graph.set_entry_point("quality")
+    graph.add_edge("quality", "clean")
+    graph.add_edge("clean", "preprocess")
+    graph.add_edge("preprocess", "output")
+    return graph.compile()
+
+def run_analyst_pipeline(df: pd.DataFrame, mode: str = None, serialize: bool = True) -> Dict[str, Any]:
+    """
+    Runs the analyst pipeline on a dataframe. With serialize=False the cleaned
+    and final frames are returned as DataFrames instead of JSON strings.
+    """
+    state = get_graph().invoke({"raw_df": df, "mode": mode or ANALYST_MODE})
+    cleaned, final = state.get("cleaned_df"), state.get("preprocessed_df")
+    result = {
+        "quality_analysis": state.get("quality"),
+        "cleaned_data": cleaned.to_json() if serialize else cleaned,
+        "final_data": final.to_json() if serialize else final
     }
+    if state.get("narrative"):
+        result["narrative"] = state["narrative"]
+    return result
@@ -1,54 +1,251 @@
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import PromptTemplate
 from dotenv import load_dotenv
 import pandas as pd
+import numpy as np
+import base64
 import json
+import math
+from fractions import Fraction
+from typing import Iterable
+
+from agents.anomaly import AnomalyDetector
+from agents.group_stats import GroupStatsAccumulator
+from agents.quality_rules import RuleEngine, load_constraints, violation_issues
+from agents.sketches import (
+    DistinctSketch, QuantileSketch, SketchMismatchError,
+    exact_sum, fraction_from_state, fraction_state,
+)
 
 load_dotenv()
 
-def run_analyst_pipeline(df: pd.DataFrame) -> dict:
-    """Simple analyst that returns basic statistics without complex tools"""
-    
+class StatsAccumulator:
+    """
+    Running statistics that can be fed a whole DataFrame or successive chunks
+    of it; the finished analysis is the same either way.
+
+    Every statistic is a mergeable sketch (see agents/sketches.py), so the
+    state can be saved with a report (`to_state`) and resumed later with the
+    rows appended since (`from_state`) for the same result as a full rescan.
+    """
+
+    QUANTILES = {"p25": 0.25, "p50": 0.5, "p75": 0.75}
+
+    def __init__(self, constraints: dict = None):
+        self.constraints = load_constraints() if constraints is None else constraints
+        self.rows = 0
+        self.column_names = None
+        self.missing = {}
+        self.numeric = {}
+        self.non_numeric = set()
+        self.distinct = {}
+        self.rules = RuleEngine(self.constraints)
+        self.rule_violations = {}
+        self.groups = GroupStatsAccumulator(self.constraints)
+        self.anomalies = AnomalyDetector(self.constraints)
+
+    def update(self, df: pd.DataFrame):
+        if self.column_names is None:
+            self.column_names = df.columns.tolist()
+            self.missing = dict.fromkeys(self.column_names, 0)
+        elif df.columns.tolist() != self.column_names:
+            raise SketchMismatchError("Appended rows must have the same columns as the base report")
+
+        row_offset = self.rows
+        self.rows += int(df.shape[0])
+        for col, n in df.isna().sum().items():
+            self.missing[col] += int(n)
+
+        for name, n in self.rules.evaluate(df).counts.items():
+            self.rule_violations[name] = self.rule_violations.get(name, 0) + n
+
+        # A column is numeric only if every chunk parsed it as numeric
+        numeric_cols = set(df.select_dtypes(include='number').columns)
+        self.non_numeric.update(c for c in df.columns if c not in numeric_cols)
+        self.groups.update(df, numeric_cols - self.non_numeric)
+        self.anomalies.update(df, [c for c in df.columns if c in numeric_cols and c not in self.non_numeric], row_offset)
+
+        for col in df.columns:
+            self.distinct.setdefault(col, DistinctSketch()).update(df[col])
+
+        for col in df.columns:
+            if col in self.non_numeric:
+                continue
+            values = df[col].to_numpy(dtype="float64", na_value=np.nan)
+            values = values[~np.isnan(values)]
+            finite = values[np.isfinite(values)]
+            acc = self.numeric.setdefault(col, {
+                "count": 0, "sum": Fraction(0), "sumsq": Fraction(0), "inf": [0, 0],
+                "min": None, "max": None, "quantiles": QuantileSketch(),
+            })
+            acc["count"] += int(values.size)
+            acc["sum"] += exact_sum(finite)
+            acc["sumsq"] += exact_sum(finite * finite)
+            acc["inf"][0] += int(np.count_nonzero(values == np.inf))
+            acc["inf"][1] += int(np.count_nonzero(values == -np.inf))
+            acc["quantiles"].update(finite)
+            if values.size:
+                low, high = float(values.min()), float(values.max())
+                acc["min"] = low if acc["min"] is None else min(acc["min"], low)
+                acc["max"] = high if acc["max"] is None else max(acc["max"], high)
+
+    def _moments(self, acc: dict) -> tuple:
+        # (mean, std); None where the figure is undefined or not finite
+        pos_inf, neg_inf = acc["inf"]
+        n = acc["count"]
+        if pos_inf or neg_inf or not n:
+            return None, None
+        mean = acc["sum"] / n
+        if n < 2:
+            return float(mean), None
+        variance = max(Fraction(0), (acc["sumsq"] - acc["sum"] * mean) / (n - 1))
+        try:
+            return float(mean), math.sqrt(variance)
+        except OverflowError:
+            return float(mean), None
 
+    def result(self) -> dict:
+        columns = self.column_names or []
+        stats = {
+            "rows": self.rows,
+            "columns": len(columns),
+            "column_names": columns,
+            "numeric_summary": {},
+            "distinct_counts": {col: self.distinct[col].estimate() for col in columns if col in self.distinct},
+            "group_statistics": self.groups.result(),
+            "rule_violations": self.rule_violations
+        }
+
+        for col in columns:
+            acc = self.numeric.get(col)
+            if acc is None or col in self.non_numeric:
+                continue
+            mean, std = self._moments(acc)
+            low, high = acc["min"], acc["max"]
+            summary = {
+                "mean": mean,
+                "std": std,
+                "min": low if low is not None and math.isfinite(low) else None,
+                "max": high if high is not None and math.isfinite(high) else None,
+                "missing": self.missing[col]
+            }
+            for label, q in self.QUANTILES.items():
+                value = acc["quantiles"].quantile(q)
+                # The sketch's bucket value can overshoot the exact extremes
+                summary[label] = None if math.isnan(value) else min(max(value, low), high)
+            stats["numeric_summary"][col] = summary
+
+        cells = self.rows * len(columns)
+        missing_ratio = sum(self.missing.values()) / cells if cells else 0.0
+        quality_score = max(0, 100 - (missing_ratio * 100))
 
-    stats = {
-        "rows": int(df.shape[0]),
-        "columns": int(df.shape[1]),
-        "column_names": df.columns.tolist(),
-        "numeric_summary": {}
-    }
-    
+        issues = []
+        if missing_ratio > 0.1:
+            issues.append(f"High missing data: {missing_ratio*100:.1f}%")
+        if self.rows < 10:
+            issues.append("Dataset too small")
+        issues += [issue for issue, _ in violation_issues(self.rules.rules, self.rule_violations)]
+        
+        quality_analysis = {
+            "score": int(quality_score),
+            "issues": issues
+        }
 
+        sketches = {
+            col: self.numeric[col]["quantiles"] for col in columns
+            if col in self.numeric and col not in self.non_numeric
+        }
+        return {
+            "quality_analysis": quality_analysis,
+            "statistics": stats,
+            "anomalies": self.anomalies.result(sketches),
+        }
 
-    numeric_cols = df.select_dtypes(include='number').columns
-    for col in numeric_cols:
-        stats["numeric_summary"][col] = {
-            "mean": float(df[col].mean()),
-            "min": float(df[col].min()),
-            "max": float(df[col].max()),
-            "missing": int(df[col].isna().sum())
+    def to_state(self) -> dict:
+        """JSON-serializable snapshot of every sketch, persisted next to the report."""
+        return {
+            "version": 3,
+            "constraints": self.constraints,
+            "rows": self.rows,
+            "column_names": self.column_names,
+            "missing": self.missing,
+            "non_numeric": sorted(self.non_numeric),
+            "numeric": {
+                col: {
+                    "count": acc["count"],
+                    "sum": fraction_state(acc["sum"]),
+                    "sumsq": fraction_state(acc["sumsq"]),
+                    "inf": acc["inf"],
+                    "min": acc["min"],
+                    "max": acc["max"],
+                    "quantiles": acc["quantiles"].to_state(),
+                }
+                for col, acc in self.numeric.items()
+            },
+            "distinct": {col: sketch.to_state() for col, sketch in self.distinct.items()},
+            "rule_violations": self.rule_violations,
+            "unique_seen": {
+                name: base64.b64encode(np.asarray(seen, dtype="<u8").tobytes()).decode()
+                for name, seen in self.rules.seen_state().items()
+            },
+            "groups": self.groups.to_state(),
+            "anomalies": self.anomalies.to_state(),
         }
-    
-
-
-    missing_ratio = df.isna().sum().sum() / (df.shape[0] * df.shape[1])
-    quality_score = max(0, 100 - (missing_ratio * 100))
-    
-
-
-    issues = []
-    if missing_ratio > 0.1:
-        issues.append(f"High missing data: {missing_ratio*100:.1f}%")
-    if df.shape[0] < 10:
-        issues.append("Dataset too small")
-    
-    quality_analysis = {
-        "score": int(quality_score),
-        "issues": issues
-    }
-    
-    return {
-        "quality_analysis": quality_analysis,
-        "statistics": stats,
-        "final_data": df.to_json()
-    }
+
+    @classmethod
+    def from_state(cls, state: dict, constraints: dict = None) -> "StatsAccumulator":
+        """
+        Resumes a saved state. Rule counts are only mergeable under the same
+        rules, so a state saved with other quality constraints is refused.
+        """
+        acc = cls(constraints)
+        if state.get("version") != 3:
+            raise SketchMismatchError("Unsupported sketch version")
+        if state["constraints"] != acc.constraints:
+            raise SketchMismatchError("The base report was analyzed with different quality constraints")
+        acc.rows = state["rows"]
+        acc.column_names = state["column_names"]
+        acc.missing = dict(state["missing"])
+        acc.non_numeric = set(state["non_numeric"])
+        for col, s in state["numeric"].items():
+            acc.numeric[col] = {
+                "count": s["count"],
+                "sum": fraction_from_state(s["sum"]),
+                "sumsq": fraction_from_state(s["sumsq"]),
+                "inf": list(s["inf"]),
+                "min": s["min"],
+                "max": s["max"],
+                "quantiles": QuantileSketch.from_state(s["quantiles"]),
+            }
+        acc.distinct = {col: DistinctSketch.from_state(s) for col, s in state["distinct"].items()}
+        acc.rule_violations = dict(state["rule_violations"])
+        acc.groups = GroupStatsAccumulator.from_state(state["groups"], acc.constraints)
+        acc.anomalies = AnomalyDetector.from_state(state["anomalies"], acc.constraints)
+        acc.rules.load_seen_state({
+            name: np.frombuffer(base64.b64decode(seen), dtype="<u8").astype(np.uint64)
+            for name, seen in state["unique_seen"].items()
+        })
+        return acc
+
+
+def run_analyst_pipeline(df: pd.DataFrame, include_data: bool = True, accumulator: StatsAccumulator = None) -> dict:
+    """
+    Simple analyst that returns basic statistics without complex tools.
+    Pass an `accumulator` resumed from a prior report to analyze `df` as
+    rows appended to it; the caller keeps the accumulator's state.
+    """
+    acc = StatsAccumulator() if accumulator is None else accumulator
+    acc.update(df)
+    result = acc.result()
+    if include_data:
+        result["final_data"] = df.to_json()
+    return result
+
+
+def run_analyst_pipeline_chunked(chunks: Iterable[pd.DataFrame], accumulator: StatsAccumulator = None) -> dict:
+    """
+    Same analysis as run_analyst_pipeline, computed incrementally over an
+    iterable of DataFrame chunks so memory stays bounded by the chunk size.
+    """
+    acc = StatsAccumulator() if accumulator is None else accumulator
+    for chunk in chunks:
+        acc.update(chunk)
+    return acc.result()
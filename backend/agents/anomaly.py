@@ -0,0 +1,340 @@
+"""
+Row-level outlier detection on numeric columns, computed in the analyst's
+single pass over the data with bounded memory.
+
+  - IQR fences (Tukey): below Q1 - k*IQR or above Q3 + k*IQR.
+  - Robust z-score: (x - median) / (IQR / 1.349), flagged above a threshold.
+    The IQR-based sigma is used because the median absolute deviation
+    would need the median before the pass.
+
+Quartiles come from the column's mergeable quantile sketch. While scanning,
+each column keeps its TAIL_SIZE smallest and largest values with their row
+numbers. Outlier counts are exact whenever a tail holds fewer than
+TAIL_SIZE outliers; beyond that they are read off the sketch and marked
+approximate. The top-N offending rows come from the same tails.
+
+An optional multivariate isolation forest ("isolation_forest": true) is
+fitted on a seeded subsample of the first FIT_ROWS rows and scores every
+row as it streams past. Like the other statistics it is kept in the saved
+analysis state, but rows appended later are scored with the forest of the
+original upload.
+
+Settings live under "anomaly" in config/quality_constraints.json:
+
+    "anomaly": {"iqr_k": 1.5, "z_threshold": 3.5, "top_n": 10,
+                "isolation_forest": false, "isolation_threshold": 0.6}
+"""
+import base64
+import math
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from agents.sketches import QuantileSketch
+
+TAIL_SIZE = 1000
+FIT_ROWS = 65536
+SAMPLE_SIZE = 256
+TREES = 32
+_SCORE_BLOCK = 1024
+
+DEFAULTS = {
+    "iqr_k": 1.5,
+    "z_threshold": 3.5,
+    "top_n": 10,
+    "isolation_forest": False,
+    "isolation_threshold": 0.6,
+}
+
+# IQR of a normal distribution in standard deviations
+_IQR_SIGMA = 1.349
+
+
+def _keep(values: np.ndarray, rows: np.ndarray, size: int, largest: bool):
+    """The `size` most extreme (value, row) pairs; ties go to the lower row number."""
+    if values.size > size:
+        k = values.size - size if largest else size - 1
+        kth = np.partition(values, k)[k]
+        sel = values >= kth if largest else values <= kth
+        values, rows = values[sel], rows[sel]
+    order = np.lexsort((rows, -values if largest else values))[:size]
+    return values[order], rows[order]
+
+
+def _average_path(n) -> np.ndarray:
+    """Average path length of an unsuccessful BST search among n points (c(n) in the paper)."""
+    n = np.asarray(n, dtype=np.float64)
+    out = np.zeros_like(n)
+    big = n > 2
+    out[n == 2] = 1.0
+    out[big] = 2 * (np.log(n[big] - 1) + np.euler_gamma) - 2 * (n[big] - 1) / n[big]
+    return out
+
+
+class IsolationForest:
+    """
+    Isolation forest stored as complete binary trees of fixed depth, so a
+    whole block of rows descends every tree level by level with array
+    indexing. Branches that stop early have an infinite threshold and send
+    rows down their leftmost leaf, whose path length is precomputed.
+    """
+
+    def __init__(self, trees: int = TREES, sample_size: int = SAMPLE_SIZE, seed: int = 0):
+        self.trees = trees
+        self.sample_size = sample_size
+        self.seed = seed
+        self.depth = 0
+        self.feature = None
+        self.threshold = None
+        self.leaf_path = None
+        self.impute = None
+        self.norm = 1.0
+
+    def fit(self, X: np.ndarray):
+        rng = np.random.default_rng(self.seed)
+        psi = min(self.sample_size, X.shape[0])
+        self.depth = max(1, math.ceil(math.log2(max(psi, 2))))
+        internal, leaves = 2 ** self.depth - 1, 2 ** self.depth
+        self.impute = np.nan_to_num(np.nanmedian(X, axis=0)) if X.size else np.zeros(X.shape[1])
+        X = np.where(np.isnan(X), self.impute, X)
+        self.feature = np.zeros((self.trees, internal), dtype=np.intp)
+        self.threshold = np.full((self.trees, internal), np.inf)
+        self.leaf_path = np.zeros((self.trees, leaves))
+        self.norm = max(float(_average_path(psi)), 1.0)
+
+        for t in range(self.trees):
+            sample = X[rng.choice(X.shape[0], psi, replace=False)]
+            stack = [(0, np.arange(psi), 0)]
+            while stack:
+                node, idx, depth = stack.pop()
+                if depth < self.depth and idx.size > 1:
+                    low, high = sample[idx].min(axis=0), sample[idx].max(axis=0)
+                    candidates = np.flatnonzero(high > low)
+                    if candidates.size:
+                        f = int(rng.choice(candidates))
+                        split = rng.uniform(low[f], high[f])
+                        self.feature[t, node], self.threshold[t, node] = f, split
+                        right = sample[idx, f] >= split
+                        stack.append((2 * node + 1, idx[~right], depth + 1))
+                        stack.append((2 * node + 2, idx[right], depth + 1))
+                        continue
+                # External node: rows reaching it keep going left down to one leaf slot
+                leaf = node
+                while leaf < internal:
+                    leaf = 2 * leaf + 1
+                self.leaf_path[t, leaf - internal] = depth + float(_average_path(idx.size))
+        return self
+
+    def score(self, X: np.ndarray) -> np.ndarray:
+        """Anomaly scores in (0, 1]; above ~0.6 is unusually easy to isolate."""
+        X = np.where(np.isfinite(X), X, self.impute)
+        internal = 2 ** self.depth - 1
+        feature, threshold, leaf_path = self.feature.ravel(), self.threshold.ravel(), self.leaf_path.ravel()
+        tree_nodes = (np.arange(self.trees) * internal)[:, None]
+        tree_leaves = (np.arange(self.trees) * (internal + 1) - internal)[:, None]
+        total = np.empty(X.shape[0])
+        # All trees descend together; small blocks keep the (trees x rows) arrays in cache
+        for start in range(0, X.shape[0], _SCORE_BLOCK):
+            block = np.ascontiguousarray(X[start:start + _SCORE_BLOCK].T)
+            n = block.shape[1]
+            values, cols = block.ravel(), np.arange(n)
+            node = np.zeros((self.trees, n), dtype=np.intp)
+            for _ in range(self.depth):
+                flat = tree_nodes + node
+                node = 2 * node + 1 + (values[feature[flat] * n + cols] >= threshold[flat])
+            total[start:start + n] = leaf_path[tree_leaves + node].sum(axis=0)
+        return np.power(2.0, -(total / self.trees) / self.norm)
+
+    def to_state(self) -> dict:
+        def pack(a, dtype):
+            return base64.b64encode(np.ascontiguousarray(a, dtype=dtype).tobytes()).decode()
+
+        return {
+            "trees": self.trees, "sample_size": self.sample_size, "seed": self.seed,
+            "depth": self.depth, "norm": self.norm, "features": int(self.impute.size),
+            "feature": pack(self.feature, "<i4"), "threshold": pack(self.threshold, "<f8"),
+            "leaf_path": pack(self.leaf_path, "<f8"), "impute": pack(self.impute, "<f8"),
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "IsolationForest":
+        forest = cls(state["trees"], state["sample_size"], state["seed"])
+        forest.depth, forest.norm = state["depth"], state["norm"]
+
+        def unpack(key, dtype, shape):
+            return np.frombuffer(base64.b64decode(state[key]), dtype=dtype).reshape(shape).copy()
+
+        internal, leaves = 2 ** forest.depth - 1, 2 ** forest.depth
+        forest.feature = unpack("feature", "<i4", (forest.trees, internal)).astype(np.intp)
+        forest.threshold = unpack("threshold", "<f8", (forest.trees, internal))
+        forest.leaf_path = unpack("leaf_path", "<f8", (forest.trees, leaves))
+        forest.impute = unpack("impute", "<f8", (state["features"],))
+        return forest
+
+
+class AnomalyDetector:
+    def __init__(self, cfg: dict = None):
+        self.settings = dict(DEFAULTS, **((cfg or {}).get("anomaly") or {}))
+        # column -> {"low": (values, rows), "high": (values, rows)}
+        self.tails = {}
+        self.columns = None
+        self.forest = None
+        self.fit_buffer = []
+        self.fit_rows = 0
+        self.scored = {"count": 0, "flagged": 0, "top": (np.empty(0), np.empty(0, dtype=np.int64))}
+
+    def update(self, df: pd.DataFrame, value_columns: List[str], row_offset: int):
+        for col in value_columns:
+            values = df[col].to_numpy(dtype="float64", na_value=np.nan)
+            finite = np.isfinite(values)
+            rows = np.flatnonzero(finite) + row_offset
+            values = values[finite]
+            tail = self.tails.get(col)
+            if tail is not None:
+                # Only values beyond the current tails can enter them
+                low_v, low_r = tail["low"]
+                high_v, high_r = tail["high"]
+                if low_v.size == TAIL_SIZE and high_v.size == TAIL_SIZE:
+                    sel = (values <= low_v[-1]) | (values >= high_v[-1])
+                    values, rows = values[sel], rows[sel]
+                values_low, rows_low = np.concatenate([low_v, values]), np.concatenate([low_r, rows])
+                values_high, rows_high = np.concatenate([high_v, values]), np.concatenate([high_r, rows])
+            else:
+                values_low = values_high = values
+                rows_low = rows_high = rows
+            self.tails[col] = {
+                "low": _keep(values_low, rows_low, TAIL_SIZE, largest=False),
+                "high": _keep(values_high, rows_high, TAIL_SIZE, largest=True),
+            }
+
+        if self.settings["isolation_forest"]:
+            self._update_forest(df, value_columns, row_offset)
+
+    def _matrix(self, df: pd.DataFrame) -> np.ndarray:
+        return np.column_stack([
+            pd.to_numeric(df[c], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+            if c in df.columns else np.full(df.shape[0], np.nan)
+            for c in self.columns
+        ]) if self.columns else np.empty((df.shape[0], 0))
+
+    def _update_forest(self, df: pd.DataFrame, value_columns: List[str], row_offset: int):
+        if self.columns is None:
+            self.columns = list(value_columns)
+        if not self.columns:
+            return
+        if self.forest is not None:
+            self._score(self._matrix(df), row_offset)
+            return
+        X = self._matrix(df)
+        take = min(FIT_ROWS - self.fit_rows, X.shape[0])
+        self.fit_buffer.append((X[:take], row_offset))
+        self.fit_rows += take
+        if self.fit_rows == FIT_ROWS:
+            self._fit()
+            if take < X.shape[0]:
+                self._score(X[take:], row_offset + take)
+
+    def _fit(self):
+        """Fits on the buffered leading rows, then scores them."""
+        if self.forest is not None or not self.fit_buffer:
+            return
+        self.forest = IsolationForest().fit(np.concatenate([X for X, _ in self.fit_buffer]))
+        for X, offset in self.fit_buffer:
+            self._score(X, offset)
+        self.fit_buffer = []
+
+    def _score(self, X: np.ndarray, row_offset: int):
+        top_n = self.settings["top_n"]
+        for start in range(0, X.shape[0], 65536):
+            scores = self.forest.score(X[start:start + 65536])
+            rows = np.arange(scores.size, dtype=np.int64) + row_offset + start
+            self.scored["count"] += int(scores.size)
+            self.scored["flagged"] += int(np.count_nonzero(scores > self.settings["isolation_threshold"]))
+            top_scores, top_rows = self.scored["top"]
+            self.scored["top"] = _keep(np.concatenate([top_scores, scores]), np.concatenate([top_rows, rows]), top_n, largest=True)
+
+    def _column_result(self, col: str, sketch: QuantileSketch) -> dict:
+        k, z_threshold, top_n = self.settings["iqr_k"], self.settings["z_threshold"], self.settings["top_n"]
+        q1, median, q3 = sketch.quantile(0.25), sketch.quantile(0.5), sketch.quantile(0.75)
+        iqr = q3 - q1
+        lower, upper = q1 - k * iqr, q3 + k * iqr
+        entry = {"median": median, "iqr": iqr, "lower_fence": lower, "upper_fence": upper,
+                 "iqr_outliers": 0, "zscore_outliers": 0, "approximate": False, "top_rows": []}
+        tail = self.tails.get(col)
+        if tail is None or not iqr > 0:
+            # No values or no spread: robust scores are undefined
+            return {key: (None if isinstance(v, float) and math.isnan(v) else v) for key, v in entry.items()}
+
+        sigma = iqr / _IQR_SIGMA
+        z_low, z_high = median - z_threshold * sigma, median + z_threshold * sigma
+        low_v, low_r = tail["low"]
+        high_v, high_r = tail["high"]
+        for name, below, above in (("iqr_outliers", lower, upper), ("zscore_outliers", z_low, z_high)):
+            n_low, n_high = int(np.count_nonzero(low_v < below)), int(np.count_nonzero(high_v > above))
+            if n_low == TAIL_SIZE:
+                n_low, entry["approximate"] = sketch.count_below(below), True
+            if n_high == TAIL_SIZE:
+                n_high, entry["approximate"] = sketch.count_above(above), True
+            entry[name] = n_low + n_high
+
+        values = np.concatenate([low_v[low_v < lower], high_v[high_v > upper]])
+        rows = np.concatenate([low_r[low_v < lower], high_r[high_v > upper]])
+        scores = np.abs(values - median) / sigma
+        order = np.lexsort((rows, -scores))[:top_n]
+        entry["top_rows"] = [
+            {"row": int(rows[i]), "value": float(values[i]), "robust_z": float(np.sign(values[i] - median) * scores[i])}
+            for i in order
+        ]
+        return entry
+
+    def result(self, sketches: Dict[str, QuantileSketch]) -> dict:
+        self._fit()
+        columns = {col: self._column_result(col, sketch) for col, sketch in sketches.items()}
+        flagged = [dict(r, column=col) for col, entry in columns.items() for r in entry["top_rows"]]
+        flagged.sort(key=lambda r: (-abs(r["robust_z"]), r["row"]))
+        out = {
+            "settings": {k: self.settings[k] for k in ("iqr_k", "z_threshold", "top_n")},
+            "columns": columns,
+            "total_iqr_outliers": sum(e["iqr_outliers"] for e in columns.values()),
+            "top_rows": flagged[:self.settings["top_n"]],
+        }
+        if self.forest is not None:
+            scores, rows = self.scored["top"]
+            out["isolation_forest"] = {
+                "columns": self.columns,
+                "threshold": self.settings["isolation_threshold"],
+                "scored_rows": self.scored["count"],
+                "flagged": self.scored["flagged"],
+                "top_rows": [{"row": int(r), "score": float(s)} for s, r in zip(scores, rows)],
+            }
+        return out
+
+    def to_state(self) -> dict:
+        self._fit()
+
+        def pair(values, rows):
+            return [values.tolist(), rows.tolist()]
+
+        scores, rows = self.scored["top"]
+        return {
+            "tails": {col: {side: pair(*t[side]) for side in ("low", "high")} for col, t in self.tails.items()},
+            "columns": self.columns,
+            "forest": None if self.forest is None else self.forest.to_state(),
+            "scored": {"count": self.scored["count"], "flagged": self.scored["flagged"], "top": pair(scores, rows)},
+        }
+
+    @classmethod
+    def from_state(cls, state: dict, cfg: dict = None) -> "AnomalyDetector":
+        detector = cls(cfg)
+
+        def pair(p):
+            return np.asarray(p[0], dtype=np.float64), np.asarray(p[1], dtype=np.int64)
+
+        detector.tails = {col: {side: pair(t[side]) for side in ("low", "high")} for col, t in state["tails"].items()}
+        detector.columns = state["columns"]
+        if state["forest"] is not None:
+            detector.forest = IsolationForest.from_state(state["forest"])
+        scored = state["scored"]
+        detector.scored = {"count": scored["count"], "flagged": scored["flagged"], "top": pair(scored["top"])}
+        return detector
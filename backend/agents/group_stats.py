@@ -0,0 +1,411 @@
+"""
+Per-group and per-period statistics for every numeric column.
+
+Rows are reduced to cells of (group value, period) over integer key codes:
+categorical columns contribute their codes for free, other keys are
+factorized once and only their distinct values are normalized. Cells hold
+row counts and per-column counts and sums, so they add up across chunks and
+appended uploads; per-group, per-period and month-over-month figures are all
+derived from the (small) cell tables.
+
+Sums come from one hash aggregation per group dimension (pyarrow) over all
+value columns. Integer columns, and float columns whose values have at most
+MAX_DECIMAL_PLACES decimals (prices, scores: what CSV files hold), are
+summed as integers and kept exact, so a file gives the same figures whether
+it was read whole, in chunks or as appended deltas. Other float columns are
+plain float sums that agree with a single pass up to the last digits.
+
+Dimensions and the period column can be set in config/quality_constraints.json:
+
+    "group_by": ["Department"], "period_column": "Month"
+
+otherwise the period is the first datetime column or column named Month,
+Period or Date, and dimensions are the other non-numeric columns with at
+most MAX_GROUP_VALUES distinct values.
+"""
+import math
+from fractions import Fraction
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from agents.sketches import fraction_from_state, fraction_state
+
+PERIOD_NAMES = ("month", "period", "date")
+MAX_GROUP_VALUES = 50
+MISSING = "(missing)"
+ALL = "(all)"
+
+# Float columns with at most this many decimals are summed exactly, as integers
+MAX_DECIMAL_PLACES = 6
+
+# Distinct values are looked at in a prefix first, so free-text columns are skipped cheaply
+_PROBE_ROWS = 10_000
+# Values tried against each number of decimal places before the whole column is checked
+_DECIMAL_PROBE = 1_000
+_DECIMAL_BLOCK = 1 << 15
+
+
+def _labels(values) -> List[str]:
+    return [str(v) for v in values]
+
+
+def _period_labels(values) -> List[str]:
+    """Month labels (YYYY-MM) for the distinct values of the period column."""
+    if isinstance(values, pd.PeriodIndex):
+        return [str(p.asfreq("M")) for p in values]
+    parsed = pd.to_datetime(pd.Index(values), errors="coerce", format="mixed")
+    return [MISSING if pd.isna(p) else p.strftime("%Y-%m") for p in parsed]
+
+
+def _encode(s: pd.Series):
+    """(codes, uniques); missing values get code -1."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s.cat.codes.to_numpy(), s.cat.categories
+    return pd.factorize(s, use_na_sentinel=True)
+
+
+def _map_codes(codes: np.ndarray, labels: List[str], table: Dict[str, int]) -> np.ndarray:
+    """Translates chunk-local codes to codes into `table` (label -> global code), -1 -> MISSING."""
+    local = np.empty(len(labels) + 1, dtype=np.int32)
+    for i, label in enumerate(labels + [MISSING]):
+        local[i] = table.setdefault(label, len(table))
+    # -1 indexes the last slot, i.e. MISSING
+    return local[codes]
+
+
+def _decimal_scale(values: np.ndarray, missing_count: int):
+    """
+    (10**places, values * 10**places) for the fewest decimal places that
+    represent every value exactly, or (None, values) if more than
+    MAX_DECIMAL_PLACES would be needed.
+    """
+    probe = values[:_DECIMAL_PROBE]
+    probe = probe[np.isfinite(probe)]
+    for places in range(MAX_DECIMAL_PLACES + 1):
+        scale = 10 ** places
+        if np.array_equal(np.rint(probe * scale) / scale, probe):
+            break
+    else:
+        return None, values
+    # Block by block, so the temporaries stay in cache
+    scaled = np.empty_like(values)
+    error = np.empty(min(len(values), _DECIMAL_BLOCK))
+    mismatches, peak = 0, 0.0
+    for start in range(0, len(values), _DECIMAL_BLOCK):
+        block, out = values[start:start + _DECIMAL_BLOCK], scaled[start:start + _DECIMAL_BLOCK]
+        check = error[:len(block)]
+        np.multiply(block, scale, out=out)
+        np.rint(out, out=out)
+        np.divide(out, scale, out=check)
+        np.subtract(check, block, out=check)
+        mismatches += np.count_nonzero(check)
+        peak = max(peak, np.fmax.reduce(out), -np.fmin.reduce(out))
+    # Missing and infinite values leave NaN, which counts as nonzero; every other value must round-trip
+    if mismatches != missing_count:
+        return None, values
+    # The scaled values add exactly in float64 while every partial sum stays below 2**53
+    if peak * (len(values) - missing_count) >= 2.0 ** 53:
+        return None, values
+    return scale, scaled
+
+
+def _value_array(s: pd.Series):
+    """
+    Zero-copy arrow view of a numeric column with NaN marked as null, so
+    sums skip it like pandas does, plus the row mask of missing values and
+    the scale its values were multiplied by to make them integers (1 for
+    integer columns, None for floats summed as floats).
+    """
+    values = s.to_numpy()
+    if values.dtype.kind in "iu":
+        return pa.array(values), None, 1
+    if values.dtype.kind != "f":
+        values = s.astype("float64").to_numpy()
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    missing = np.isnan(values)
+    missing_count = int(np.count_nonzero(missing))
+    scale, values = _decimal_scale(values, missing_count)
+    if not missing_count:
+        return pa.array(values), None, scale
+    # Packing the validity bitmap by hand is far cheaper than pa.array(mask=...)
+    validity = pa.py_buffer(np.packbits(~missing, bitorder="little"))
+    return pa.Array.from_buffers(pa.float64(), len(values), [validity, pa.py_buffer(values)]), missing, scale
+
+
+def _cell_sums(grouped: pa.Table, col: str, scale) -> list:
+    """Per-cell sums of `col` from the aggregation: ints or Fractions when exact, floats otherwise."""
+    totals = grouped.column(f"{col}_sum").fill_null(0).to_numpy().tolist()
+    if scale is None:
+        return totals
+    return [Fraction(int(t), scale) for t in totals]
+
+
+def _add_sums(total: dict, part: dict):
+    for col, value in part.items():
+        total[col] = total.get(col, 0) + value
+
+
+def _sum_state(value):
+    return float(value) if isinstance(value, float) else fraction_state(Fraction(value))
+
+
+def _sum_from_state(value):
+    # Exact sums are stored as "numerator/denominator", float sums as numbers
+    return fraction_from_state(value) if isinstance(value, str) else float(value)
+
+
+def _finite(value) -> Optional[float]:
+    # None for sums with infinite values, or too large for a float
+    try:
+        value = float(value)
+    except OverflowError:
+        return None
+    return value if math.isfinite(value) else None
+
+
+class GroupStatsAccumulator:
+    def __init__(self, cfg: dict = None):
+        cfg = cfg or {}
+        self.group_by = cfg.get("group_by")
+        self.period_column = cfg.get("period_column")
+        self.dimensions = None
+        self.value_columns = None
+        self.periods = {}
+        # dimension -> {"values": {label: code}, "cells": DataFrame of row and value counts,
+        #               "sums": {(key, period): {column: sum (int or Fraction when exact)}}}
+        self.tables = {}
+
+    def _detect(self, df: pd.DataFrame, numeric_cols: set):
+        if self.period_column is None:
+            for col in df.columns:
+                if str(col).lower() in PERIOD_NAMES or pd.api.types.is_datetime64_any_dtype(df[col]):
+                    self.period_column = col
+                    break
+        if self.period_column is not None and self.period_column not in df.columns:
+            self.period_column = None
+
+        if self.group_by is not None:
+            self.dimensions = [c for c in self.group_by if c in df.columns]
+        else:
+            self.dimensions = [
+                c for c in df.columns
+                if c not in numeric_cols and c != self.period_column
+                and df[c].iloc[:_PROBE_ROWS].nunique() <= MAX_GROUP_VALUES
+            ]
+        if not self.dimensions and self.period_column is not None:
+            # Period figures alone still come from a (single-valued) dimension's cells
+            self.dimensions = [None]
+        self.value_columns = [c for c in df.columns if c in numeric_cols and c != self.period_column]
+        for dim in self.dimensions:
+            self.tables[dim] = {"values": {}, "cells": None, "sums": {}}
+
+    def _drop_dimension(self, dim):
+        table = self.tables.pop(dim)
+        self.dimensions.remove(dim)
+        if self.dimensions or self.period_column is None:
+            return
+        # Last dimension gone: keep its rows as period totals under a single key
+        self.dimensions = [None]
+        cells = table["cells"]
+        sums = {}
+        if cells is not None:
+            cells = cells.groupby(level="period").sum()
+            cells.index = pd.MultiIndex.from_arrays([np.zeros(len(cells), dtype=np.int64), cells.index], names=["key", "period"])
+            for (_, period), cell_sums in table["sums"].items():
+                _add_sums(sums.setdefault((0, period), {}), cell_sums)
+        self.tables[None] = {"values": {ALL: 0}, "cells": cells, "sums": sums}
+
+    def update(self, df: pd.DataFrame, numeric_cols: set):
+        if self.dimensions is None:
+            self._detect(df, numeric_cols)
+        # A value column stays one only while every chunk parsed it as numeric
+        dropped = [c for c in self.value_columns if c not in numeric_cols]
+        if dropped:
+            self.value_columns = [c for c in self.value_columns if c not in dropped]
+            for table in self.tables.values():
+                if table["cells"] is not None:
+                    table["cells"] = table["cells"].drop(columns=[f"count:{c}" for c in dropped])
+                for cell_sums in table["sums"].values():
+                    for c in dropped:
+                        cell_sums.pop(c, None)
+        if not self.dimensions or df.shape[0] == 0:
+            return
+
+        if self.period_column is not None:
+            codes, uniques = _encode(df[self.period_column])
+            period_codes = _map_codes(codes, _period_labels(uniques), self.periods)
+        else:
+            period_codes = np.zeros(df.shape[0], dtype=np.int32)
+            self.periods.setdefault(ALL, 0)
+
+        names = list(self.value_columns)
+        arrays, missing, scales = zip(*(_value_array(df[col]) for col in names)) if names else ((), (), ())
+        aggregations = [(col, "sum") for col in names]
+
+        for dim in list(self.dimensions):
+            if dim not in self.tables:
+                continue
+            table = self.tables[dim]
+            if dim is None:
+                key_codes = _map_codes(np.zeros(df.shape[0], dtype=np.intp), [ALL], table["values"])
+            else:
+                codes, uniques = _encode(df[dim])
+                key_codes = _map_codes(codes, _labels(uniques), table["values"])
+            if dim is not None and len(table["values"]) > MAX_GROUP_VALUES + 1 and self.group_by is None:
+                # Too many distinct values to be a useful dimension, now or after more rows
+                self._drop_dimension(dim)
+                if self.dimensions != [None]:
+                    continue
+                dim, table = None, self.tables[None]
+                key_codes = _map_codes(np.zeros(df.shape[0], dtype=np.intp), [ALL], table["values"])
+
+            stride = np.int64(len(self.periods))
+            cell = key_codes.astype(np.int64) * stride + period_codes
+            # Sums in one hash aggregation; counts are rows minus missing values per cell
+            grouped = pa.Table.from_arrays(list(arrays) + [pa.array(cell)], names=names + ["__cell"]) \
+                .group_by("__cell").aggregate(aggregations)
+            index = grouped.column("__cell").to_numpy()
+            size = int(index.max()) + 1
+            rows = np.bincount(cell, minlength=size)[index]
+            data = {"rows": rows}
+            cell_sums = [{} for _ in index]
+            for col, mask, scale in zip(names, missing, scales):
+                if mask is None:
+                    data[f"count:{col}"] = rows
+                else:
+                    data[f"count:{col}"] = rows - np.bincount(cell[np.flatnonzero(mask)], minlength=size)[index]
+                for entry, total in zip(cell_sums, _cell_sums(grouped, col, scale)):
+                    entry[col] = total
+            keys, periods = index // stride, index % stride
+            cells = pd.DataFrame(
+                data, index=pd.MultiIndex.from_arrays([keys, periods], names=["key", "period"]),
+            ).astype("float64")
+            table["cells"] = cells if table["cells"] is None else table["cells"].add(cells, fill_value=0)
+            for key, period, entry in zip(keys.tolist(), periods.tolist(), cell_sums):
+                _add_sums(table["sums"].setdefault((key, period), {}), entry)
+
+    def result(self) -> Optional[dict]:
+        if not self.dimensions:
+            return None
+        period_names = {code: label for label, code in self.periods.items()}
+        periods = sorted(label for label in self.periods if label not in (MISSING, ALL))
+
+        def mean(total, count):
+            # Exact sum over the count, rounded once
+            return _finite(total / int(count)) if count else None
+
+        def summarize(frame: pd.DataFrame, sums: dict) -> dict:
+            """Rows plus count/sum/mean per column of an aggregate of cells."""
+            totals = frame.sum()
+            cell_sums = [sums.get(cell, {}) for cell in frame.index]
+            columns = {}
+            for col in self.value_columns:
+                count = int(totals[f"count:{col}"])
+                total = sum((entry.get(col, 0) for entry in cell_sums), Fraction(0))
+                columns[col] = {"count": count, "sum": _finite(total), "mean": mean(total, count)}
+            return {"rows": int(totals["rows"]), "columns": columns}
+
+        def trend(frame: pd.DataFrame, sums: dict) -> dict:
+            """Per-period means with the change from the previous period that has data."""
+            by_period = frame.groupby(level="period").sum()
+            period_sums = {}
+            for key, period in frame.index:
+                _add_sums(period_sums.setdefault(period, {}), sums.get((key, period), {}))
+            codes = {period_names[p]: p for p in by_period.index}
+            out = {}
+            previous = {}
+            for label in periods:
+                if label not in codes:
+                    continue
+                row = by_period.loc[codes[label]]
+                entry = {"rows": int(row["rows"]), "columns": {}}
+                for col in self.value_columns:
+                    count = row[f"count:{col}"]
+                    value = mean(period_sums[codes[label]].get(col, 0), count)
+                    stats = {"count": int(count), "mean": value, "delta": None, "pct_change": None}
+                    prev = previous.get(col)
+                    if value is not None and prev is not None:
+                        stats["delta"] = value - prev
+                        stats["pct_change"] = (value - prev) / abs(prev) * 100 if prev else None
+                    if value is not None:
+                        previous[col] = value
+                    entry["columns"][col] = stats
+                out[label] = entry
+            return out
+
+        first = self.tables[self.dimensions[0]]
+        result = {
+            "period_column": self.period_column,
+            "periods": periods,
+            "by_period": (
+                trend(first["cells"], first["sums"])
+                if self.period_column is not None and first["cells"] is not None else {}
+            ),
+            "dimensions": {},
+        }
+        for dim in self.dimensions:
+            if dim is None:
+                continue
+            table = self.tables[dim]
+            if table["cells"] is None:
+                continue
+            key_names = {code: label for label, code in table["values"].items()}
+            groups = {}
+            for key, frame in table["cells"].groupby(level="key"):
+                entry = summarize(frame, table["sums"])
+                if self.period_column is not None:
+                    entry["periods"] = trend(frame, table["sums"])
+                groups[key_names[key]] = entry
+            result["dimensions"][dim] = dict(sorted(groups.items()))
+        return result
+
+    def to_state(self) -> dict:
+        def cells_state(cells, sums):
+            if cells is None:
+                return None
+            index = [(int(k), int(p)) for k, p in cells.index]
+            return {
+                "index": [list(cell) for cell in index],
+                "columns": list(cells.columns) + [f"sum:{c}" for c in self.value_columns],
+                "values": [
+                    counts + [_sum_state(sums.get(cell, {}).get(c, 0)) for c in self.value_columns]
+                    for cell, counts in zip(index, cells.to_numpy().tolist())
+                ],
+            }
+
+        return {
+            "period_column": self.period_column,
+            "dimensions": self.dimensions,
+            "value_columns": self.value_columns,
+            "periods": self.periods,
+            "tables": [
+                {"dimension": dim, "values": t["values"], "cells": cells_state(t["cells"], t["sums"])}
+                for dim, t in self.tables.items()
+            ],
+        }
+
+    @classmethod
+    def from_state(cls, state: dict, cfg: dict = None) -> "GroupStatsAccumulator":
+        acc = cls(cfg)
+        acc.period_column = state["period_column"]
+        acc.dimensions = state["dimensions"]
+        acc.value_columns = state["value_columns"]
+        acc.periods = dict(state["periods"])
+        for t in state["tables"]:
+            cells, sums = t["cells"], {}
+            if cells is not None:
+                index = [tuple(i) for i in cells["index"]]
+                count_columns = [i for i, c in enumerate(cells["columns"]) if not c.startswith("sum:")]
+                sum_columns = [(i, c[len("sum:"):]) for i, c in enumerate(cells["columns"]) if c.startswith("sum:")]
+                for cell, row in zip(index, cells["values"]):
+                    sums[cell] = {col: _sum_from_state(row[i]) for i, col in sum_columns}
+                cells = pd.DataFrame(
+                    [[row[i] for i in count_columns] for row in cells["values"]],
+                    columns=[cells["columns"][i] for i in count_columns], dtype="float64",
+                    index=pd.MultiIndex.from_tuples(index, names=["key", "period"]),
+                )
+            acc.tables[t["dimension"]] = {"values": dict(t["values"]), "cells": cells, "sums": sums}
+        return acc
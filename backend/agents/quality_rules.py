@@ -0,0 +1,251 @@
+"""
+Declarative data-quality rules loaded from config/quality_constraints.json.
+
+The historical keys keep their meaning (required_columns, max_missing_per_column,
+min_rows, allowed_ranges) and are compiled together with an optional "rules" list:
+
+    {"type": "range", "column": "age", "min": 0, "max": 120}
+    {"type": "enum", "column": "Department", "values": ["Sales", "HR", "IT"]}
+    {"type": "regex", "column": "Month", "pattern": "[0-9]{4}-[0-9]{2}"}
+    {"type": "unique", "column": "invoice_id"}
+    {"type": "dtype", "column": "Revenue", "dtype": "numeric"}      # numeric | integer | datetime (ISO 8601 unless "format" is set)
+    {"type": "not_null", "column": "Department"}
+    {"type": "compare", "left": "start_date", "op": "<=", "right": "end_date"}
+    {"type": "expression", "expr": "Revenue >= 0 and Defect_Count < 100"}
+
+Every rule may also set "name", "penalty" (score points, default 5) and
+"action": "flag" (default) or "drop" (rows are removed by the cleaning stage;
+allowed_ranges entries are "drop" rules with no penalty).
+"""
+import json
+import operator
+import os
+import re
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "quality_constraints.json")
+
+ROW_RULE_TYPES = ("range", "enum", "regex", "unique", "dtype", "not_null", "compare", "expression")
+
+_COMPARE_OPS = {
+    "<": operator.lt, "<=": operator.le, ">": operator.gt,
+    ">=": operator.ge, "==": operator.eq, "!=": operator.ne,
+}
+
+
+def load_constraints(path: str = CONFIG_PATH) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _describe(rule: dict) -> str:
+    kind = rule["type"]
+    if kind == "range":
+        return f"outside allowed range [{rule.get('min')}, {rule.get('max')}]"
+    if kind == "enum":
+        return "not in the allowed values"
+    if kind == "regex":
+        return f"not matching /{rule['pattern']}/"
+    if kind == "unique":
+        return "duplicate values"
+    if kind == "dtype":
+        return f"not {rule['dtype']}"
+    if kind == "not_null":
+        return "missing values"
+    if kind == "compare":
+        return f"failing {rule['left']} {rule['op']} {rule['right']}"
+    return f"failing `{rule['expr']}`"
+
+
+def compile_rules(cfg: Dict[str, Any]) -> List[dict]:
+    """Normalizes allowed_ranges and the "rules" list into row-level rule dicts."""
+    rules = []
+    for col, (low, high) in cfg.get("allowed_ranges", {}).items():
+        rules.append({
+            "type": "range", "column": col, "min": low, "max": high,
+            "action": "drop", "penalty": 0,
+        })
+    for rule in cfg.get("rules", []):
+        if rule.get("type") not in ROW_RULE_TYPES:
+            raise ValueError(f"Unknown quality rule type: {rule.get('type')}")
+        if rule["type"] == "compare" and rule.get("op") not in _COMPARE_OPS:
+            raise ValueError(
+                f"Unknown compare op in quality rule {rule.get('name') or rule.get('left')}: {rule.get('op')!r} "
+                f"(expected one of {', '.join(_COMPARE_OPS)})"
+            )
+        rules.append(dict(rule))
+
+    for i, rule in enumerate(rules):
+        rule.setdefault("action", "flag")
+        rule.setdefault("penalty", 5)
+        if rule["type"] == "compare":
+            rule["columns"] = [rule["left"], rule["right"]]
+        elif rule["type"] == "expression":
+            rule["columns"] = []
+        else:
+            rule["columns"] = [rule["column"]]
+        rule.setdefault("name", f"{rule['columns'][0]}:{rule['type']}" if rule["columns"] else f"rule_{i}")
+        rule["description"] = _describe(rule)
+    return rules
+
+
+def rule_columns(cfg: Dict[str, Any]) -> set:
+    """
+    Columns the rules read, including every identifier of expression rules
+    (names that are not columns are harmless); ingest keeps their dtypes.
+    """
+    columns = set()
+    for rule in compile_rules(cfg):
+        columns.update(rule["columns"])
+        if rule["type"] == "expression":
+            # Backquoted names or bare identifiers
+            columns.update(a or b for a, b in re.findall(r"`([^`]+)`|([A-Za-z_]\w*)", rule["expr"]))
+    return columns
+
+
+class RuleEngine:
+    """
+    Evaluates all compiled row rules against a frame in one vectorized pass:
+    each referenced column is materialized once and every rule on it is a
+    NumPy/pandas array expression writing one row of a (rules x rows)
+    violation matrix, from which counts and row masks are read off.
+
+    The engine is stateful only for "unique" rules, so that feeding the same
+    data as successive chunks gives the same counts as one full frame.
+    """
+
+    def __init__(self, cfg: Dict[str, Any]):
+        self.cfg = cfg
+        self.rules = compile_rules(cfg)
+        self.reset()
+
+    def reset(self):
+        self._seen = {}
+
+    def seen_state(self) -> Dict[str, np.ndarray]:
+        """Hashes remembered by "unique" rules, for persisting between uploads."""
+        return dict(self._seen)
+
+    def load_seen_state(self, seen: Dict[str, np.ndarray]):
+        self._seen = dict(seen)
+
+    def evaluate(self, df: pd.DataFrame) -> "RuleResult":
+        active = [r for r in self.rules if all(c in df.columns for c in r["columns"])]
+        matrix = np.zeros((len(active), df.shape[0]), dtype=bool)
+        numeric_cache = {}
+
+        def numeric(col):
+            if col not in numeric_cache:
+                numeric_cache[col] = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+            return numeric_cache[col]
+
+        for i, rule in enumerate(active):
+            matrix[i] = self._violations(rule, df, numeric)
+        return RuleResult(active, matrix)
+
+    def _violations(self, rule: dict, df: pd.DataFrame, numeric) -> np.ndarray:
+        kind = rule["type"]
+
+        if kind == "range":
+            values = numeric(rule["column"])
+            # NaN compares False both ways, so missing values pass unless allow_null is off
+            bad = np.zeros(values.shape, dtype=bool)
+            if rule.get("min") is not None:
+                np.less(values, rule["min"], out=bad)
+            if rule.get("max") is not None:
+                bad |= values > rule["max"]
+            if not rule.get("allow_null", True):
+                bad |= np.isnan(values)
+            return bad
+
+        if kind == "expression":
+            return ~df.eval(rule["expr"]).fillna(False).to_numpy(dtype=bool)
+
+        if kind == "compare":
+            left, right = df[rule["left"]], df[rule["right"]]
+            ok = _COMPARE_OPS[rule["op"]](left, right) | left.isna() | right.isna()
+            return ~ok.to_numpy(dtype=bool)
+
+        s = df[rule["column"]]
+        present = s.notna().to_numpy()
+
+        if kind == "not_null":
+            return ~present
+        if kind == "enum":
+            return present & ~s.isin(rule["values"]).to_numpy()
+        if kind == "regex":
+            matched = s.astype(str).str.fullmatch(rule["pattern"]).to_numpy(dtype=bool, na_value=False)
+            return present & ~matched
+        if kind == "dtype":
+            if rule["dtype"] == "datetime":
+                parsed = pd.to_datetime(s, errors="coerce", format=rule.get("format", "ISO8601")).notna().to_numpy()
+                return present & ~parsed
+            values = numeric(rule["column"])
+            bad = np.isnan(values)
+            if rule["dtype"] == "integer":
+                bad |= np.mod(values, 1) != 0
+            return present & bad
+        if kind == "unique":
+            # Values seen in earlier chunks are kept as 64-bit hashes, not as the values themselves
+            hashes = pd.Series(pd.util.hash_pandas_object(s, index=False).to_numpy()[present])
+            dup = hashes.duplicated(keep="first").to_numpy()
+            seen = self._seen.get(rule["name"])
+            if seen is not None:
+                dup = dup | hashes.isin(seen).to_numpy()
+                hashes = pd.concat([pd.Series(seen), hashes], ignore_index=True)
+            self._seen[rule["name"]] = pd.unique(hashes.to_numpy())
+            violations = np.zeros(len(s), dtype=bool)
+            violations[present] = dup
+            return violations
+        raise ValueError(f"Unknown quality rule type: {kind}")
+
+    def dataset_issues(self, rows: int, columns: List[str], missing: Dict[str, int]) -> List[tuple]:
+        """Frame-level checks as (issue, penalty) pairs; they need only counts."""
+        issues = []
+        for col in self.cfg.get("required_columns", []):
+            if col not in columns:
+                issues.append((f"Missing required column: {col}", 20))
+        threshold = self.cfg.get("max_missing_per_column", 0.5)
+        for col in columns:
+            m = missing.get(col, 0) / rows if rows else 0.0
+            if m > threshold:
+                issues.append((f"{col}: missing ratio {m:.2f} too high", 10))
+        if rows < self.cfg.get("min_rows", 10):
+            issues.append(("Dataset too small", 20))
+        return issues
+
+
+class RuleResult:
+    def __init__(self, rules: List[dict], matrix: np.ndarray):
+        self.rules = rules
+        self.matrix = matrix
+        self.counts = dict(zip((r["name"] for r in rules), matrix.sum(axis=1).tolist()))
+
+    def mask(self, name: str) -> np.ndarray:
+        """Row mask of violations for one rule."""
+        for rule, row in zip(self.rules, self.matrix):
+            if rule["name"] == name:
+                return row
+        raise KeyError(name)
+
+    def any_violation(self, action: str = None) -> np.ndarray:
+        """Rows violating at least one rule (optionally only rules with `action`)."""
+        rows = [i for i, r in enumerate(self.rules) if action is None or r["action"] == action]
+        if not rows:
+            return np.zeros(self.matrix.shape[1], dtype=bool)
+        return self.matrix[rows].any(axis=0)
+
+
+def violation_issues(rules: List[dict], counts: Dict[str, int]) -> List[tuple]:
+    """(issue, penalty) pairs for every rule with at least one violating row."""
+    issues = []
+    for rule in rules:
+        n = counts.get(rule["name"], 0)
+        if n:
+            issues.append((f"{rule['name']}: {n} rows {rule['description']}", rule["penalty"]))
+    return issues
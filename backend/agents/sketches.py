@@ -0,0 +1,301 @@
+"""
+Mergeable per-column sketches for incremental analysis.
+
+Every sketch here gives the same answer however the rows were split into
+chunks or uploads, so merging a stored report's state with the new rows of
+a delta upload is identical to recomputing over the concatenated file:
+
+  - sums are exact (accumulated as Fractions) and only rounded when reported;
+  - quantiles use fixed logarithmic buckets (relative error `alpha`) whose
+    counts simply add up;
+  - distinct counts keep the exact set of 64-bit value hashes while it is
+    small and HyperLogLog registers (merged with max) beyond that. Values
+    are hashed in a form that does not depend on the dtype a chunk was
+    parsed with: numbers, and text that reads as a number, as float64.
+"""
+import base64
+import math
+from fractions import Fraction
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+class SketchMismatchError(ValueError):
+    """Raised when a stored state cannot be merged with new data."""
+
+
+_LOW_26 = (1 << 26) - 1
+
+# Text that may parse as a number; only these values are passed to pd.to_numeric
+_NUMBER_LIKE = r"^\s*[-+]?(\d|\.\d|inf)"
+
+
+def exact_sum(values: np.ndarray) -> Fraction:
+    """Exact sum of finite float64 values (vectorized; no rounding at all)."""
+    values = np.asarray(values, dtype=np.float64)
+    if values.size == 0:
+        return Fraction(0)
+    # Whole numbers of moderate size (counts, ids, ...) sum exactly in int64
+    peak = float(np.abs(values).max())
+    if peak * values.size < 2.0 ** 62 and np.array_equal(values, np.trunc(values)):
+        return Fraction(int(values.astype(np.int64).sum()))
+
+    # x = mant * 2**(exp - 53) with an integer mant < 2**53; mantissas are
+    # split into 26-bit halves so per-exponent float sums stay exact
+    mant, exp = np.frexp(values)
+    mant = np.ldexp(mant, 53).astype(np.int64)
+    emin = int(exp.min())
+    idx = exp - emin
+    total = 0
+    for start in range(0, values.size, 1 << 25):
+        part = slice(start, start + (1 << 25))
+        high = np.bincount(idx[part], weights=mant[part] >> 26)
+        low = np.bincount(idx[part], weights=mant[part] & _LOW_26)
+        for k in np.flatnonzero((high != 0) | (low != 0)):
+            total += ((int(high[k]) << 26) + int(low[k])) << int(k)
+    return Fraction(total) * Fraction(2) ** (emin - 53)
+
+
+def fraction_state(value: Fraction) -> str:
+    return f"{value.numerator}/{value.denominator}"
+
+
+def fraction_from_state(value: str) -> Fraction:
+    return Fraction(value)
+
+
+class QuantileSketch:
+    """
+    Log-bucketed quantile sketch (DDSketch layout): each value lands in a
+    fixed bucket, so merging is adding counts and the estimate of any
+    quantile is within `alpha` relative error.
+    """
+
+    def __init__(self, alpha: float = 0.001):
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = math.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zeros = 0
+
+    @property
+    def count(self) -> int:
+        return self.zeros + sum(self.positive.values()) + sum(self.negative.values())
+
+    def _add(self, store: dict, magnitudes: np.ndarray):
+        if magnitudes.size == 0:
+            return
+        keys = np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+        low = int(keys.min())
+        counts = np.bincount(keys - low)
+        for k in np.flatnonzero(counts):
+            key = int(k) + low
+            store[key] = store.get(key, 0) + int(counts[k])
+
+    def update(self, values: np.ndarray):
+        values = values[np.isfinite(values)]
+        self.zeros += int(np.count_nonzero(values == 0))
+        self._add(self.positive, values[values > 0])
+        self._add(self.negative, -values[values < 0])
+
+    def merge(self, other: "QuantileSketch"):
+        if other.alpha != self.alpha:
+            raise SketchMismatchError("Quantile sketches with different accuracy cannot be merged")
+        for mine, theirs in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, n in theirs.items():
+                mine[key] = mine.get(key, 0) + n
+        self.zeros += other.zeros
+
+    def _value(self, key: int) -> float:
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantile(self, q: float) -> float:
+        total = self.count
+        if total == 0:
+            return float("nan")
+        rank = q * (total - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.positive)) if self.positive else 0.0
+
+    def count_below(self, value: float) -> int:
+        """Values below `value`, to the sketch's bucket resolution."""
+        n = 0
+        for key, count in self.negative.items():
+            if -self._value(key) < value:
+                n += count
+        if value > 0:
+            n += self.zeros
+        for key, count in self.positive.items():
+            if self._value(key) < value:
+                n += count
+        return n
+
+    def count_above(self, value: float) -> int:
+        """Values above `value`, to the sketch's bucket resolution."""
+        n = 0
+        for key, count in self.negative.items():
+            if -self._value(key) > value:
+                n += count
+        if value < 0:
+            n += self.zeros
+        for key, count in self.positive.items():
+            if self._value(key) > value:
+                n += count
+        return n
+
+    @staticmethod
+    def _store_state(store: dict) -> dict:
+        # Occupied buckets are mostly contiguous, so dense counts from the lowest key are compact
+        if not store:
+            return {"offset": 0, "counts": ""}
+        low = min(store)
+        counts = np.zeros(max(store) - low + 1, dtype="<i8")
+        for key, n in store.items():
+            counts[key - low] = n
+        return {"offset": low, "counts": base64.b64encode(counts.tobytes()).decode()}
+
+    @staticmethod
+    def _store_from_state(state: dict) -> dict:
+        counts = np.frombuffer(base64.b64decode(state["counts"]), dtype="<i8")
+        return {int(k) + state["offset"]: int(counts[k]) for k in np.flatnonzero(counts)}
+
+    def to_state(self) -> dict:
+        return {
+            "alpha": self.alpha,
+            "zeros": self.zeros,
+            "positive": self._store_state(self.positive),
+            "negative": self._store_state(self.negative),
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "QuantileSketch":
+        sketch = cls(state["alpha"])
+        sketch.zeros = state["zeros"]
+        sketch.positive = cls._store_from_state(state["positive"])
+        sketch.negative = cls._store_from_state(state["negative"])
+        return sketch
+
+
+def _hash(values: pd.Series) -> np.ndarray:
+    return pd.util.hash_pandas_object(values, index=False).to_numpy()
+
+
+def value_hashes(values: pd.Series) -> np.ndarray:
+    """
+    64-bit hashes of non-null values that match whether a chunk parsed the
+    column as numbers or as text: 3, 3.0 and "3.0" all hash as float64 3.0.
+    """
+    dtype = values.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        # Hash the categories once and index the result by code
+        return value_hashes(pd.Series(values.cat.categories))[values.cat.codes.to_numpy()]
+    if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+        return _hash(values.astype("float64"))
+    if not (pd.api.types.is_string_dtype(dtype) or dtype == object):
+        return _hash(values)
+    text = values.astype("str")
+    hashes = _hash(text).copy()
+    candidates = np.flatnonzero(
+        pc.match_substring_regex(pa.array(text), _NUMBER_LIKE, ignore_case=True).to_numpy(zero_copy_only=False)
+    )
+    if candidates.size:
+        numbers = pd.to_numeric(text.iloc[candidates], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        parsed = ~np.isnan(numbers)
+        hashes[candidates[parsed]] = _hash(pd.Series(numbers[parsed]))
+    return hashes
+
+
+class DistinctSketch:
+    """
+    Distinct-value counter: exact while at most `exact_limit` distinct
+    hashes were seen, HyperLogLog (2**p registers, ~1.6% error) beyond.
+    """
+
+    def __init__(self, p: int = 12, exact_limit: int = 4096):
+        self.p = p
+        self.exact_limit = exact_limit
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+        self.exact: Optional[np.ndarray] = np.empty(0, dtype=np.uint64)
+
+    def update_hashes(self, hashes: np.ndarray):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if hashes.size == 0:
+            return
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.intp)
+        rest = hashes & np.uint64((1 << (64 - self.p)) - 1)
+        # rank = leading zeros of the remaining 64-p bits + 1; frexp gives the exact bit length
+        _, bit_length = np.frexp(rest.astype(np.float64))
+        rank = (64 - self.p - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+        if self.exact is not None and self._hll_estimate() > 1.5 * self.exact_limit:
+            # Far past the limit by the registers (error ~1.6%): no need to dedupe exactly
+            self.exact = None
+        if self.exact is not None:
+            new = pd.unique(hashes)
+            # Past the limit the set is dropped for good, so skip sorting a large one
+            self.exact = np.union1d(self.exact, new) if new.size <= self.exact_limit else None
+            if self.exact is not None and self.exact.size > self.exact_limit:
+                self.exact = None
+
+    def update(self, series: pd.Series):
+        self.update_hashes(value_hashes(series.dropna()))
+
+    def merge(self, other: "DistinctSketch"):
+        if other.p != self.p:
+            raise SketchMismatchError("Distinct sketches with different precision cannot be merged")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        if self.exact is not None and other.exact is not None:
+            self.exact = np.union1d(self.exact, other.exact)
+            if self.exact.size > self.exact_limit:
+                self.exact = None
+        else:
+            self.exact = None
+
+    def estimate(self) -> int:
+        if self.exact is not None:
+            return int(self.exact.size)
+        return self._hll_estimate()
+
+    def _hll_estimate(self) -> int:
+        m = float(self.registers.size)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int64))))
+        empty = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and empty:
+            raw = m * math.log(m / empty)
+        return int(round(raw))
+
+    def to_state(self) -> dict:
+        return {
+            "p": self.p,
+            "exact_limit": self.exact_limit,
+            "registers": base64.b64encode(self.registers.tobytes()).decode(),
+            "exact": None if self.exact is None else base64.b64encode(self.exact.astype("<u8").tobytes()).decode(),
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "DistinctSketch":
+        sketch = cls(state["p"], state["exact_limit"])
+        sketch.registers = np.frombuffer(base64.b64decode(state["registers"]), dtype=np.uint8).copy()
+        if state["exact"] is None:
+            sketch.exact = None
+        else:
+            sketch.exact = np.frombuffer(base64.b64decode(state["exact"]), dtype="<u8").astype(np.uint64)
+        return sketch
@@ -0,0 +1,107 @@
+"""
+Times the anomaly stage (agents.anomaly) on synthetic datasets from 10k to
+10M rows: normal columns with 0.1% injected outliers and 1% missing values,
+fed in chunks the way large uploads stream through the analyst, so memory
+stays bounded by the chunk size. Also reports how many injected outliers
+were found.
+
+    cd backend
+    python benchmarks/bench_anomaly.py --sizes 10000,100000,1000000,10000000
+    python benchmarks/bench_anomaly.py --sizes 100000 --isolation
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.anomaly import AnomalyDetector  # noqa: E402
+from agents.sketches import QuantileSketch  # noqa: E402
+
+
+def iter_chunks(rows: int, columns: int, chunk_rows: int, seed: int = 0):
+    """Yields (chunk, injected outlier row numbers) pairs."""
+    rng = np.random.default_rng(seed)
+    for start in range(0, rows, chunk_rows):
+        n = min(chunk_rows, rows - start)
+        data = rng.normal(100, 15, (n, columns))
+        injected = rng.random(n) < 0.001
+        data[injected, rng.integers(0, columns, int(injected.sum()))] = rng.choice([-1, 1], int(injected.sum())) * 1e4
+        data[rng.random((n, columns)) < 0.01] = np.nan
+        yield pd.DataFrame(data, columns=[f"metric_{j:02d}" for j in range(columns)]), np.flatnonzero(injected) + start
+
+
+def run(rows: int, columns: int, chunk_rows: int, isolation: bool, trace_memory: bool) -> dict:
+    detector = AnomalyDetector({"anomaly": {"isolation_forest": isolation, "top_n": 10}})
+    sketches = {}
+    injected = 0
+    elapsed = 0.0
+    if trace_memory:
+        tracemalloc.start()
+    offset = 0
+    for chunk, rows_injected in iter_chunks(rows, columns, chunk_rows):
+        injected += rows_injected.size
+        start = time.perf_counter()
+        for col in chunk.columns:
+            values = chunk[col].to_numpy()
+            sketches.setdefault(col, QuantileSketch()).update(values[~np.isnan(values)])
+        detector.update(chunk, list(chunk.columns), offset)
+        elapsed += time.perf_counter() - start
+        offset += chunk.shape[0]
+    start = time.perf_counter()
+    result = detector.result(sketches)
+    elapsed += time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    if trace_memory:
+        tracemalloc.stop()
+
+    entry = {
+        "rows": rows,
+        "columns": columns,
+        "seconds": round(elapsed, 4),
+        "rows_per_second": round(rows / elapsed) if elapsed else None,
+        "injected_outliers": injected,
+        "iqr_outliers": result["total_iqr_outliers"],
+        "approximate_columns": sum(1 for e in result["columns"].values() if e["approximate"]),
+        "peak_traced_mib": round(peak / 2 ** 20, 1) if peak is not None else None,
+    }
+    if isolation:
+        entry["isolation_flagged"] = result["isolation_forest"]["flagged"]
+    return entry
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000,10000000")
+    parser.add_argument("--columns", type=int, default=10)
+    parser.add_argument("--chunk-rows", type=int, default=100_000)
+    parser.add_argument("--isolation", action="store_true", help="Also fit and score the isolation forest")
+    parser.add_argument("--trace-memory", action="store_true", help="Report peak traced memory (slower)")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = []
+    for rows in (int(s) for s in args.sizes.split(",")):
+        entry = run(rows, args.columns, args.chunk_rows, args.isolation, args.trace_memory)
+        results.append(entry)
+        line = (f"rows={rows:>11,}  {entry['seconds']:8.3f} s  {entry['rows_per_second']:>12,} rows/s  "
+                f"outliers={entry['iqr_outliers']:,} (injected {entry['injected_outliers']:,})")
+        if entry["peak_traced_mib"] is not None:
+            line += f"  peak={entry['peak_traced_mib']} MiB"
+        if args.isolation:
+            line += f"  forest flagged={entry['isolation_flagged']:,}"
+        print(line)
+
+    if args.output:
+        with open(args.output, "w") as out:
+            json.dump({"benchmark": "anomaly", "isolation_forest": args.isolation, "results": results}, out, indent=2)
+
+
+if __name__ == "__main__":
+    main()
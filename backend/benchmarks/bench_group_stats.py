@@ -0,0 +1,90 @@
+"""
+Times the group-by / period statistics engine (agents.group_stats) on a
+synthetic frame shaped like sample_data.csv: a Department and a Month key
+plus N numeric columns with 1% missing values. Keys are plain strings by
+default, or pandas categoricals with --categorical. Values are full-precision
+floats, or rounded to --decimals places like the figures of a CSV file
+(summed exactly as scaled integers).
+
+Exits with status 1 when the grouped pass takes longer than --max-ratio
+times the equivalent pandas groupby, so a slowdown cannot go unnoticed.
+
+    cd backend
+    python benchmarks/bench_group_stats.py --rows 10000000 --columns 20
+    python benchmarks/bench_group_stats.py --rows 2000000 --columns 20 --decimals 2 --categorical
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from agents.group_stats import GroupStatsAccumulator  # noqa: E402
+from datasets import make_wide_frame  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--columns", type=int, default=20)
+    parser.add_argument("--departments", type=int, default=8)
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--categorical", action="store_true", help="Use categorical key columns")
+    parser.add_argument("--decimals", type=int, help="Round the values to this many decimal places")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-ratio", type=float, default=1.0,
+                        help="Fail when the grouped pass is slower than this times the pandas groupby")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    df = make_wide_frame(args.rows, args.columns, args.departments, args.months, args.categorical, decimals=args.decimals)
+    numeric = set(df.columns[2:])
+
+    best_update = best_result = float("inf")
+    for _ in range(args.repeat):
+        acc = GroupStatsAccumulator()
+        start = time.perf_counter()
+        acc.update(df, numeric)
+        mid = time.perf_counter()
+        result = acc.result()
+        end = time.perf_counter()
+        best_update = min(best_update, mid - start)
+        best_result = min(best_result, end - mid)
+
+    # Reference: the same per-group sums with a plain pandas groupby
+    start = time.perf_counter()
+    df.groupby(["Department", "Month"], observed=True)[list(numeric)].agg(["count", "sum"])
+    pandas_s = time.perf_counter() - start
+
+    results = {
+        "benchmark": "group_stats",
+        "rows": args.rows,
+        "columns": args.columns,
+        "categorical_keys": args.categorical,
+        "decimals": args.decimals,
+        "cells": args.departments * args.months,
+        "grouped_pass_s": round(best_update, 4),
+        "derive_results_s": round(best_result, 4),
+        "pandas_groupby_agg_s": round(pandas_s, 4),
+        "rows_per_second": round(args.rows / best_update),
+        "pandas_ratio": round(best_update / pandas_s, 3),
+    }
+    print(f"rows={args.rows:,} columns={args.columns} keys={'categorical' if args.categorical else 'strings'} "
+          f"groups={len(result['dimensions']['Department'])} periods={len(result['periods'])}")
+    print(f"  grouped pass        : {best_update:8.3f} s")
+    print(f"  per-group/MoM view  : {best_result:8.3f} s")
+    print(f"  pandas groupby agg  : {pandas_s:8.3f} s")
+
+    if args.output:
+        with open(args.output, "w") as out:
+            json.dump(results, out, indent=2)
+    if results["pandas_ratio"] > args.max_ratio:
+        print(f"FAIL: grouped pass is {results['pandas_ratio']:.2f}x the pandas groupby (limit {args.max_ratio:.2f}x)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Compares CSV ingest with default dtypes (plain pd.read_csv) against the
+compact-dtype ingest of utils.ingest with pandas' and Arrow's parsers, on a
+synthetic file shaped like sample_data.csv plus a timestamp column.
+
+    cd backend
+    python benchmarks/bench_ingest.py --rows 2000000
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import ingest  # noqa: E402
+
+
+def make_csv(rows: int, seed: int = 0) -> bytes:
+    rng = np.random.default_rng(seed)
+    departments = np.array(["Sales", "Marketing", "HR", "IT", "Operations"], dtype=object)
+    months = np.array([f"2024-{m:02d}" for m in range(1, 13)], dtype=object)
+    df = pd.DataFrame({
+        "Department": departments[rng.integers(0, departments.size, rows)],
+        "Month": months[rng.integers(0, months.size, rows)],
+        "Created": pd.date_range("2020-01-01", periods=rows, freq="min").strftime("%Y-%m-%dT%H:%M:%S"),
+        "Performance_Score": rng.integers(50, 100, rows),
+        "Process_Duration_Days": rng.integers(1, 30, rows),
+        "Defect_Count": rng.integers(0, 10, rows),
+        "Revenue": rng.normal(1e5, 2e4, rows).round(2),
+    })
+    return df.to_csv(index=False).encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    raw = make_csv(args.rows)
+    start = time.perf_counter()
+    df = pd.read_csv(io.BytesIO(raw))
+    default_s = time.perf_counter() - start
+    default_bytes = int(df.memory_usage(deep=True, index=False).sum())
+    del df
+
+    results = {
+        "benchmark": "ingest",
+        "rows": args.rows,
+        "csv_bytes": len(raw),
+        "default": {"parse_seconds": round(default_s, 4), "memory_bytes": default_bytes},
+    }
+    print(f"rows={args.rows:,} csv={len(raw) / 2 ** 20:.1f} MiB")
+    print(f"  default read_csv   : {default_s:8.3f} s  {default_bytes / 2 ** 20:8.1f} MiB")
+    for engine in ("c", "pyarrow"):
+        ingest.CSV_ENGINE = engine
+        info = {}
+        ingest.read_full(io.BytesIO(raw), "bench.csv", info)
+        results[engine] = info
+        print(f"  compact ({engine:<7})  : {info['parse_seconds']:8.3f} s  {info['memory_bytes'] / 2 ** 20:8.1f} MiB  "
+              f"({default_s / info['parse_seconds']:.2f}x faster, "
+              f"{100 * (1 - info['memory_bytes'] / default_bytes):.1f}% less memory)")
+
+    if args.output:
+        with open(args.output, "w") as out:
+            json.dump(results, out, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Concurrent load test of the API. Starts the LLM stub and a uvicorn server in
+an empty working directory (advisor calls go to the stub through
+OPENAI_BASE_URL), then drives each scenario with --concurrency client
+threads and reports p50/p95/p99 latency and throughput.
+
+Scenarios: upload (full audit, forced, LLM cache off), upload_stream (the
+same over /upload_and_analyze/stream, also timing the first recommendation
+token), upload_cached (same bytes again, answered from the content-key
+cache), reports (first catalog page), report (one report's metadata), pdf
+(stored PDF) and metrics.
+
+    cd backend
+    python benchmarks/bench_load.py --requests 200 --concurrency 8 --llm-latency-ms 300 --token-interval-ms 20
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from datasets import csv_bytes  # noqa: E402
+from llm_stub import start_stub  # noqa: E402
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = ("upload", "upload_stream", "upload_cached", "reports", "report", "pdf", "metrics")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(work_dir: str, llm_url: str, timeout: float) -> tuple:
+    """Spawns uvicorn on a free port; returns (process, base_url) once GET / answers."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = BACKEND_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    env.update(OPENAI_BASE_URL=llm_url, OPENAI_API_KEY="stub", CHAIN_INDEXER_ENABLED="0")
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=work_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if requests.get(base_url + "/", timeout=1).status_code == 200:
+                return server, base_url
+        except requests.ConnectionError:
+            time.sleep(0.05)
+    server.terminate()
+    raise RuntimeError("server did not start in time")
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    rank = max(int(round(q / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def _latency_stats(ms: list, prefix: str = "") -> dict:
+    ms = sorted(ms)
+    return {
+        f"{prefix}mean_ms": round(statistics.fmean(ms), 2),
+        f"{prefix}p50_ms": round(percentile(ms, 50), 2),
+        f"{prefix}p95_ms": round(percentile(ms, 95), 2),
+        f"{prefix}p99_ms": round(percentile(ms, 99), 2),
+        f"{prefix}max_ms": round(ms[-1], 2),
+    }
+
+
+def stream_upload(session, url: str, body: bytes, timeout: float, first_token_ms: list):
+    """Reads the SSE audit stream to the end, noting when the first token event arrived."""
+    start = time.perf_counter()
+    response = session.post(url, params={"force": "true", "use_llm_cache": "false"},
+                            files={"file": ("bench.csv", body)}, timeout=timeout, stream=True)
+    first_token, failed = None, False
+    for line in response.iter_lines(decode_unicode=True):
+        if line == "event: token" and first_token is None:
+            first_token = (time.perf_counter() - start) * 1000
+        failed = failed or line == "event: error"
+    if first_token is not None:
+        first_token_ms.append(first_token)
+    if failed:
+        # Errors found after the 200 headers count like any other failed request
+        response.status_code = 500
+    return response
+
+
+def drive(request_fn, total: int, concurrency: int) -> dict:
+    """Calls `request_fn(session)` `total` times from `concurrency` threads; latency stats in ms."""
+    local = threading.local()
+    latencies, errors = [], []
+
+    def one(_):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            status = request_fn(local.session).status_code
+        except requests.RequestException as e:
+            status = type(e).__name__
+        elapsed = time.perf_counter() - start
+        if status == 200:
+            latencies.append(elapsed)
+        else:
+            errors.append(status)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as clients:
+        list(clients.map(one, range(total)))
+    wall = time.perf_counter() - started
+
+    ms = [x * 1000 for x in latencies]
+    result = {
+        "requests": total,
+        "concurrency": concurrency,
+        "ok": len(ms),
+        "errors": len(errors),
+        "error_statuses": sorted({str(e) for e in errors}),
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(ms) / wall, 2) if wall else None,
+    }
+    if ms:
+        result.update(_latency_stats(ms))
+    return result
+
+
+def run(scenarios, total: int, concurrency: int, rows: int, llm_latency_ms: float, timeout: float,
+        token_interval_ms: float = 0.0) -> dict:
+    stub, llm_url = start_stub(latency_ms=llm_latency_ms, token_interval_ms=token_interval_ms)
+    first_token_ms = []
+    body = csv_bytes(rows)
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            server, base_url = start_server(work_dir, llm_url, timeout)
+            try:
+                # One audit up front: loads the analysis stack and gives the read scenarios a report
+                seed = requests.post(base_url + "/upload_and_analyze", files={"file": ("bench.csv", body)},
+                                     timeout=timeout)
+                seed.raise_for_status()
+                report_id = seed.json()["id"]
+
+                requests_by_scenario = {
+                    "upload": lambda s: s.post(
+                        base_url + "/upload_and_analyze", params={"force": "true", "use_llm_cache": "false"},
+                        files={"file": ("bench.csv", body)}, timeout=timeout),
+                    "upload_stream": lambda s: stream_upload(
+                        s, base_url + "/upload_and_analyze/stream", body, timeout, first_token_ms),
+                    "upload_cached": lambda s: s.post(
+                        base_url + "/upload_and_analyze", files={"file": ("bench.csv", body)}, timeout=timeout),
+                    "reports": lambda s: s.get(base_url + "/reports", params={"limit": 50}, timeout=timeout),
+                    "report": lambda s: s.get(f"{base_url}/reports/{report_id}", timeout=timeout),
+                    "pdf": lambda s: s.get(f"{base_url}/reports/{report_id}/pdf", timeout=timeout),
+                    "metrics": lambda s: s.get(base_url + "/metrics", timeout=timeout),
+                }
+                for name in scenarios:
+                    results[name] = drive(requests_by_scenario[name], total, concurrency)
+                    if name == "upload_stream" and first_token_ms:
+                        results[name].update(_latency_stats(first_token_ms, "first_token_"))
+                    print(_line(name, results[name]))
+            finally:
+                server.terminate()
+                server.wait(timeout=10)
+    finally:
+        stub.shutdown()
+    return {
+        "benchmark": "load",
+        "rows": rows,
+        "upload_bytes": len(body),
+        "llm_latency_ms": llm_latency_ms,
+        "llm_token_interval_ms": token_interval_ms,
+        "llm_stub_requests": stub.config.requests,
+        "scenarios": results,
+    }
+
+
+def _line(name: str, r: dict) -> str:
+    if not r["ok"]:
+        return f"  {name:<14}: all {r['requests']} requests failed ({', '.join(r['error_statuses'])})"
+    line = (f"  {name:<14}: {r['throughput_rps']:8.1f} req/s  p50 {r['p50_ms']:8.1f}  p95 {r['p95_ms']:8.1f}  "
+            f"p99 {r['p99_ms']:8.1f} ms  errors {r['errors']}")
+    if "first_token_p50_ms" in r:
+        line += f"  (first token p50 {r['first_token_p50_ms']:.1f}  p95 {r['first_token_p95_ms']:.1f} ms)"
+    return line
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated subset of the scenarios")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=5_000, help="Rows of the uploaded dataset")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0, help="Stub delay before the first token")
+    parser.add_argument("--token-interval-ms", type=float, default=0.0, help="Stub generation time per token")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    print(f"requests={args.requests} concurrency={args.concurrency} rows={args.rows:,} "
+          f"llm latency={args.llm_latency_ms:.0f} ms")
+    results = run(scenarios, args.requests, args.concurrency, args.rows, args.llm_latency_ms, args.timeout,
+                  args.token_interval_ms)
+
+    if args.output:
+        with open(args.output, "w") as out:
+            json.dump(results, out, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Micro-benchmarks of the audit building blocks, without the API or the LLM:
+the analyst on a whole frame and chunk by chunk, the group-by pass alone,
+PDF rendering, and report storage (save, dataset reload, catalog listing).
+Runs in a temporary working directory, so the local data/ folder is left
+untouched.
+
+    cd backend
+    python benchmarks/bench_micro.py --rows 200000 --repeat 5 --output micro.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from datasets import make_frame  # noqa: E402
+from llm_stub import REPORT  # noqa: E402
+
+
+def timed(fn, repeat: int) -> dict:
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - start)
+    return {"best_s": round(min(runs), 5), "median_s": round(statistics.median(runs), 5)}
+
+
+def run(rows: int, chunk_rows: int, repeat: int, catalog_reports: int) -> dict:
+    from agents.analyst_simple import run_analyst_pipeline, run_analyst_pipeline_chunked
+    from agents.group_stats import GroupStatsAccumulator
+    from utils import catalog, report_store
+    from utils.pdf_gen import render_pdf_file
+
+    df = make_frame(rows)
+    chunks = [df.iloc[i:i + chunk_rows] for i in range(0, rows, chunk_rows)]
+    analysis = run_analyst_pipeline(df, include_data=False)
+    numeric = set(df.select_dtypes(include="number").columns)
+
+    results = {
+        "analyst_full": timed(lambda: run_analyst_pipeline(df, include_data=False), repeat),
+        "analyst_chunked": timed(lambda: run_analyst_pipeline_chunked(iter(chunks)), repeat),
+        "group_stats": timed(lambda: GroupStatsAccumulator().update(df, numeric), repeat),
+        "pdf_render": timed(lambda: render_pdf_file(os.path.join(tempfile.gettempdir(), "bench_micro.pdf"),
+                                                    analysis, REPORT, "bench.csv"), repeat),
+    }
+    os.remove(os.path.join(tempfile.gettempdir(), "bench_micro.pdf"))
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        cwd = os.getcwd()
+        os.chdir(work_dir)
+        try:
+            os.makedirs(report_store.REPORTS_DIR)
+            catalog.init_catalog(report_store.REPORTS_DIR)
+            saved = []
+
+            def save():
+                report_id = str(uuid.uuid4())
+                data = {"id": report_id, "filename": "bench.csv", "timestamp": f"2024-01-01T00:00:{len(saved):06d}",
+                        "analysis": analysis, "recommendations": REPORT, "report_hash_preview": uuid.uuid4().hex,
+                        "is_certified": False}
+                report_store.save_report(report_id, data, df)
+                catalog.upsert_report(data)
+                saved.append(report_id)
+
+            results["storage_save"] = timed(save, repeat)
+            results["storage_load_dataset"] = timed(
+                lambda: report_store.load_dataset_frame(report_store.load_metadata(saved[0])), repeat
+            )
+
+            # Listing cost depends on the catalog size, not on the datasets
+            with catalog.connect() as conn:
+                conn.executemany(
+                    "INSERT INTO reports (id, filename, timestamp, quality_score) VALUES (?, ?, ?, ?)",
+                    ((str(uuid.uuid4()), f"file_{i}.csv", f"2023-{i % 12 + 1:02d}-01T{i % 24:02d}:00:00", i % 101)
+                     for i in range(catalog_reports)),
+                )
+            results["catalog_list_page"] = timed(lambda: catalog.list_reports(limit=50), repeat)
+            results["catalog_list_filtered"] = timed(
+                lambda: catalog.list_reports(limit=50, sort="quality_score", min_score=50), repeat
+            )
+        finally:
+            os.chdir(cwd)
+
+    return {
+        "benchmark": "micro",
+        "rows": rows,
+        "chunk_rows": chunk_rows,
+        "repeat": repeat,
+        "catalog_reports": catalog_reports,
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--chunk-rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--catalog-reports", type=int, default=100_000, help="Rows seeded into the catalog for listing")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = run(args.rows, args.chunk_rows, args.repeat, args.catalog_reports)
+    print(f"rows={args.rows:,} repeat={args.repeat}")
+    for name, r in results["results"].items():
+        print(f"  {name:<22}: best {r['best_s'] * 1000:9.2f} ms  median {r['median_s'] * 1000:9.2f} ms")
+
+    if args.output:
+        with open(args.output, "w") as out:
+            json.dump(results, out, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Times PDF rendering of reports with large issue lists and long recommendations:
+the previous renderer (style sheet rebuilt per call, Paragraph + Spacer per
+line) against utils.pdf_gen, plus serving the stored bytes instead of
+re-rendering.
+
+    cd backend
+    python benchmarks/bench_pdf_render.py --issues 2000 --lines 2000
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.pdf_gen import generate_pdf_report  # noqa: E402
+
+
+def legacy_render(analysis_data: dict, recommendations: str, filename: str) -> io.BytesIO:
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    styles = getSampleStyleSheet()
+    story = [Paragraph(f"Audit & Traceability Report: {filename}", styles['Title']), Spacer(1, 12)]
+    story.append(Paragraph("1. Data Analysis Summary", styles['Heading1']))
+    qual = analysis_data["quality_analysis"]
+    story.append(Paragraph(f"Data Quality Score: {qual['score']}/100", styles['Normal']))
+    story.append(Paragraph("Issues Found:", styles['Heading3']))
+    for issue in qual["issues"]:
+        story.append(Paragraph(f"- {issue}", styles['Normal']))
+    story.append(Spacer(1, 12))
+    story.append(Paragraph("2. AI Recommendations", styles['Heading1']))
+    for line in recommendations.split('\n'):
+        if line.strip():
+            story.append(Paragraph(line, styles['Normal']))
+            story.append(Spacer(1, 4))
+    doc.build(story)
+    buffer.seek(0)
+    return buffer
+
+
+def make_report(issues: int, lines: int):
+    analysis = {
+        "quality_analysis": {
+            "score": 42,
+            "issues": [f"column_{i % 50}:range: {i * 7} rows outside allowed range [0, 120]" for i in range(issues)],
+        }
+    }
+    recommendations = "\n".join(
+        f"{i + 1}. Review the records flagged by rule {i % 50}; the defect rate in this segment "
+        f"is above the quarterly threshold and should be reconciled with the source system."
+        for i in range(lines)
+    )
+    return analysis, recommendations
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--issues", type=int, default=2000)
+    parser.add_argument("--lines", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    analysis, recs = make_report(args.issues, args.lines)
+    legacy = timed(lambda: legacy_render(analysis, recs, "bench.csv"), args.repeat)
+    current = timed(lambda: generate_pdf_report(analysis, recs, "bench.csv"), args.repeat)
+
+    pdf_bytes = generate_pdf_report(analysis, recs, "bench.csv").getvalue()
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+        f.write(pdf_bytes)
+    try:
+        def read_stored():
+            with open(f.name, "rb") as stored:
+                stored.read()
+        stored = timed(read_stored, args.repeat)
+    finally:
+        os.remove(f.name)
+
+    results = {
+        "benchmark": "pdf_render",
+        "issues": args.issues,
+        "recommendation_lines": args.lines,
+        "pdf_bytes": len(pdf_bytes),
+        "legacy_render_s": round(legacy, 4),
+        "cached_styles_render_s": round(current, 4),
+        "stored_pdf_read_s": round(stored, 6),
+        "render_speedup": round(legacy / current, 2) if current else None,
+    }
+    print(f"issues={args.issues:,} lines={args.lines:,} pdf={len(pdf_bytes) / 1024:.0f} KiB")
+    print(f"  previous renderer : {legacy:8.3f} s")
+    print(f"  cached styles     : {current:8.3f} s")
+    print(f"  stored PDF read   : {stored * 1000:8.3f} ms")
+
+    if args.output:
+        with open(args.output, "w") as out:
+            json.dump(results, out, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Compares the analyst stages chained through JSON strings (the LLM tool
+wrappers, i.e. the previous PipelineState layout) against the in-memory
+DataFrame stage interface.
+
+    cd backend
+    python benchmarks/bench_stage_passing.py --rows 1000000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from agents.analyst import (  # noqa: E402
+    QUALITY_CFG,
+    assess_quality,
+    check_quality,
+    clean_dataset,
+    clean_frame,
+    preprocess_dataset,
+    preprocess_frame,
+)
+from datasets import make_frame  # noqa: E402
+
+
+def stage_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """The sample-shaped dataset plus the columns the shipped range rules check."""
+    rng = np.random.default_rng(seed + 1)
+    df = make_frame(rows, seed)
+    df["age"] = rng.integers(-5, 130, rows).astype(float)
+    df.loc[rng.random(rows) < 0.05, "age"] = np.nan
+    df["income"] = rng.normal(60000, 25000, rows)
+    return df
+
+
+def run_strings(df: pd.DataFrame):
+    cfg = json.dumps(QUALITY_CFG)
+    raw_json = df.to_json()
+    check_quality.func(raw_json, cfg)
+    cleaned = clean_dataset.func(raw_json, cfg)
+    return preprocess_dataset.func(cleaned, cfg)
+
+
+def run_frames(df: pd.DataFrame):
+    assess_quality(df, QUALITY_CFG)
+    cleaned = clean_frame(df, QUALITY_CFG)
+    return preprocess_frame(cleaned, QUALITY_CFG)
+
+
+def timed(fn, df, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(df)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    df = stage_frame(args.rows)
+    strings = timed(run_strings, df, args.repeat)
+    frames = timed(run_frames, df, args.repeat)
+
+    results = {
+        "benchmark": "stage_passing",
+        "rows": args.rows,
+        "json_strings_s": round(strings, 4),
+        "dataframes_s": round(frames, 4),
+        "speedup": round(strings / frames, 1) if frames else None,
+    }
+    print(f"rows={args.rows:,}")
+    print(f"  JSON string stages : {strings:8.3f} s")
+    print(f"  DataFrame stages   : {frames:8.3f} s")
+    print(f"  speed-up           : {results['speedup']}x")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
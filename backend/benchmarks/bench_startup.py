@@ -0,0 +1,132 @@
+"""
+Measures API cold start: the `python -X importtime` breakdown of
+`import main`, and the time from launching uvicorn to the first successful
+GET / and GET /reports. Each run starts a fresh server in an empty working
+directory, so no catalog, cache or report is reused. Exits non-zero when
+the median time to first request exceeds --budget-ms, for use in CI.
+
+    cd backend
+    python benchmarks/bench_startup.py --runs 5 --budget-ms 2000
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = BACKEND_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    # The on-chain indexer would add RPC round trips that are not part of startup
+    env["CHAIN_INDEXER_ENABLED"] = "0"
+    return env
+
+
+def import_breakdown(top: int) -> dict:
+    """Total `import main` time and the slowest top-level imports (cumulative, ms)."""
+    with tempfile.TemporaryDirectory() as work_dir:
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import main"],
+            cwd=work_dir, env=_env(), capture_output=True, text=True, check=True,
+        )
+    modules = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        modules.append((depth, int(cumulative), name.strip()))
+    total = next(us for depth, us, name in reversed(modules) if name == "main")
+    children = sorted((m for m in modules if m[0] == 1), key=lambda m: -m[1])[:top]
+    return {
+        "import_main_ms": round(total / 1000, 1),
+        "slowest_imports_ms": {name: round(us / 1000, 1) for _, us, name in children},
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ok(url: str, deadline: float) -> bool:
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as resp:
+                if resp.status == 200:
+                    return True
+        except OSError:
+            time.sleep(0.005)
+    return False
+
+
+def first_request(timeout: float) -> dict:
+    """Seconds from spawning uvicorn until GET / and then GET /reports answer 200."""
+    port = _free_port()
+    with tempfile.TemporaryDirectory() as work_dir:
+        started = time.perf_counter()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=work_dir, env=_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            deadline = started + timeout
+            if not _wait_ok(f"http://127.0.0.1:{port}/", deadline):
+                raise RuntimeError("server did not answer GET / in time")
+            root = time.perf_counter() - started
+            if not _wait_ok(f"http://127.0.0.1:{port}/reports", deadline):
+                raise RuntimeError("server did not answer GET /reports in time")
+            reports = time.perf_counter() - started
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+    return {"root_ms": round(root * 1000, 1), "reports_ms": round(reports * 1000, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="Slowest top-level imports to list")
+    parser.add_argument("--budget-ms", type=float, default=2000.0, help="Allowed median time to first GET /")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    breakdown = import_breakdown(args.top)
+    print(f"import main: {breakdown['import_main_ms']:.0f} ms")
+    for name, ms in breakdown["slowest_imports_ms"].items():
+        print(f"  {ms:8.1f} ms  {name}")
+
+    runs = [first_request(args.timeout) for _ in range(args.runs)]
+    root = statistics.median(r["root_ms"] for r in runs)
+    reports = statistics.median(r["reports_ms"] for r in runs)
+    within = root <= args.budget_ms
+    print(f"first GET /        : {root:8.1f} ms (median of {args.runs})")
+    print(f"first GET /reports : {reports:8.1f} ms")
+    print(f"budget {args.budget_ms:.0f} ms: {'ok' if within else 'EXCEEDED'}")
+
+    if args.output:
+        with open(args.output, "w") as out:
+            json.dump({
+                "benchmark": "startup",
+                **breakdown,
+                "runs": runs,
+                "first_root_ms": root,
+                "first_reports_ms": reports,
+                "budget_ms": args.budget_ms,
+                "within_budget": within,
+            }, out, indent=2)
+    sys.exit(0 if within else 1)
+
+
+if __name__ == "__main__":
+    main()
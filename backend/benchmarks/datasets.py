@@ -0,0 +1,134 @@
+"""
+Synthetic datasets shaped like sample_data.csv (Department, Month,
+Performance_Score, Process_Duration_Days, Defect_Count, Revenue), from a few
+KB to several GB. Files are written chunk by chunk, so generating one never
+holds more than a chunk in memory; a small share of missing values and
+outliers keeps the quality rules and anomaly detection busy. make_wide_frame
+builds in-memory frames with many numeric columns for the per-group benchmarks.
+
+    cd backend
+    python benchmarks/datasets.py --size 500MB --output /tmp/audit_500mb.csv
+"""
+import argparse
+import re
+
+import numpy as np
+import pandas as pd
+
+DEPARTMENTS = np.array(["Sales", "Marketing", "HR", "IT", "Operations"], dtype=object)
+MONTHS = np.array([f"2024-{m:02d}" for m in range(1, 13)], dtype=object)
+
+_UNITS = {"": 1, "B": 1, "KB": 2 ** 10, "MB": 2 ** 20, "GB": 2 ** 30}
+
+
+def parse_size(text: str) -> int:
+    """'64KB', '10MB', '1.5GB' or a plain byte count."""
+    match = re.fullmatch(r"\s*([0-9.]+)\s*([KMG]?B?)\s*", text.upper())
+    if not match:
+        raise ValueError(f"Invalid size: {text}")
+    return int(float(match.group(1)) * _UNITS[match.group(2)])
+
+
+def make_frame(rows: int, seed: int = 0, missing: float = 0.01, outliers: float = 0.001) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "Department": DEPARTMENTS[rng.integers(0, DEPARTMENTS.size, rows)],
+        "Month": MONTHS[rng.integers(0, MONTHS.size, rows)],
+        "Performance_Score": rng.integers(60, 100, rows),
+        "Process_Duration_Days": rng.integers(1, 30, rows),
+        "Defect_Count": rng.poisson(3, rows),
+        "Revenue": rng.normal(150000, 30000, rows).round(0).astype(np.int64),
+    })
+    if outliers:
+        flagged = rng.random(rows) < outliers
+        df.loc[flagged, "Revenue"] *= 20
+        df.loc[rng.random(rows) < outliers, "Process_Duration_Days"] = 365
+    if missing:
+        for col in ("Performance_Score", "Process_Duration_Days", "Revenue"):
+            # Nullable integers, so the CSV keeps whole numbers and empty cells like the sample
+            df[col] = df[col].astype("Int64").mask(rng.random(rows) < missing)
+    return df
+
+
+def make_wide_frame(rows: int, columns: int = 20, departments: int = 8, months: int = 24, categorical: bool = False,
+                    seed: int = 0, decimals: int = None, missing: float = 0.01) -> pd.DataFrame:
+    """
+    Department and Month keys (plain strings, or categoricals) plus `columns`
+    normally distributed float columns metric_00, metric_01, ..., rounded to
+    `decimals` places if given, with a `missing` share of NaN each.
+    """
+    rng = np.random.default_rng(seed)
+    dept_names = [f"Dept{i:02d}" for i in range(departments)]
+    month_names = [f"{2020 + i // 12}-{i % 12 + 1:02d}" for i in range(months)]
+    dept = pd.Categorical.from_codes(rng.integers(0, departments, rows), dept_names)
+    month = pd.Categorical.from_codes(rng.integers(0, months, rows), month_names)
+    data = {
+        "Department": dept if categorical else np.asarray(dept_names, dtype=object)[dept.codes],
+        "Month": month if categorical else np.asarray(month_names, dtype=object)[month.codes],
+    }
+    for j in range(columns):
+        values = rng.normal(100 + j, 10, rows)
+        if decimals is not None:
+            values = values.round(decimals)
+        values[rng.random(rows) < missing] = np.nan
+        data[f"metric_{j:02d}"] = values
+    return pd.DataFrame(data)
+
+
+def write_csv(path: str, size_bytes: int = None, rows: int = None, seed: int = 0,
+              chunk_rows: int = 500_000, **frame_options) -> dict:
+    """
+    Writes a CSV of exactly `rows` rows, or of just under `size_bytes` (cut
+    at a row boundary). Returns {"path", "rows", "bytes"}.
+    """
+    if (size_bytes is None) == (rows is None):
+        raise ValueError("Pass exactly one of size_bytes or rows")
+    written_rows, written_bytes, chunk = 0, 0, 0
+    with open(path, "wb") as out:
+        while True:
+            n = chunk_rows if rows is None else min(chunk_rows, rows - written_rows)
+            if n <= 0:
+                break
+            data = make_frame(n, seed + chunk, **frame_options).to_csv(index=False, header=chunk == 0).encode()
+            if size_bytes is not None and written_bytes + len(data) >= size_bytes:
+                # Cut on a line boundary so the file stays valid, keeping at least one row
+                header_end = data.find(b"\n") + 1 if chunk == 0 else 0
+                cut = data.rfind(b"\n", 0, size_bytes - written_bytes) + 1
+                if cut <= header_end:
+                    cut = data.find(b"\n", header_end) + 1 if chunk == 0 else 0
+                written_rows += data[:cut].count(b"\n") - (chunk == 0)
+                out.write(data[:cut])
+                written_bytes += cut
+                break
+            out.write(data)
+            written_bytes += len(data)
+            written_rows += n
+            chunk += 1
+    return {"path": path, "rows": written_rows, "bytes": written_bytes}
+
+
+def csv_bytes(rows: int, seed: int = 0, **frame_options) -> bytes:
+    """A small dataset in memory, for request bodies."""
+    return make_frame(rows, seed, **frame_options).to_csv(index=False).encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--size", help="Approximate file size, e.g. 64KB, 10MB, 2GB")
+    group.add_argument("--rows", type=int)
+    parser.add_argument("--output", required=True, help="CSV path to write")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--missing", type=float, default=0.01, help="Share of missing numeric values")
+    parser.add_argument("--outliers", type=float, default=0.001, help="Share of outlier rows")
+    args = parser.parse_args()
+
+    info = write_csv(
+        args.output, parse_size(args.size) if args.size else None, args.rows, args.seed,
+        missing=args.missing, outliers=args.outliers,
+    )
+    print(f"{info['path']}: {info['rows']:,} rows, {info['bytes'] / 2 ** 20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Local stand-in for the OpenAI chat completions API, so the advisor stage can
+be benchmarked without network access, an API key or token costs. Answers
+POST /v1/chat/completions with a canned Markdown report after a configurable
+delay (plain or `"stream": true` server-sent events), with a usage block.
+
+    cd backend
+    python benchmarks/llm_stub.py --port 8900 --latency-ms 800
+    OPENAI_BASE_URL=http://127.0.0.1:8900/v1 OPENAI_API_KEY=stub uvicorn main:app
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPORT = """# Executive Summary
+The dataset is broadly healthy, with a **moderate data quality score** and a few isolated gaps.
+
+## Critical Operational Risks
+- Missing values in key operational columns weaken period-over-period comparisons.
+- Outliers in revenue and duration figures can distort departmental targets.
+
+## Strategic Opportunities
+1. Standardize data capture at the source systems to reduce missing entries.
+2. Review the departments with the highest defect counts for process bottlenecks.
+3. Track the quality score monthly to detect regressions early.
+
+## Immediate Actions
+- Reconcile the flagged rows with their owners.
+- Add validation on the upload form for required fields.
+"""
+
+
+class StubConfig:
+    def __init__(self, latency_ms: float = 500.0, jitter_ms: float = 0.0, token_interval_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        # Generation time per token: paced between streamed chunks, added to the delay otherwise
+        self.token_interval_ms = token_interval_ms
+        self.requests = 0
+        self.lock = threading.Lock()
+
+
+def _tokens(text: str) -> list:
+    # Word-sized pieces keeping their trailing whitespace, so they concatenate back to `text`
+    pieces, start = [], 0
+    for i, ch in enumerate(text):
+        if ch in " \n" and i + 1 < len(text) and text[i + 1] not in " \n":
+            pieces.append(text[start:i + 1])
+            start = i + 1
+    pieces.append(text[start:])
+    return pieces
+
+
+def _handler(config: StubConfig):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _json(self, status: int, body: dict):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/models"):
+                self._json(200, {"object": "list", "data": [{"id": "stub", "object": "model"}]})
+            else:
+                self._json(404, {"error": {"message": "not found"}})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._json(404, {"error": {"message": "not found"}})
+                return
+            with config.lock:
+                config.requests += 1
+
+            prompt = " ".join(str(m.get("content", "")) for m in request.get("messages", []))
+            pieces = _tokens(REPORT)
+            usage = {
+                "prompt_tokens": len(prompt.split()),
+                "completion_tokens": len(pieces),
+                "total_tokens": len(prompt.split()) + len(pieces),
+            }
+            delay = config.latency_ms + random.uniform(-config.jitter_ms, config.jitter_ms)
+            time.sleep(max(delay, 0) / 1000)
+
+            completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+            base = {"id": completion_id, "created": int(time.time()), "model": request.get("model", "stub")}
+            if not request.get("stream"):
+                time.sleep(len(pieces) * config.token_interval_ms / 1000)
+                self._json(200, dict(
+                    base,
+                    object="chat.completion",
+                    choices=[{"index": 0, "message": {"role": "assistant", "content": REPORT},
+                              "finish_reason": "stop"}],
+                    usage=usage,
+                ))
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+
+            def send(chunk: dict):
+                self.wfile.write(f"data: {json.dumps(dict(base, object='chat.completion.chunk', **chunk))}\n\n".encode())
+                self.wfile.flush()
+
+            send({"choices": [{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}]})
+            for piece in pieces:
+                if config.token_interval_ms:
+                    time.sleep(config.token_interval_ms / 1000)
+                send({"choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]})
+            send({"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+            if (request.get("stream_options") or {}).get("include_usage"):
+                send({"choices": [], "usage": usage})
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+            self.close_connection = True
+
+    return Handler
+
+
+def start_stub(latency_ms: float = 500.0, jitter_ms: float = 0.0, token_interval_ms: float = 0.0,
+               port: int = 0) -> tuple:
+    """Serves the stub on a background thread; returns (server, base_url). Stop with server.shutdown()."""
+    config = StubConfig(latency_ms, jitter_ms, token_interval_ms)
+    server = ThreadingHTTPServer(("127.0.0.1", port), _handler(config))
+    server.daemon_threads = True
+    server.config = config
+    threading.Thread(target=server.serve_forever, name="llm-stub", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=500.0, help="Delay before the response (or first token)")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform +/- variation of the delay")
+    parser.add_argument("--token-interval-ms", type=float, default=0.0, help="Generation time per token")
+    args = parser.parse_args()
+
+    server, base_url = start_stub(args.latency_ms, args.jitter_ms, args.token_interval_ms, args.port)
+    print(f"LLM stub listening on {base_url} (latency {args.latency_ms:.0f} ms)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
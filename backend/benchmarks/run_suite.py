@@ -0,0 +1,151 @@
+"""
+Runs the micro-benchmarks and the load test and saves one JSON file per run
+(named after the git commit) under benchmarks/results/. Each run is compared
+with a baseline (the previous result file unless --baseline is given):
+timings that got slower, or throughput that dropped, by more than
+--threshold are listed as regressions and make the exit status 1.
+
+    cd backend
+    python benchmarks/run_suite.py                 # full run
+    python benchmarks/run_suite.py --quick         # small sizes, a couple of minutes
+    python benchmarks/run_suite.py --baseline benchmarks/results/<commit>.json
+"""
+import argparse
+import datetime
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bench_load  # noqa: E402
+import bench_micro  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Sizes per preset: (micro rows, micro repeat, catalog rows, load requests, load concurrency, upload rows)
+PRESETS = {
+    "quick": (50_000, 3, 20_000, 30, 4, 2_000),
+    "full": (500_000, 5, 100_000, 200, 8, 20_000),
+}
+
+# Compared metrics: lower is better for timings, higher for throughput
+LOWER_IS_BETTER = ("median_s", "p50_ms", "p95_ms", "p99_ms", "first_token_p50_ms", "first_token_p95_ms")
+HIGHER_IS_BETTER = ("throughput_rps",)
+# Timing changes smaller than this are noise, whatever their relative size
+MIN_DELTA_MS = 1.0
+
+
+def git_revision() -> dict:
+    def git(*args):
+        proc = subprocess.run(["git", *args], capture_output=True, text=True, cwd=os.path.dirname(RESULTS_DIR))
+        return proc.stdout.strip()
+
+    try:
+        return {"commit": git("rev-parse", "--short", "HEAD") or None, "dirty": bool(git("status", "--porcelain"))}
+    except OSError:
+        return {"commit": None, "dirty": None}
+
+
+def flatten(results: dict) -> dict:
+    """{"micro.analyst_full.median_s": 0.17, "load.upload.p95_ms": 731.3, ...} for the compared metrics."""
+    flat = {}
+    for name, r in results.get("micro", {}).get("results", {}).items():
+        flat[f"micro.{name}.median_s"] = r["median_s"]
+    for name, r in results.get("load", {}).get("scenarios", {}).items():
+        for key in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+            if r.get(key) is not None:
+                flat[f"load.{name}.{key}"] = r[key]
+    return flat
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    regressions = []
+    old, new = flatten(baseline), flatten(current)
+    for key, value in new.items():
+        before = old.get(key)
+        if not before or not value:
+            continue
+        if not key.endswith(HIGHER_IS_BETTER):
+            delta_ms = (value - before) * (1000 if key.endswith("_s") else 1)
+            if abs(delta_ms) < MIN_DELTA_MS:
+                continue
+        change = value / before - 1
+        worse = change > threshold if not key.endswith(HIGHER_IS_BETTER) else change < -threshold
+        if worse:
+            regressions.append({"metric": key, "baseline": before, "current": value, "change_pct": round(100 * change, 1)})
+    return regressions
+
+
+def latest_result(exclude: str = None) -> str:
+    paths = [p for p in glob.glob(os.path.join(RESULTS_DIR, "*.json")) if p != exclude]
+    return max(paths, key=os.path.getmtime) if paths else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="Small sizes for a fast check")
+    parser.add_argument("--skip-load", action="store_true", help="Only the micro-benchmarks")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--token-interval-ms", type=float, default=10.0, help="Stub generation time per token")
+    parser.add_argument("--baseline", help="Result file to compare with (default: the latest in benchmarks/results)")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative change reported as a regression")
+    parser.add_argument("--output", help="Result path (default: benchmarks/results/<commit>.json)")
+    args = parser.parse_args()
+
+    preset = "quick" if args.quick else "full"
+    rows, repeat, catalog_reports, load_requests, concurrency, upload_rows = PRESETS[preset]
+    revision = git_revision()
+    baseline_path = args.baseline or latest_result()
+
+    results = {
+        "suite": preset,
+        **revision,
+        "recorded_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+    print(f"micro-benchmarks ({preset})")
+    results["micro"] = bench_micro.run(rows, min(rows, 50_000), repeat, catalog_reports)
+    for name, r in results["micro"]["results"].items():
+        print(f"  {name:<22}: median {r['median_s'] * 1000:9.2f} ms")
+    if not args.skip_load:
+        print(f"load test ({preset})")
+        results["load"] = bench_load.run(
+            bench_load.SCENARIOS, load_requests, concurrency, upload_rows, args.llm_latency_ms, 120.0,
+            args.token_interval_ms,
+        )
+
+    regressions = []
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        if baseline.get("suite") != preset:
+            print(f"baseline {baseline_path} is a {baseline.get('suite')} run; not compared")
+        else:
+            regressions = compare(results, baseline, args.threshold)
+            results["baseline"] = {"path": os.path.basename(baseline_path), "commit": baseline.get("commit")}
+            print(f"compared with {os.path.basename(baseline_path)} (threshold {args.threshold:.0%}): "
+                  f"{len(regressions)} regression(s)")
+            for r in regressions:
+                print(f"  {r['metric']:<40} {r['baseline']:>10} -> {r['current']:>10} ({r['change_pct']:+.1f}%)")
+    results["regressions"] = regressions
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        name = revision["commit"] or datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{name}{'-dirty' if revision['dirty'] else ''}-{preset}.json")
+    with open(output, "w") as out:
+        json.dump(results, out, indent=2)
+    print(f"results written to {output}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
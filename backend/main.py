@@ -1,18 +1,74 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-import pandas as pd
-import io
-
-
-
-from agents.analyst_simple import run_analyst_pipeline
-from agents.advisor_simple import run_advisor_agent
-from utils.pdf_gen import generate_pdf_report
-from fastapi.responses import StreamingResponse
-import hashlib
-import datetime
-
-app = FastAPI(title="Intelligent Audit System API")
+import asyncio
+import json
+import math
+import os
+import shutil
+import tempfile
+import zipfile
+
+
+
+from utils import catalog
+from utils import report_store
+from utils import llm_cache
+from utils import metrics
+from utils import batches
+from utils import merkle
+from utils import chain_indexer
+from utils import verification
+from utils.jobs import JobManager, QueueFullError
+from pipeline import run_audit, run_batch, shutdown_process_pool, warm_up, STAGES
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from contextlib import asynccontextmanager
+from typing import List, Optional
+import threading
+
+# Modules that pull in pandas, pyarrow or ReportLab (ingest, export_feed, pdf_gen,
+# agents.*) are imported inside the handlers that need them, so the server
+# answers its first request without loading them; see WARM_UP below.
+
+# Load the analysis stack in a background thread once the server is up
+WARM_UP = os.getenv("WARM_UP", "1") != "0"
+
+
+def _run_job(fileobj, filename, options, on_stage):
+    return run_audit(
+        fileobj,
+        filename,
+        streaming=options.get("streaming"),
+        use_llm_cache=options.get("use_llm_cache", True),
+        force=options.get("force", False),
+        content_hash=options.get("content_sha256"),
+        on_stage=on_stage,
+        base_report_id=options.get("base_report_id"),
+    )
+
+job_manager = JobManager(_run_job, STAGES)
+indexer = chain_indexer.ChainIndexer()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    job_manager.start()
+    if chain_indexer.INDEXER_ENABLED:
+        indexer.start()
+    warm_up_thread = None
+    if WARM_UP:
+        warm_up_thread = threading.Thread(target=warm_up, name="warm-up", daemon=True)
+        warm_up_thread.start()
+    yield
+    if warm_up_thread is not None:
+        # Never exit with the thread halfway through an import
+        warm_up_thread.join()
+    indexer.stop()
+    job_manager.stop()
+    shutdown_process_pool()
+
+app = FastAPI(title="Intelligent Audit System API", lifespan=lifespan)
 
 
 app.add_middleware(
@@ -28,52 +84,39 @@ def read_root():
     return {"message": "System is running"}
 
 @app.post("/upload_and_analyze")
-async def upload_analyze(file: UploadFile = File(...)):
+async def upload_analyze(
+    file: UploadFile = File(...),
+    streaming: Optional[bool] = None,
+    use_llm_cache: bool = True,
+    force: bool = False,
+    base_report_id: Optional[str] = None,
+    profile: bool = False,
+):
+    """
+    `base_report_id` declares the file as rows appended to that report's dataset.
+    `profile` runs the audit under the profiler; the trace is served by
+    GET /reports/{id}/profile.
+    """
+    from agents.sketches import SketchMismatchError
+
     if not file.filename.endswith(('.csv', '.xlsx')):
         raise HTTPException(status_code=400, detail="Invalid file format. Please upload CSV or Excel.")
+    if base_report_id and not report_store.report_exists(base_report_id):
+        raise HTTPException(status_code=404, detail="Base report not found")
     
     try:
-        if file.filename.endswith('.csv'):
-            df = pd.read_csv(file.file)
-        else:
-            df = pd.read_excel(file.file)
-            
-       
-        analysis_result = run_analyst_pipeline(df)
-        
-       
-        recommendations = run_advisor_agent(analysis_result)
-        
-      
-        pdf_buffer = generate_pdf_report(analysis_result, recommendations, file.filename)
-        
-       
-        report_hash = hashlib.sha256(pdf_buffer.getvalue()).hexdigest()
-        
-        
-        # Prepare full data object
-        full_report_data = {
-            "filename": file.filename,
-            "timestamp": datetime.datetime.now().isoformat(),
-            "analysis": analysis_result,
-            "recommendations": recommendations,
-            "report_hash_preview": report_hash
-        }
-        
-        # Save to JSON history
-        saved_id = save_report_json(full_report_data)
-        
-        return {
-            "status": "success",
-            "filename": file.filename,
-            "analysis": analysis_result,
-            "recommendations": recommendations,
-            "report_hash_preview": report_hash, 
+        # Parsing, the LLM call and PDF rendering are blocking; keep them off the event loop
+        if profile:
+            return await run_in_threadpool(
+                metrics.run_profiled, run_audit, file.file, file.filename, streaming, use_llm_cache, force,
+                base_report_id=base_report_id,
+            )
+        return await run_in_threadpool(
+            run_audit, file.file, file.filename, streaming, use_llm_cache, force, base_report_id=base_report_id
+        )
 
-            "timestamp": full_report_data["timestamp"],
-            "id": saved_id
-        }
-        
+    except SketchMismatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         import traceback
         error_detail = f"Analysis failed: {str(e)}\n{traceback.format_exc()}"
@@ -81,6 +124,165 @@ async def upload_analyze(file: UploadFile = File(...)):
 
         raise HTTPException(status_code=500, detail=error_detail)
 
+def _json_safe(value):
+    """Replaces NaN and infinite floats, which JSON cannot represent, with None."""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {k: _json_safe(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_json_safe(v) for v in value]
+    return value
+
+
+@app.post("/upload_and_analyze/stream")
+async def upload_analyze_stream(
+    file: UploadFile = File(...),
+    streaming: Optional[bool] = None,
+    use_llm_cache: bool = True,
+    force: bool = False,
+    base_report_id: Optional[str] = None,
+):
+    """
+    The same audit as /upload_and_analyze, answered as Server-Sent Events:
+    `stage` progress, `analysis` as soon as the statistics are ready, `token`
+    pieces of the recommendations as the model writes them, then `done` with
+    the report id, PDF hash and metrics (or `error`). The audit completes and
+    is saved even if the client goes away.
+    """
+    from agents.sketches import SketchMismatchError
+
+    if not file.filename.endswith(('.csv', '.xlsx')):
+        raise HTTPException(status_code=400, detail="Invalid file format. Please upload CSV or Excel.")
+    if base_report_id and not report_store.report_exists(base_report_id):
+        raise HTTPException(status_code=404, detail="Base report not found")
+
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+
+    def emit(event: str, data):
+        # Called from the worker thread
+        loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+
+    def audit():
+        try:
+            result = run_audit(
+                file.file, file.filename, streaming, use_llm_cache, force,
+                on_stage=lambda name, state: emit("stage", {"stage": name, "state": state}),
+                base_report_id=base_report_id,
+                on_analysis=lambda analysis: emit("analysis", analysis),
+                on_token=lambda text: emit("token", {"text": text}),
+            )
+            emit("done", {k: v for k, v in result.items() if k not in ("analysis", "recommendations")})
+        except SketchMismatchError as e:
+            emit("error", {"status_code": 400, "detail": str(e)})
+        except Exception as e:
+            import traceback
+            print(f"Analysis failed: {str(e)}\n{traceback.format_exc()}")
+            emit("error", {"status_code": 500, "detail": f"Analysis failed: {str(e)}"})
+
+    task = asyncio.ensure_future(run_in_threadpool(audit))
+
+    async def events():
+        try:
+            while True:
+                event, data = await queue.get()
+                try:
+                    payload = json.dumps(_json_safe(jsonable_encoder(data)), allow_nan=False)
+                except (TypeError, ValueError) as e:
+                    # Strict JSON or nothing: browsers' JSON.parse rejects NaN/Infinity
+                    payload = json.dumps({"status_code": 500, "detail": f"Could not serialize {event} event: {e}"})
+                    event = "error"
+                yield f"event: {event}\ndata: {payload}\n\n"
+                if event in ("done", "error"):
+                    break
+        finally:
+            # The upload stays open until the audit has read it, even after a disconnect
+            await task
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _stage_batch(files: List[UploadFile], work_dir: str) -> list:
+    """Copies the uploads (expanding zip archives) into work_dir for the worker processes."""
+    from utils import ingest
+
+    staged = []
+    for i, file in enumerate(files):
+        if file.filename.endswith('.zip'):
+            try:
+                staged.extend(ingest.extract_archive(file.file, work_dir))
+            except zipfile.BadZipFile:
+                raise HTTPException(status_code=400, detail=f"Invalid zip archive: {file.filename}")
+        elif file.filename.endswith(ingest.SUPPORTED_EXTENSIONS):
+            path = os.path.join(work_dir, f"upload-{i}{os.path.splitext(file.filename)[1]}")
+            with open(path, "wb") as f:
+                shutil.copyfileobj(file.file, f, 1024 * 1024)
+            staged.append((path, file.filename))
+        else:
+            raise HTTPException(status_code=400, detail=f"Invalid file format: {file.filename}. Please upload CSV, Excel or a zip of them.")
+    return staged
+
+@app.post("/batch_analyze")
+async def batch_analyze(
+    files: List[UploadFile] = File(...),
+    advisor_concurrency: Optional[int] = Query(None, ge=1),
+    use_llm_cache: bool = True,
+    force: bool = False,
+):
+    """
+    Audits many files in one request (several multipart files and/or zip
+    archives) and returns a per-file manifest. Files failing individually
+    are reported in the manifest instead of failing the batch.
+    """
+    with tempfile.TemporaryDirectory(prefix="batch-") as work_dir:
+        staged = await run_in_threadpool(_stage_batch, files, work_dir)
+        if not staged:
+            raise HTTPException(status_code=400, detail="No CSV or Excel files in the upload.")
+        return await run_in_threadpool(run_batch, staged, advisor_concurrency, use_llm_cache, force)
+
+@app.post("/jobs", status_code=202)
+async def submit_job(
+    file: UploadFile = File(...),
+    streaming: Optional[bool] = None,
+    use_llm_cache: bool = True,
+    force: bool = False,
+    base_report_id: Optional[str] = None,
+):
+    """Queues an analysis and returns immediately with a job id."""
+    if not file.filename.endswith(('.csv', '.xlsx')):
+        raise HTTPException(status_code=400, detail="Invalid file format. Please upload CSV or Excel.")
+    if base_report_id and not report_store.report_exists(base_report_id):
+        raise HTTPException(status_code=404, detail="Base report not found")
+
+    options = {"streaming": streaming, "use_llm_cache": use_llm_cache, "force": force, "base_report_id": base_report_id}
+    try:
+        job_id = await run_in_threadpool(job_manager.submit, file.file, file.filename, options)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+
+    return {"job_id": job_id, "status": "queued"}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job.pop("result")
+    return job
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] == "failed":
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {job['error']}")
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    return job["result"]
+
 @app.post("/test_upload")
 async def test_upload(file: UploadFile = File(...)):
     """Simple test endpoint to check file upload"""
@@ -99,91 +301,294 @@ async def test_upload(file: UploadFile = File(...)):
 
 
 # Persistence Logic
-REPORTS_DIR = "data/reports"
+REPORTS_DIR = report_store.REPORTS_DIR
 import os
-import json
-import uuid
 
 if not os.path.exists(REPORTS_DIR):
     os.makedirs(REPORTS_DIR)
 
-def save_report_json(data: dict):
-    report_id = str(uuid.uuid4())
-    filename = f"{data['timestamp'].replace(':', '-')}_{data['filename']}.json"
-    filepath = os.path.join(REPORTS_DIR, report_id + ".json")
-    
-    # Enrich data with ID and initial certification status
-    data["id"] = report_id
-    data["is_certified"] = False # Default
-    
-    with open(filepath, 'w') as f:
-        json.dump(data, f, indent=4)
-        
-    return report_id
+catalog.init_catalog(REPORTS_DIR)
 
 @app.get("/reports")
-async def list_reports():
-    reports = []
-    if not os.path.exists(REPORTS_DIR):
-        return []
-        
-    for filename in os.listdir(REPORTS_DIR):
-        if filename.endswith(".json"):
-            with open(os.path.join(REPORTS_DIR, filename), 'r') as f:
-                try:
-                    data = json.load(f)
-                    # Return summary only
-                    reports.append({
-                        "id": data.get("id"),
-                        "filename": data.get("filename"),
-                        "timestamp": data.get("timestamp"),
-                        "quality_score": data.get("analysis", {}).get("quality_analysis", {}).get("score", 0),
-                        "is_certified": data.get("is_certified", False)
-                    })
-                except:
-                    continue
-                    
-    # Sort by timestamp desc
-    return sorted(reports, key=lambda x: x['timestamp'], reverse=True)
+async def list_reports(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    sort: str = "timestamp",
+    order: str = "desc",
+    filename: Optional[str] = None,
+    certified: Optional[bool] = None,
+    min_score: Optional[int] = None,
+    max_score: Optional[int] = None,
+):
+    """Paginated report summaries served from the catalog index."""
+    try:
+        return catalog.list_reports(
+            limit=limit,
+            cursor=cursor,
+            sort=sort,
+            order=order,
+            filename=filename,
+            certified=certified,
+            min_score=min_score,
+            max_score=max_score,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/reports/{report_id}")
-async def get_report(report_id: str):
-    filepath = os.path.join(REPORTS_DIR, report_id + ".json")
-    if not os.path.exists(filepath):
+async def get_report(report_id: str, include_data: bool = False):
+    if not report_store.report_exists(report_id):
         raise HTTPException(status_code=404, detail="Report not found")
         
-    with open(filepath, 'r') as f:
-        return json.load(f)
+    data = report_store.load_metadata(report_id)
+    if include_data:
+        data.setdefault("analysis", {})["final_data"] = report_store.load_dataset_json(data)
+    else:
+        data.get("analysis", {}).pop("final_data", None)
+    return data
 
 @app.post("/reports/{report_id}/certify")
 async def mark_certified(report_id: str):
-    filepath = os.path.join(REPORTS_DIR, report_id + ".json")
-    if not os.path.exists(filepath):
+    if not report_store.report_exists(report_id):
         raise HTTPException(status_code=404, detail="Report not found")
         
-    with open(filepath, 'r') as f:
-        data = json.load(f)
-        
-    data["is_certified"] = True
-    
-    with open(filepath, 'w') as f:
-        json.dump(data, f, indent=4)
+    # Only the metadata document is rewritten
+    report_store.update_metadata(report_id, is_certified=True)
+
+    catalog.set_certified(report_id)
         
     return {"status": "success", "is_certified": True}
 
+@app.post("/batches")
+async def create_batch(data: Optional[dict] = None):
+    """
+    Builds a Merkle batch over `report_ids` (default: all uncertified reports)
+    and returns its root, to be anchored with AuditTraceability.certifyBatch.
+    """
+    try:
+        return batches.create_batch((data or {}).get("report_ids"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/batches/{batch_id}")
+async def get_batch(batch_id: str):
+    batch = batches.get_batch(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return batch
+
+@app.post("/batches/{batch_id}/anchor")
+async def anchor_batch(batch_id: str, data: dict):
+    """Records the certifyBatch transaction and marks every report of the batch certified."""
+    if batches.get_batch(batch_id) is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    if not data.get("tx_hash"):
+        raise HTTPException(status_code=400, detail="tx_hash is required")
+
+    report_ids = batches.mark_anchored(batch_id, data["tx_hash"])
+    for report_id in report_ids:
+        if report_store.report_exists(report_id):
+            report_store.update_metadata(report_id, is_certified=True, batch_id=batch_id)
+        catalog.set_certified(report_id)
+    return dict(batches.get_batch(batch_id), report_ids=report_ids)
+
+@app.get("/reports/{report_id}/proof")
+async def get_report_proof(report_id: str):
+    """Merkle inclusion proof of a batch-certified report."""
+    proof = batches.get_proof(report_id)
+    if proof is None:
+        raise HTTPException(status_code=404, detail="Report is not part of a batch")
+    return proof
+
+@app.post("/verify_proof")
+async def verify_proof(data: dict):
+    """
+    Checks {report_hash, proof, merkle_root} locally; `anchored` tells whether
+    the root belongs to a batch whose anchoring transaction was recorded.
+    """
+    try:
+        report_hash, proof, root = data["report_hash"], data.get("proof", []), data["merkle_root"]
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Missing field: {e.args[0]}")
+    if not isinstance(proof, list) or not all(isinstance(v, str) for v in [report_hash, root, *proof]):
+        raise HTTPException(status_code=400, detail="report_hash, merkle_root and each proof element must be strings")
+
+    valid = merkle.verify_proof(report_hash, proof, root)
+    batch = batches.find_by_root(root) if valid else None
+    return {
+        "valid": valid,
+        "anchored": bool(batch and batch["anchored"]),
+        "batch_id": batch["batch_id"] if batch else None,
+        "tx_hash": batch["tx_hash"] if batch else None,
+    }
+
+def _render_pdf_response(analysis: dict, recs: str, fname: str, report_id: str = None) -> FileResponse:
+    """
+    Renders the whole PDF to a temporary file (hashed while written; run it in
+    the threadpool), then serves that file; it is removed once sent.
+    """
+    from utils.pdf_gen import render_pdf_file
+
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    os.close(fd)
+    try:
+        report_hash, _ = render_pdf_file(path, analysis, recs, fname, report_id)
+    except Exception:
+        os.remove(path)
+        raise
+    return FileResponse(
+        path,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f"attachment; filename=report_{fname}.pdf", "X-Content-SHA256": report_hash},
+        background=BackgroundTask(os.remove, path),
+    )
+
+@app.get("/reports/{report_id}/pdf")
+async def get_report_pdf(report_id: str, request: Request):
+    """
+    Serves the PDF stored at upload time. The ETag is its certified SHA-256,
+    so clients can revalidate cheaply; byte ranges are supported.
+    """
+    if not report_store.report_exists(report_id):
+        raise HTTPException(status_code=404, detail="Report not found")
+
+    data = report_store.load_metadata(report_id)
+    fname = data.get("filename", "report")
+    disposition = {"Content-Disposition": f"attachment; filename=report_{fname}.pdf"}
+    path = report_store.pdf_path(report_id)
+    if not os.path.exists(path):
+        # Reports saved before PDFs were persisted are rendered on demand
+        return await run_in_threadpool(
+            _render_pdf_response, data.get("analysis", {}), data.get("recommendations", ""), fname, report_id
+        )
+
+    etag = f'"{data["report_hash_preview"]}"'
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers={"ETag": etag})
+    return FileResponse(path, media_type="application/pdf", headers=dict(disposition, ETag=etag))
+
+@app.get("/reports/{report_id}/profile")
+async def get_report_profile(report_id: str):
+    """Profiler trace of the report's upload, if it was run with `profile=true`."""
+    path = metrics.profile_path(report_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="No profile recorded for this report")
+    if path.endswith(".html"):
+        return FileResponse(path, media_type="text/html")
+    return FileResponse(path, media_type="application/octet-stream", filename=os.path.basename(path))
+
+@app.get("/reports/{report_id}/onchain")
+async def get_report_onchain(report_id: str):
+    """Certification events of a report, answered from the local chain index."""
+    if not report_store.report_exists(report_id):
+        raise HTTPException(status_code=404, detail="Report not found")
+    report_hash = report_store.load_metadata(report_id).get("report_hash_preview")
+    records = chain_indexer.lookup(report_hash) if report_hash else []
+    return {"report_id": report_id, "report_hash": report_hash, "on_chain": bool(records), "records": records}
+
+@app.get("/chain/certifications/{report_hash}")
+async def get_chain_certifications(report_hash: str):
+    records = chain_indexer.lookup(report_hash)
+    return {"report_hash": report_hash, "on_chain": bool(records), "records": records}
+
+@app.post("/verify/bulk")
+async def verify_bulk(data: dict):
+    """
+    Re-hashes the stored PDFs of `report_ids` and checks them, together with
+    any bare `report_hashes`, against the locally indexed chain events.
+    """
+    report_ids, report_hashes = data.get("report_ids") or [], data.get("report_hashes") or []
+    if not report_ids and not report_hashes:
+        raise HTTPException(status_code=400, detail="Provide report_ids and/or report_hashes")
+    try:
+        return await run_in_threadpool(verification.verify_bulk, report_ids, report_hashes)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/chain/status")
+async def chain_status():
+    return indexer.status()
+
+@app.post("/chain/sync")
+async def chain_sync():
+    """Runs one indexing pass now (also usable when the polling thread is disabled)."""
+    try:
+        return await run_in_threadpool(indexer.sync)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Chain sync failed: {e}")
+
 @app.delete("/reports/{report_id}")
 async def delete_report(report_id: str):
-    filepath = os.path.join(REPORTS_DIR, report_id + ".json")
-    if not os.path.exists(filepath):
+    if not report_store.report_exists(report_id):
         raise HTTPException(status_code=404, detail="Report not found")
-    
+    # Delta reports read their leading rows from this one's dataset
+    dependents = catalog.dependent_reports(report_id)
+    if dependents:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Report has delta reports built on it; delete them first: {', '.join(dependents)}",
+        )
+
     try:
-        os.remove(filepath)
+        report_store.delete_report(report_id)
+        catalog.remove_report(report_id)
+        metrics.remove_profile(report_id)
         return {"status": "success", "message": "Report deleted"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/export/audit_history")
+async def export_audit_history(
+    since: int = Query(0, ge=0),
+    format: str = "csv",
+    compression: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+):
+    """
+    Audit events (saved / certified / deleted) recorded after the `since`
+    watermark, oldest first, as CSV or Parquet. Pass the largest `seq`
+    received (also returned in X-Watermark) as the next `since`.
+    """
+    from utils import export_feed
+
+    try:
+        export_feed.validate(format, compression)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    fd, path = tempfile.mkstemp(suffix=f".{format}")
+    os.close(fd)
+    try:
+        result = await run_in_threadpool(export_feed.export_events, path, since, format, compression, limit)
+    except Exception:
+        os.remove(path)
+        raise
+    headers = {
+        "Content-Disposition": f"attachment; filename={export_feed.file_name(format, compression)}",
+        "X-Watermark": str(result["watermark"]),
+        "X-Row-Count": str(result["rows"]),
+        "X-Has-More": "true" if result["has_more"] else "false",
+    }
+    media_type = export_feed.MEDIA_TYPES[format]
+    if format == "csv" and compression:
+        media_type = "application/octet-stream"
+    return FileResponse(path, media_type=media_type, headers=headers, background=BackgroundTask(os.remove, path))
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Stage latencies, rows/bytes, LLM usage and peak memory in the Prometheus text format."""
+    metrics.set_gauge("llm_cache_entries", (await run_in_threadpool(llm_cache.stats))["entries"])
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/cache/llm")
+async def llm_cache_stats():
+    """Hit/miss counters and size of the advisor recommendation cache."""
+    return llm_cache.stats()
+
+
 @app.post("/generate_pdf")
 async def get_pdf_endpoint(data: dict):
 
@@ -195,18 +600,23 @@ async def get_pdf_endpoint(data: dict):
 
 
 
+    report_id = data.get("id")
+    if report_id and not report_store.is_report_id(report_id):
+        raise HTTPException(status_code=400, detail="Invalid report id")
     try:
         analysis = data.get("analysis", {})
         recs = data.get("recommendations", "")
         fname = data.get("filename", "report")
-        
-        pdf_buffer = generate_pdf_report(analysis, recs, fname)
-        
-        return StreamingResponse(
-            io.BytesIO(pdf_buffer.getvalue()),
-            media_type="application/pdf",
-            headers={"Content-Disposition": f"attachment; filename=report_{fname}.pdf"}
-        )
+
+        # A saved report already has its PDF on disk; serve those exact bytes
+        if report_id and report_store.report_exists(report_id) and os.path.exists(report_store.pdf_path(report_id)):
+            return FileResponse(
+                report_store.pdf_path(report_id),
+                media_type="application/pdf",
+                headers={"Content-Disposition": f"attachment; filename=report_{fname}.pdf"}
+            )
+
+        return await run_in_threadpool(_render_pdf_response, analysis, recs, fname, report_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -0,0 +1,410 @@
+import datetime
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, BinaryIO, Callable, List, Optional, Tuple
+
+from agents.advisor_simple import get_llm, run_advisor_agent, MODEL_NAME
+from utils import catalog
+from utils import metrics
+from utils import report_store
+
+# The analysis stack (pandas/NumPy/pyarrow via the analyst and ingest, ReportLab
+# via pdf_gen) is imported where it is used, so the API can start serving
+# before it is loaded; warm_up() loads it in the background after startup.
+if TYPE_CHECKING:
+    import pandas as pd
+    from agents.analyst_simple import StatsAccumulator
+
+# Ordered stages of an audit run, as reported to job progress callbacks
+STAGES = ("analyst", "advisor", "pdf", "save")
+
+
+def warm_up():
+    """Imports the analysis stack and builds the shared LLM client ahead of the first upload."""
+    import agents.analyst_simple  # noqa: F401
+    import utils.ingest  # noqa: F401
+    from utils.pdf_gen import get_styles
+
+    get_styles()
+    try:
+        get_llm()
+    except Exception:
+        # No API key configured: the first advisor call reports it
+        pass
+
+
+def config_version() -> str:
+    """Fingerprint of everything besides the upload bytes that shapes a report."""
+    from agents.quality_rules import CONFIG_PATH as QUALITY_CONFIG_PATH
+
+    digest = hashlib.sha256(MODEL_NAME.encode())
+    if os.path.exists(QUALITY_CONFIG_PATH):
+        with open(QUALITY_CONFIG_PATH, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def content_key(content_hash: str, base_report_id: str = None) -> str:
+    if base_report_id:
+        # The same rows appended to another report make another report
+        content_hash = f"{content_hash}+{base_report_id}"
+    return hashlib.sha256(f"{content_hash}:{config_version()}".encode()).hexdigest()
+
+
+def resume_accumulator(base_report_id: str = None) -> "StatsAccumulator":
+    """Fresh analysis state, or the saved state of the report new rows are appended to."""
+    from agents.analyst_simple import StatsAccumulator
+    from agents.sketches import SketchMismatchError
+
+    if not base_report_id:
+        return StatsAccumulator()
+    state = report_store.load_sketch(base_report_id)
+    if state is None:
+        raise SketchMismatchError(f"Report {base_report_id} has no saved sketches; upload the full file instead")
+    return StatsAccumulator.from_state(state)
+
+
+def cached_result(key: str) -> Optional[dict]:
+    """Upload response rebuilt from an existing report with the same content key."""
+    report_id = catalog.find_by_content_key(key)
+    if report_id is None or not report_store.report_exists(report_id):
+        return None
+    data = report_store.load_metadata(report_id)
+    return {
+        "status": "success",
+        "filename": data["filename"],
+        "analysis": data["analysis"],
+        "recommendations": data["recommendations"],
+        "report_hash_preview": data["report_hash_preview"],
+        "timestamp": data["timestamp"],
+        "id": report_id,
+        "is_certified": data.get("is_certified", False),
+        "cached": True
+    }
+
+
+def save_report_json(
+    data: dict,
+    df: "pd.DataFrame" = None,
+    dataset_writer: report_store.ChunkedDatasetWriter = None,
+    report_id: str = None,
+):
+    report_id = report_id or str(uuid.uuid4())
+
+    # Enrich data with ID and initial certification status
+    data["id"] = report_id
+    data["is_certified"] = False # Default
+
+    # Small metadata document + separate compressed dataset payload
+    report_store.save_report(report_id, data, df, dataset_writer)
+
+    # Keep the catalog in sync so listing never opens report bodies
+    catalog.upsert_report(data)
+
+    return report_id
+
+
+def run_audit(
+    fileobj: BinaryIO,
+    filename: str,
+    streaming: Optional[bool] = None,
+    use_llm_cache: bool = True,
+    force: bool = False,
+    content_hash: str = None,
+    on_stage: Callable[[str, str], None] = None,
+    base_report_id: str = None,
+    on_analysis: Callable[[dict], None] = None,
+    on_token: Callable[[str], None] = None,
+) -> dict:
+    """
+    Runs analyst -> advisor -> PDF -> save on an uploaded file and
+    returns the upload response. `on_stage(stage, state)` is called with
+    state "running" and then "done" around each stage, or "cached" for
+    every stage when an identical upload was already processed (unless
+    `force` is set).
+
+    With `base_report_id`, the upload holds only rows appended to that
+    report's dataset: just those rows are scanned and merged into its saved
+    sketches, for the same analysis as re-uploading the concatenated file.
+
+    Stage timings, input size, LLM usage and peak memory are returned and
+    stored under "metrics", and feed the /metrics counters.
+
+    For streaming clients, `on_analysis(analysis)` is called as soon as the
+    statistics are ready and `on_token(text)` with each piece of the advisor
+    recommendations as it is generated.
+    """
+    from agents.analyst_simple import run_analyst_pipeline, run_analyst_pipeline_chunked
+    from agents.quality_rules import rule_columns
+    from utils import ingest
+    from utils.pdf_gen import render_pdf_file
+
+    request_metrics = metrics.RequestMetrics()
+
+    def stage(name, state):
+        if state == "running":
+            request_metrics.start_stage(name)
+        elif state == "done":
+            request_metrics.end_stage(name)
+        if on_stage is not None:
+            on_stage(name, state)
+
+    key = content_key(content_hash or ingest.hash_upload(fileobj), base_report_id)
+    if not force:
+        cached = cached_result(key)
+        if cached is not None:
+            for name in STAGES:
+                stage(name, "cached")
+            if on_analysis is not None:
+                on_analysis(cached["analysis"])
+            if on_token is not None:
+                on_token(cached["recommendations"])
+            cached["metrics"] = request_metrics.finish("cached")
+            return cached
+
+    df = None
+    dataset_writer = None
+    report_id = str(uuid.uuid4())
+    try:
+        stage("analyst", "running")
+        accumulator = resume_accumulator(base_report_id)
+        # Large uploads are analyzed chunk by chunk unless the caller decides otherwise
+        if streaming is None:
+            streaming = ingest.upload_size(fileobj) > ingest.STREAMING_THRESHOLD_BYTES
+
+        # Columns the quality rules evaluate keep default dtypes; the rest are compacted
+        keep_columns = rule_columns(accumulator.constraints)
+        ingest_info = {}
+        if streaming:
+            dataset_writer = report_store.ChunkedDatasetWriter()
+
+            def tee(chunks):
+                for chunk in chunks:
+                    dataset_writer.write(chunk)
+                    yield chunk
+
+            chunks = ingest.iter_chunks(fileobj, filename, info=ingest_info, keep_columns=keep_columns)
+            analysis_result = run_analyst_pipeline_chunked(tee(chunks), accumulator)
+        else:
+            df = ingest.read_full(fileobj, filename, ingest_info, keep_columns)
+            # The dataset is persisted separately, so it is not serialized into the analysis
+            analysis_result = run_analyst_pipeline(df, include_data=False, accumulator=accumulator)
+        analysis_result["ingest"] = ingest_info
+        report_store.save_sketch(report_id, accumulator.to_state())
+        stage("analyst", "done")
+        request_metrics.add_input(ingest_info.get("rows", 0), ingest.upload_size(fileobj))
+        if "parse_seconds" in ingest_info:
+            request_metrics.add_stage("parse", ingest_info["parse_seconds"])
+        if on_analysis is not None:
+            on_analysis(analysis_result)
+
+        stage("advisor", "running")
+        with metrics.activate(request_metrics):
+            recommendations = run_advisor_agent(analysis_result, use_cache=use_llm_cache, on_token=on_token)
+        stage("advisor", "done")
+
+        stage("pdf", "running")
+        # Rendered straight to the report's PDF file, hashed on the way
+        report_hash, pdf_size = render_pdf_file(
+            report_store.pdf_path(report_id), analysis_result, recommendations, filename, report_id
+        )
+        stage("pdf", "done")
+
+        # Prepare full data object
+        full_report_data = {
+            "filename": filename,
+            "timestamp": datetime.datetime.now().isoformat(),
+            "analysis": analysis_result,
+            "recommendations": recommendations,
+            "report_hash_preview": report_hash,
+            "content_key": key,
+            "pdf": {"file": os.path.basename(report_store.pdf_path(report_id)), "bytes": pdf_size}
+        }
+        if base_report_id:
+            full_report_data["base_report_id"] = base_report_id
+
+        # Save to JSON history
+        stage("save", "running")
+        saved_id = save_report_json(full_report_data, df, dataset_writer, report_id=report_id)
+        stage("save", "done")
+    except Exception:
+        if dataset_writer is not None:
+            dataset_writer.discard()
+        report_store.remove_report_files(report_id)
+        request_metrics.finish("error")
+        raise
+
+    # Measured after the save so it is complete, then added to the stored report
+    run_metrics = request_metrics.finish("success")
+    report_store.update_metadata(saved_id, metrics=run_metrics)
+
+    return {
+        "status": "success",
+        "filename": filename,
+        "analysis": analysis_result,
+        "recommendations": recommendations,
+        "report_hash_preview": report_hash,
+        "timestamp": full_report_data["timestamp"],
+        "id": saved_id,
+        "metrics": run_metrics
+    }
+
+
+# Batch mode: CPU-bound stages (parsing/analysis, PDF rendering) run in a process
+# pool sized to the machine; advisor LLM calls run on threads behind a semaphore.
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", str(os.cpu_count() or 1)))
+BATCH_ADVISOR_CONCURRENCY = int(os.getenv("BATCH_ADVISOR_CONCURRENCY", "4"))
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # spawn: forking a server process that already runs threads is unsafe
+            _process_pool = ProcessPoolExecutor(
+                max_workers=BATCH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _process_pool
+
+
+def shutdown_process_pool():
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(cancel_futures=True)
+            _process_pool = None
+
+
+def _batch_analyze(path: str, filename: str, report_id: str) -> Tuple[dict, dict]:
+    """Process-pool stage: parse + analyze one file and write its dataset payload and sketches."""
+    from agents.analyst_simple import StatsAccumulator, run_analyst_pipeline, run_analyst_pipeline_chunked
+    from agents.quality_rules import rule_columns
+    from utils import ingest
+
+    accumulator = StatsAccumulator()
+    keep_columns = rule_columns(accumulator.constraints)
+    ingest_info = {}
+    with open(path, "rb") as f:
+        if ingest.upload_size(f) > ingest.STREAMING_THRESHOLD_BYTES:
+            writer = report_store.ChunkedDatasetWriter()
+            try:
+                def tee(chunks):
+                    for chunk in chunks:
+                        writer.write(chunk)
+                        yield chunk
+
+                chunks = ingest.iter_chunks(f, filename, info=ingest_info, keep_columns=keep_columns)
+                analysis = run_analyst_pipeline_chunked(tee(chunks), accumulator)
+            except Exception:
+                writer.discard()
+                raise
+            dataset = writer.commit(report_id)
+        else:
+            df = ingest.read_full(f, filename, ingest_info, keep_columns)
+            analysis = run_analyst_pipeline(df, include_data=False, accumulator=accumulator)
+            dataset = report_store.save_dataset(report_id, df)
+    analysis["ingest"] = ingest_info
+    report_store.save_sketch(report_id, accumulator.to_state())
+    return analysis, dataset
+
+
+def _batch_render(analysis: dict, recommendations: str, filename: str, report_id: str) -> Tuple[str, dict]:
+    """Process-pool stage: render and store the PDF; returns its SHA-256 and file info."""
+    from utils.pdf_gen import render_pdf_file
+
+    path = report_store.pdf_path(report_id)
+    report_hash, size = render_pdf_file(path, analysis, recommendations, filename, report_id)
+    return report_hash, {"file": os.path.basename(path), "bytes": size}
+
+
+def run_batch(
+    files: List[Tuple[str, str]],
+    advisor_concurrency: int = None,
+    use_llm_cache: bool = True,
+    force: bool = False,
+) -> dict:
+    """
+    Audits many files in parallel. `files` is a list of (path, filename) pairs
+    already on disk. Returns a manifest with one entry per file.
+    """
+    from utils import ingest
+
+    pool = get_process_pool()
+    advisor_slots = threading.Semaphore(advisor_concurrency or BATCH_ADVISOR_CONCURRENCY)
+
+    def audit_one(path: str, filename: str) -> dict:
+        started = time.perf_counter()
+        entry = {"filename": filename}
+        report_id = None
+        # Parsing and rendering happen in pool processes, so this process's peak memory says nothing
+        request_metrics = metrics.RequestMetrics(track_memory=False)
+        try:
+            with open(path, "rb") as f:
+                key = content_key(ingest.hash_upload(f))
+            cached = None if force else cached_result(key)
+            if cached is not None:
+                entry.update(status="cached", id=cached["id"], report_hash_preview=cached["report_hash_preview"],
+                             quality_score=cached["analysis"]["quality_analysis"]["score"])
+                request_metrics.finish("cached")
+                return entry
+
+            report_id = str(uuid.uuid4())
+            with request_metrics.stage("analyst"):
+                analysis, dataset = pool.submit(_batch_analyze, path, filename, report_id).result()
+            request_metrics.add_input(analysis["ingest"].get("rows", 0), os.path.getsize(path))
+            if "parse_seconds" in analysis["ingest"]:
+                request_metrics.add_stage("parse", analysis["ingest"]["parse_seconds"])
+
+            with advisor_slots, request_metrics.stage("advisor"), metrics.activate(request_metrics):
+                recommendations = run_advisor_agent(analysis, use_cache=use_llm_cache)
+
+            with request_metrics.stage("pdf"):
+                report_hash, pdf = pool.submit(_batch_render, analysis, recommendations, filename, report_id).result()
+
+            data = {
+                "filename": filename,
+                "timestamp": datetime.datetime.now().isoformat(),
+                "analysis": analysis,
+                "recommendations": recommendations,
+                "report_hash_preview": report_hash,
+                "content_key": key,
+                "dataset": dataset,
+                "pdf": pdf
+            }
+            with request_metrics.stage("save"):
+                save_report_json(data, report_id=report_id)
+            report_store.update_metadata(report_id, metrics=request_metrics.finish("success"))
+            entry.update(status="success", id=report_id, report_hash_preview=report_hash,
+                         quality_score=analysis["quality_analysis"]["score"])
+        except Exception as e:
+            if report_id is not None:
+                report_store.remove_report_files(report_id)
+            request_metrics.finish("error")
+            entry.update(status="error", error=str(e))
+        finally:
+            entry["seconds"] = round(time.perf_counter() - started, 3)
+        return entry
+
+    started = time.perf_counter()
+    # Coordinator threads mostly wait on the process pool or the LLM
+    with ThreadPoolExecutor(max_workers=max(1, min(len(files), BATCH_WORKERS * 4))) as coordinators:
+        results = list(coordinators.map(lambda item: audit_one(*item), files))
+
+    counts = {}
+    for entry in results:
+        counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+    return {
+        "files": len(results),
+        "counts": counts,
+        "seconds": round(time.perf_counter() - started, 3),
+        "results": results
+    }
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+# The backend is run from its own directory (uvicorn main:app), not installed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Empty working directory with a fresh catalog; storage paths are relative to it."""
+    from utils import batches, catalog, chain_indexer, report_store
+
+    monkeypatch.chdir(tmp_path)
+    # Schemas created once per process would otherwise be skipped in the new catalog
+    monkeypatch.setattr(batches, "_initialized", False)
+    monkeypatch.setattr(chain_indexer, "_initialized", False)
+    os.makedirs(report_store.REPORTS_DIR)
+    catalog.init_catalog(report_store.REPORTS_DIR)
+    return tmp_path
+
+
+@pytest.fixture
+def client(workdir):
+    """API client without the lifespan (no job workers, indexer or warm-up thread)."""
+    from fastapi.testclient import TestClient
+
+    import main
+
+    return TestClient(main.app)
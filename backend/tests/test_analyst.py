@@ -0,0 +1,94 @@
+import functools
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import pipeline
+from agents.analyst_simple import run_analyst_pipeline
+from benchmarks.datasets import make_frame
+from utils import ingest
+
+
+@pytest.fixture
+def audit(workdir, monkeypatch):
+    monkeypatch.setattr(pipeline, "run_advisor_agent", lambda analysis, use_cache=True, on_token=None: "ok")
+
+    def run(df: pd.DataFrame, **kwargs) -> dict:
+        body = io.BytesIO(df.to_csv(index=False).encode())
+        return pipeline.run_audit(body, "data.csv", force=True, **kwargs)
+
+    return run
+
+
+def test_single_row_file_is_strict_json(audit):
+    df = pd.DataFrame({"Department": ["Ops"], "Revenue": [120.5], "Hours": [8]})
+
+    summary = audit(df)["analysis"]["statistics"]["numeric_summary"]
+
+    json.dumps(summary, allow_nan=False)
+    assert summary["Revenue"] == {
+        "mean": 120.5, "std": None, "min": 120.5, "max": 120.5, "missing": 0,
+        "p25": 120.5, "p50": 120.5, "p75": 120.5,
+    }
+
+
+def test_column_with_one_value_and_infinities():
+    df = pd.DataFrame({
+        "single": [np.nan, 3.0, np.nan],
+        "empty": [np.nan, np.nan, np.nan],
+        "unbounded": [1.0, np.inf, 2.0],
+    })
+
+    result = run_analyst_pipeline(df, include_data=False)
+
+    json.dumps(result, allow_nan=False)
+    summary = result["statistics"]["numeric_summary"]
+    assert (summary["single"]["mean"], summary["single"]["std"]) == (3.0, None)
+    assert all(summary["empty"][k] is None for k in ("mean", "std", "min", "max", "p25", "p50", "p75"))
+    assert (summary["unbounded"]["mean"], summary["unbounded"]["max"], summary["unbounded"]["min"]) == (None, None, 1.0)
+
+
+def test_quantiles_stay_within_min_and_max():
+    df = pd.DataFrame({"value": [0.1000003, 0.1000007, 0.1000011]})
+
+    summary = run_analyst_pipeline(df, include_data=False)["statistics"]["numeric_summary"]["value"]
+
+    assert summary["min"] <= summary["p25"] <= summary["p50"] <= summary["p75"] <= summary["max"]
+
+
+def test_full_chunked_and_delta_analyses_match(audit, monkeypatch):
+    df = make_frame(3000)
+    df["Unit_Cost"] = np.random.default_rng(1).normal(12.5, 3, len(df)).round(3)
+
+    def analysis(result: dict) -> dict:
+        # Everything except how the rows were read
+        return {k: v for k, v in result["analysis"].items() if k != "ingest"}
+
+    full = analysis(audit(df, streaming=False))
+    base = audit(df.iloc[:2000], streaming=False)
+    delta = analysis(audit(df.iloc[2000:], streaming=False, base_report_id=base["id"]))
+    monkeypatch.setattr(ingest, "iter_chunks", functools.partial(ingest.iter_chunks, chunk_rows=700))
+    chunked = analysis(audit(df, streaming=True))
+
+    assert chunked == full
+    assert delta == full
+
+
+def test_column_turning_to_text_after_first_chunk(audit, monkeypatch):
+    # Numeric codes until a text value shows up past the first chunk (and the dtype sample)
+    codes = [str(i % 100 + 1) for i in range(30_000)]
+    codes[25_000] = "x12"
+    df = pd.DataFrame({"Code": codes, "Amount": np.arange(30_000) % 7})
+
+    full = audit(df, streaming=False)["analysis"]["statistics"]
+    base = audit(df.iloc[:20_000], streaming=False)
+    delta = audit(df.iloc[20_000:], streaming=False, base_report_id=base["id"])["analysis"]["statistics"]
+    monkeypatch.setattr(ingest, "iter_chunks", functools.partial(ingest.iter_chunks, chunk_rows=10_000))
+    chunked = audit(df, streaming=True)["analysis"]["statistics"]
+
+    assert full["distinct_counts"]["Code"] == 101
+    assert chunked["distinct_counts"] == full["distinct_counts"]
+    assert delta["distinct_counts"] == full["distinct_counts"]
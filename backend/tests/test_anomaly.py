@@ -0,0 +1,138 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents import anomaly
+from agents.anomaly import AnomalyDetector
+from agents.sketches import QuantileSketch
+
+HIGH_ROWS = [17, 1234, 2999]
+LOW_ROWS = [404, 2100]
+
+
+def _frame(rows: int = 3000, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    revenue = rng.normal(1000, 50, rows).round(2)
+    revenue[HIGH_ROWS] = [5000.0, 4000.0, 3000.0]
+    revenue[LOW_ROWS] = [-4000.0, -1500.0]
+    hours = rng.normal(8, 1, rows)
+    hours[rng.random(rows) < 0.02] = np.nan
+    return pd.DataFrame({"Revenue": revenue, "Hours": hours})
+
+
+def _detect(df: pd.DataFrame, chunk_rows: int = None, cfg: dict = None):
+    detector = AnomalyDetector(cfg)
+    sketches = {c: QuantileSketch() for c in df.columns}
+    step = chunk_rows or len(df)
+    for start in range(0, len(df), step):
+        chunk = df.iloc[start:start + step]
+        detector.update(chunk, list(df.columns), start)
+        for c in df.columns:
+            sketches[c].update(chunk[c].to_numpy(dtype="float64"))
+    return detector, sketches
+
+
+def _expected_counts(values: np.ndarray, entry: dict) -> tuple:
+    values = values[np.isfinite(values)]
+    iqr = np.count_nonzero((values < entry["lower_fence"]) | (values > entry["upper_fence"]))
+    z = np.abs(values - entry["median"]) / (entry["iqr"] / 1.349)
+    return int(iqr), int(np.count_nonzero(z > anomaly.DEFAULTS["z_threshold"]))
+
+
+def test_outlier_counts_on_planted_outliers():
+    df = _frame()
+    detector, sketches = _detect(df)
+
+    result = detector.result(sketches)
+
+    for col in df.columns:
+        entry = result["columns"][col]
+        assert not entry["approximate"]
+        assert (entry["iqr_outliers"], entry["zscore_outliers"]) == _expected_counts(df[col].to_numpy(), entry)
+    revenue = result["columns"]["Revenue"]
+    assert revenue["zscore_outliers"] >= len(HIGH_ROWS + LOW_ROWS)
+    assert result["total_iqr_outliers"] == sum(e["iqr_outliers"] for e in result["columns"].values())
+    # The most extreme values lead, high and low alike
+    assert [r["row"] for r in revenue["top_rows"][:5]] == [404, 17, 1234, 2100, 2999]
+    assert revenue["top_rows"][0]["robust_z"] < 0 < revenue["top_rows"][1]["robust_z"]
+
+
+def test_counts_beyond_the_tails_are_approximate(monkeypatch):
+    monkeypatch.setattr(anomaly, "TAIL_SIZE", 2)
+    df = _frame()
+    detector, sketches = _detect(df)
+
+    entry = detector.result(sketches)["columns"]["Revenue"]
+
+    assert entry["approximate"]
+    exact_iqr, _ = _expected_counts(df["Revenue"].to_numpy(), entry)
+    assert entry["iqr_outliers"] == pytest.approx(exact_iqr, abs=2)
+    # The tails still hold the two most extreme rows on each side
+    assert {r["row"] for r in entry["top_rows"]} == {17, 1234, 404, 2100}
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 700, 1000])
+def test_top_rows_count_across_chunk_offsets(chunk_rows):
+    df = _frame()
+    detector, sketches = _detect(df)
+    full = detector.result(sketches)
+
+    detector, sketches = _detect(df, chunk_rows=chunk_rows)
+    chunked = detector.result(sketches)
+
+    assert chunked == full
+    rows = {r["row"] for r in chunked["columns"]["Revenue"]["top_rows"]}
+    assert set(HIGH_ROWS + LOW_ROWS) <= rows
+    assert all(df[r["column"]].iloc[r["row"]] == r["value"] for r in chunked["top_rows"])
+
+
+def test_isolation_forest_is_off_by_default():
+    detector, sketches = _detect(_frame())
+
+    assert "isolation_forest" not in detector.result(sketches)
+    assert detector.forest is None and detector.fit_rows == 0
+
+
+def test_isolation_forest_fits_on_leading_rows_only(monkeypatch):
+    monkeypatch.setattr(anomaly, "FIT_ROWS", 1000)
+    cfg = {"anomaly": {"isolation_forest": True, "top_n": 5}}
+    df = _frame()
+
+    detector, sketches = _detect(df, chunk_rows=700, cfg=cfg)
+
+    assert detector.fit_rows == 1000 and detector.fit_buffer == []
+    forest = detector.result(sketches)["isolation_forest"]
+    assert forest["columns"] == ["Revenue", "Hours"]
+    assert forest["scored_rows"] == len(df)
+    # The most extreme planted rows lead, inside and past the fitted ones
+    assert {17, 404, 1234} <= {r["row"] for r in forest["top_rows"]}
+    assert forest == _detect(df, cfg=cfg)[0].result(sketches)["isolation_forest"]
+
+
+def test_isolation_forest_fits_small_files_at_the_end():
+    cfg = {"anomaly": {"isolation_forest": True}}
+    df = _frame().iloc[:500]
+
+    detector, sketches = _detect(df, chunk_rows=200, cfg=cfg)
+
+    assert detector.forest is None and detector.fit_rows == 500
+    assert detector.result(sketches)["isolation_forest"]["scored_rows"] == 500
+
+
+def test_state_round_trip(monkeypatch):
+    monkeypatch.setattr(anomaly, "FIT_ROWS", 1000)
+    cfg = {"anomaly": {"isolation_forest": True}}
+    df = _frame()
+    detector, sketches = _detect(df, cfg=cfg)
+    full = detector.result(sketches)
+
+    base, _ = _detect(df.iloc[:1800], cfg=cfg)
+    state = json.loads(json.dumps(base.to_state()))
+    resumed = AnomalyDetector.from_state(state, cfg)
+    for start in range(1800, len(df), 600):
+        resumed.update(df.iloc[start:start + 600], list(df.columns), start)
+
+    assert resumed.result(sketches) == full
+    assert AnomalyDetector.from_state(json.loads(json.dumps(resumed.to_state())), cfg).result(sketches) == full
@@ -0,0 +1,92 @@
+import pytest
+
+from utils import catalog
+
+
+def _seed(count: int):
+    for i in range(count):
+        catalog.upsert_report({
+            "id": f"r{i:03d}",
+            "filename": f"file_{i % 4}.csv",
+            # Repeated timestamps and scores: ties are broken by id
+            "timestamp": f"2024-01-{i // 3 + 1:02d}T00:00:00",
+            "analysis": {"quality_analysis": {"score": i % 7 * 10}},
+            "is_certified": i % 2 == 0,
+        })
+
+
+def _all_pages(**kwargs) -> list:
+    items, cursor, pages = [], None, 0
+    while True:
+        page = catalog.list_reports(cursor=cursor, **kwargs)
+        items.extend(page["items"])
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return items, pages
+
+
+@pytest.mark.parametrize("sort", catalog.SORTABLE_FIELDS)
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_pages_cover_every_report_once_in_order(workdir, sort, order):
+    _seed(23)
+    items, pages = _all_pages(limit=5, sort=sort, order=order)
+
+    assert pages == 5
+    assert len(items) == 23
+    assert len({r["id"] for r in items}) == 23
+    keys = [(r[sort], r["id"]) for r in items]
+    assert keys == sorted(keys, reverse=order == "desc")
+
+
+def test_last_full_page_has_no_cursor(workdir):
+    _seed(10)
+    page = catalog.list_reports(limit=10)
+    assert len(page["items"]) == 10
+    assert page["next_cursor"] is None
+
+
+def test_filters_apply_across_pages(workdir):
+    _seed(30)
+    items, _ = _all_pages(limit=4, certified=True, min_score=20, max_score=50, filename="file_")
+
+    expected = {
+        f"r{i:03d}" for i in range(30)
+        if i % 2 == 0 and 20 <= i % 7 * 10 <= 50
+    }
+    assert {r["id"] for r in items} == expected
+    assert all(r["is_certified"] for r in items)
+
+
+def test_invalid_arguments(workdir):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        catalog.list_reports(cursor="not-a-cursor")
+    with pytest.raises(ValueError):
+        catalog.list_reports(sort="is_certified")
+    with pytest.raises(ValueError):
+        catalog.list_reports(order="sideways")
+
+
+def test_existing_catalog_learns_delta_bases(workdir):
+    import json
+
+    from utils import report_store
+
+    # A catalog from before base_report_id was recorded
+    with catalog.connect() as conn:
+        conn.execute("DROP TABLE reports")
+        conn.execute(
+            "CREATE TABLE reports (id TEXT PRIMARY KEY, filename TEXT NOT NULL, timestamp TEXT NOT NULL, "
+            "quality_score INTEGER NOT NULL DEFAULT 0, is_certified INTEGER NOT NULL DEFAULT 0, "
+            "report_hash TEXT, content_key TEXT)"
+        )
+        for report_id in ("base", "delta"):
+            conn.execute("INSERT INTO reports (id, filename, timestamp) VALUES (?, 'data.csv', '2024-01-01')", (report_id,))
+    for data in ({"id": "base"}, {"id": "delta", "base_report_id": "base"}):
+        with open(report_store.metadata_path(data["id"]), "w") as f:
+            json.dump(data, f)
+
+    catalog.init_catalog(report_store.REPORTS_DIR)
+
+    assert catalog.dependent_reports("base") == ["delta"]
+    assert catalog.dependent_reports("delta") == []
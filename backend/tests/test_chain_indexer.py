@@ -0,0 +1,119 @@
+import hashlib
+
+import pytest
+
+from utils import batches, catalog, chain_indexer, report_store
+
+CONTRACT = "0x" + "c0" * 20
+AUDITOR = "ab" * 20
+REPORT_CERTIFIED_V2 = "0x9727978ac78e23cdff19cfbf7c1e08acf264ac1d584594cb86a6a7ea796e94ac"
+BATCH_CERTIFIED_V2 = "0xee23c1dc18406a2c788376056066756639c8393a56574e510e1c7910e0b875ab"
+
+
+def _word(value: int) -> str:
+    return f"{value:064x}"
+
+
+class FakeChain:
+    """Just enough JSON-RPC for the indexer: block hashes by number and certification logs."""
+
+    def __init__(self, length: int):
+        self.blocks = [f"0x{'0' * 60}{n:04x}" for n in range(length)]
+        self.logs = []
+
+    def fork(self, from_block: int):
+        for n in range(from_block, len(self.blocks)):
+            self.blocks[n] = "0x" + "f" * 60 + f"{n:04x}"
+        self.logs = [log for log in self.logs if int(log["blockNumber"], 16) < from_block]
+
+    def log(self, block: int, tx_hash: str, topics: list, data: str):
+        self.logs.append({
+            "address": CONTRACT, "topics": topics, "data": "0x" + data, "transactionHash": tx_hash,
+            "logIndex": "0x0", "blockNumber": hex(block), "blockHash": self.blocks[block],
+        })
+
+    def certify(self, block: int, tx_hash: str, report_hash: str):
+        self.log(block, tx_hash, [REPORT_CERTIFIED_V2, "0x" + _word(1), "0x" + report_hash, "0x" + "0" * 24 + AUDITOR],
+                 _word(1700000000))
+
+    def certify_batch(self, block: int, tx_hash: str, merkle_root: str, count: int):
+        self.log(block, tx_hash, [BATCH_CERTIFIED_V2, "0x" + _word(1), merkle_root, "0x" + "0" * 24 + AUDITOR],
+                 _word(count))
+
+    def rpc(self, method, *params):
+        if method == "eth_blockNumber":
+            return hex(len(self.blocks) - 1)
+        if method == "eth_getBlockByNumber":
+            n = int(params[0], 16)
+            return {"hash": self.blocks[n]} if n < len(self.blocks) else None
+        if method == "eth_getLogs":
+            start, end = int(params[0]["fromBlock"], 16), int(params[0]["toBlock"], 16)
+            return [log for log in self.logs if start <= int(log["blockNumber"], 16) <= end]
+        raise AssertionError(method)
+
+
+@pytest.fixture
+def chain(workdir, monkeypatch):
+    fake = FakeChain(6)
+    monkeypatch.setattr(chain_indexer, "rpc", fake.rpc)
+    monkeypatch.setattr(chain_indexer, "CONTRACT_ADDRESSES", CONTRACT)
+    monkeypatch.setattr(chain_indexer, "CONFIRMATIONS", 0)
+    return fake
+
+
+def _save(report_id: str) -> str:
+    report_hash = hashlib.sha256(report_id.encode()).hexdigest()
+    data = {"id": report_id, "filename": f"{report_id}.csv", "timestamp": "2024-01-01T00:00:00",
+            "report_hash_preview": report_hash, "is_certified": False}
+    report_store.save_report(report_id, data)
+    catalog.upsert_report(data)
+    return report_hash
+
+
+def _certified() -> dict:
+    with catalog.connect() as conn:
+        return {r["id"]: bool(r["is_certified"]) for r in conn.execute("SELECT id, is_certified FROM reports")}
+
+
+def test_reorg_revokes_rolled_back_certifications(chain):
+    direct, in_batch = _save("direct"), [_save("b1"), _save("b2")]
+    batch = batches.create_batch(["b1", "b2"])
+    chain.certify(3, "0xaaa", direct)
+    chain.certify_batch(4, "0xbbb", batch["merkle_root"], 2)
+
+    indexer = chain_indexer.ChainIndexer(page_blocks=4)
+    assert indexer.sync()["indexed"] == 2
+    assert _certified() == {"direct": True, "b1": True, "b2": True}
+    assert batches.get_batch(batch["batch_id"])["tx_hash"] == "0xbbb"
+
+    # Blocks 3+ are replaced: the direct certification is mined again, the batch one is dropped
+    chain.fork(3)
+    chain.certify(4, "0xaaa", direct)
+    summary = indexer.sync()
+
+    assert summary["rewound_to"] == 2
+    assert _certified() == {"direct": True, "b1": False, "b2": False}
+    assert not batches.get_batch(batch["batch_id"])["anchored"]
+    metadata = report_store.load_metadata("b1")
+    assert metadata["is_certified"] is False
+    assert metadata["batch_id"] is None
+    assert chain_indexer.lookup(in_batch[0]) == []
+    assert [r["block_number"] for r in chain_indexer.lookup(direct)] == [4]
+
+    with catalog.connect() as conn:
+        events = [(r["event"], r["report_id"]) for r in conn.execute(
+            "SELECT event, report_id FROM events WHERE event != 'saved' ORDER BY seq")]
+    assert ("uncertified", "direct") in events
+    assert events[-1] == ("certified", "direct")
+
+
+def test_no_reorg_keeps_the_index(chain):
+    report_hash = _save("r")
+    chain.certify(2, "0xaaa", report_hash)
+    indexer = chain_indexer.ChainIndexer()
+    indexer.sync()
+    summary = indexer.sync()
+
+    assert summary["rewound_to"] is None
+    assert summary["indexed"] == 0
+    assert _certified() == {"r": True}
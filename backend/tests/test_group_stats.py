@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.group_stats import MAX_GROUP_VALUES, GroupStatsAccumulator
+
+
+def _frame(rows: int = 600, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    revenue = rng.normal(1000, 200, rows).round(2)
+    revenue[rng.random(rows) < 0.05] = np.nan
+    return pd.DataFrame({
+        "Department": rng.choice(["Ops", "Sales", "HR"], rows),
+        "Month": rng.choice(["2024-01", "2024-02", "2024-03"], rows),
+        "Revenue": revenue,
+        "Units": rng.integers(0, 50, rows),
+    })
+
+
+def _run(df: pd.DataFrame, chunk_rows: int = None, cfg: dict = None) -> dict:
+    acc = GroupStatsAccumulator(cfg)
+    numeric = {"Revenue", "Units"} & set(df.columns)
+    for start in range(0, len(df), chunk_rows or len(df)):
+        acc.update(df.iloc[start:start + (chunk_rows or len(df))], numeric)
+    return acc.result()
+
+
+def test_group_figures_match_pandas():
+    df = _frame()
+    result = _run(df)
+
+    expected = df.groupby("Department")[["Revenue", "Units"]].agg(["count", "sum", "mean"])
+    groups = result["dimensions"]["Department"]
+    assert sorted(groups) == ["HR", "Ops", "Sales"]
+    for dept, entry in groups.items():
+        assert entry["rows"] == int((df["Department"] == dept).sum())
+        for col in ("Revenue", "Units"):
+            figures = entry["columns"][col]
+            assert figures["count"] == expected.loc[dept, (col, "count")]
+            assert figures["sum"] == pytest.approx(expected.loc[dept, (col, "sum")], rel=1e-12)
+            assert figures["mean"] == pytest.approx(expected.loc[dept, (col, "mean")], rel=1e-12)
+
+    by_month = df.groupby("Month")["Revenue"].mean()
+    assert result["periods"] == ["2024-01", "2024-02", "2024-03"]
+    for month, mean in by_month.items():
+        assert result["by_period"][month]["columns"]["Revenue"]["mean"] == pytest.approx(mean, rel=1e-12)
+    per_period = df[df["Department"] == "Ops"].groupby("Month")["Units"].mean()
+    for month, mean in per_period.items():
+        assert groups["Ops"]["periods"][month]["columns"]["Units"]["mean"] == pytest.approx(mean, rel=1e-12)
+
+
+def test_month_over_month_changes():
+    df = pd.DataFrame({
+        "Department": ["Ops"] * 5,
+        "Month": ["2024-01", "2024-01", "2024-02", "2024-04", "2024-04"],
+        "Revenue": [100.0, 300.0, 250.0, np.nan, np.nan],
+        "Units": [1, 3, 4, 8, 10],
+    })
+
+    by_period = _run(df)["by_period"]
+
+    assert list(by_period) == ["2024-01", "2024-02", "2024-04"]
+    assert by_period["2024-01"]["columns"]["Units"] == {"count": 2, "mean": 2.0, "delta": None, "pct_change": None}
+    assert by_period["2024-02"]["columns"]["Units"] == {"count": 1, "mean": 4.0, "delta": 2.0, "pct_change": 100.0}
+    assert by_period["2024-04"]["columns"]["Units"] == {"count": 2, "mean": 9.0, "delta": 5.0, "pct_change": 125.0}
+    # A period without values has no mean, and the next change is taken from the last one that had
+    assert by_period["2024-04"]["columns"]["Revenue"] == {"count": 0, "mean": None, "delta": None, "pct_change": None}
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 7, 250])
+def test_chunked_and_resumed_match_a_single_pass(chunk_rows):
+    df = _frame()
+    full = _run(df)
+
+    assert _run(df, chunk_rows=chunk_rows) == full
+
+    acc = GroupStatsAccumulator()
+    acc.update(df.iloc[:200], {"Revenue", "Units"})
+    resumed = GroupStatsAccumulator.from_state(acc.to_state())
+    resumed.update(df.iloc[200:], {"Revenue", "Units"})
+    assert resumed.result() == full
+
+
+def test_full_precision_floats_agree_to_rounding():
+    df = _frame()
+    df["Revenue"] = df["Revenue"] + np.random.default_rng(1).random(len(df)) * 1e-7
+
+    full, chunked = _run(df), _run(df, chunk_rows=7)
+
+    for dept, entry in full["dimensions"]["Department"].items():
+        other = chunked["dimensions"]["Department"][dept]["columns"]["Revenue"]
+        assert other["sum"] == pytest.approx(entry["columns"]["Revenue"]["sum"], rel=1e-12)
+
+
+def test_dimension_with_too_many_values_is_dropped():
+    df = _frame(rows=400)
+    # Few customers in the first chunk, one per row after it
+    df["Customer"] = [f"c{i % 5}" if i < 100 else f"c{i}" for i in range(len(df))]
+    assert df["Customer"].nunique() > MAX_GROUP_VALUES
+
+    result = _run(df, chunk_rows=100)
+
+    assert set(result["dimensions"]) == {"Department"}
+    assert result == _run(df.drop(columns="Customer"))
+
+
+def test_last_dimension_dropped_keeps_period_totals():
+    df = _frame(rows=400).drop(columns="Department")
+    df["Customer"] = [f"c{i % 5}" if i < 100 else f"c{i}" for i in range(len(df))]
+
+    result = _run(df, chunk_rows=100)
+
+    assert result["dimensions"] == {}
+    by_month = df.groupby("Month")["Units"].agg(["count", "mean"])
+    for month, row in by_month.iterrows():
+        figures = result["by_period"][month]["columns"]["Units"]
+        assert (figures["count"], figures["mean"]) == (row["count"], pytest.approx(row["mean"], rel=1e-12))
+
+
+def test_configured_dimensions_and_period():
+    df = _frame()
+    df["Region"] = np.where(df.index % 2 == 0, "North", "South")
+    df["Booked"] = pd.to_datetime(df["Month"]) + pd.Timedelta(days=40)
+
+    result = _run(df, cfg={"group_by": ["Region"], "period_column": "Booked"})
+
+    assert list(result["dimensions"]) == ["Region"]
+    assert result["period_column"] == "Booked"
+    assert result["periods"] == ["2024-02", "2024-03", "2024-04"]
+    assert result["dimensions"]["Region"]["North"]["rows"] == len(df) // 2
+
+
+def test_no_period_groups_all_rows():
+    df = _frame().drop(columns="Month")
+
+    result = _run(df)
+
+    assert result["periods"] == [] and result["by_period"] == {}
+    assert sum(e["rows"] for e in result["dimensions"]["Department"].values()) == len(df)
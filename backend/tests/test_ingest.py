@@ -0,0 +1,120 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from utils import ingest
+from utils.ingest import _narrowest, compact_frame, infer_dtypes
+
+
+def _same_values(out: pd.DataFrame, original: pd.DataFrame):
+    assert list(out.columns) == list(original.columns)
+    for col in original.columns:
+        assert out[col].astype(object).tolist() == original[col].astype(object).tolist(), col
+
+
+@pytest.mark.parametrize("values,expected", [
+    ([0, 1, -128, 127], np.int8),
+    ([0, 40_000, -5], np.int32),
+    ([-2 ** 31, 2 ** 31 - 1], np.int32),
+    ([0, 2 ** 31], None),
+])
+def test_integers_take_the_narrowest_width_that_fits(values, expected):
+    s = pd.Series(values, dtype="int64")
+
+    target = _narrowest(s)
+
+    assert target == (None if expected is None else np.dtype(expected))
+    assert _narrowest(s.astype("int64[pyarrow]")) == (None if expected is None else pd.ArrowDtype(pa.from_numpy_dtype(expected)))
+    if target is not None:
+        assert s.astype(target).astype("int64").tolist() == values
+
+
+@pytest.mark.parametrize("values,narrowed", [
+    ([0.5, 1.25, np.nan, -3.0], True),
+    ([0.1, 0.2], False),
+    ([16_777_217.0], False),
+    ([1e39], False),
+])
+def test_floats_are_narrowed_only_when_exact(values, narrowed):
+    s = pd.Series(values, dtype="float64")
+
+    target = _narrowest(s)
+
+    assert target == (np.dtype(np.float32) if narrowed else None)
+    df = pd.DataFrame({"x": s})
+    out = compact_frame(df)
+    np.testing.assert_array_equal(out["x"].to_numpy(dtype="float64"), s.to_numpy())
+
+
+def test_low_cardinality_text_becomes_categorical():
+    rows = 200
+    df = pd.DataFrame({
+        "Department": np.array(["Ops", "Sales", None, "HR"], dtype=object)[np.arange(rows) % 4],
+        "Invoice": [f"INV-{i}" for i in range(rows)],
+        "Booked": pd.date_range("2024-01-01", periods=rows).strftime("%Y-%m-%d"),
+        "Status": ["open", "closed"] * (rows // 2),
+    })
+
+    plan = infer_dtypes(df, keep_columns=["Status"])
+    out = compact_frame(df, plan["categorical"], keep_columns=["Status"])
+
+    assert plan == {"categorical": ["Department"], "dates": ["Booked"]}
+    assert isinstance(out["Department"].dtype, pd.CategoricalDtype)
+    assert out["Invoice"].dtype == df["Invoice"].dtype
+    # Quality rules see the column exactly as parsed
+    assert out["Status"].dtype == df["Status"].dtype
+    _same_values(out, df)
+
+
+@pytest.fixture
+def late_values(monkeypatch):
+    """CSV bytes whose columns change past the dtype sample, and the values they hold."""
+    monkeypatch.setattr(ingest, "SAMPLE_ROWS", 100)
+    rows = 300
+    df = pd.DataFrame({
+        "Code": np.arange(rows) % 5,
+        "Amount": (np.arange(rows) % 8) * 0.25,
+        "Department": np.array(["Ops", "Sales"], dtype=object)[np.arange(rows) % 2],
+        "Booked": pd.date_range("2024-01-01", periods=rows).strftime("%Y-%m-%d"),
+    })
+    df["Code"] = df["Code"].astype(object)
+    df.loc[250, "Code"] = "X-12"
+    df.loc[260, "Amount"] = 0.1
+    df.loc[270, "Department"] = "Finance"
+    df.loc[280, "Booked"] = "not a date"
+    body = df.to_csv(index=False).encode()
+    return body, pd.read_csv(io.BytesIO(body))
+
+
+@pytest.mark.parametrize("engine", ["c", "pyarrow"])
+def test_values_past_the_sample_survive_a_full_read(late_values, monkeypatch, engine):
+    body, original = late_values
+    monkeypatch.setattr(ingest, "CSV_ENGINE", engine)
+    info = {}
+
+    out = ingest.read_full(io.BytesIO(body), "data.csv", info)
+
+    assert info["rows"] == len(original) and info["baseline_estimated"]
+    assert isinstance(out["Department"].dtype, pd.CategoricalDtype)
+    _same_values(out, original)
+
+
+def test_values_past_the_sample_survive_chunked_reads(late_values):
+    body, original = late_values
+
+    chunks = list(ingest.iter_chunks(io.BytesIO(body), "data.csv", chunk_rows=100))
+
+    # Each chunk is narrowed on its own values: early chunks compact, the last one keeps what it needs
+    assert chunks[0]["Amount"].dtype == np.float32
+    assert chunks[0]["Booked"].dtype.kind == "M"
+    assert chunks[-1]["Amount"].dtype == np.float64
+    # Read as text from the chunk holding "X-12" on
+    assert chunks[0]["Code"].dtype == np.int8 and chunks[-1]["Code"].dtype == original["Code"].dtype
+    out = pd.concat(chunks, ignore_index=True)
+    assert out["Booked"].iloc[:200].tolist() == pd.to_datetime(original["Booked"].iloc[:200]).tolist()
+    assert out["Booked"].iloc[200:].tolist() == original["Booked"].iloc[200:].tolist()
+    _same_values(out.drop(columns="Booked").astype(str), original.drop(columns="Booked").astype(str))
+
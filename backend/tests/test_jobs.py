@@ -0,0 +1,94 @@
+import io
+import threading
+import time
+
+from utils import jobs
+
+STAGES = ("analyst", "advisor")
+
+
+def _wait_for(manager, job_id: str, status: str, timeout: float = 5.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = manager.get(job_id)
+        if job["status"] == status:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} is {manager.get(job_id)['status']}, expected {status}")
+
+
+def _runner(calls: list, gate: threading.Event = None):
+    def run(fileobj, filename, options, on_stage):
+        if gate is not None:
+            gate.wait(5)
+        for name in STAGES:
+            on_stage(name, "running")
+            on_stage(name, "done")
+        calls.append((filename, fileobj.read(), options))
+        return {"id": f"report-of-{filename}"}
+    return run
+
+
+def test_job_runs_to_completion(workdir):
+    calls = []
+    manager = jobs.JobManager(_runner(calls), STAGES, workers=1)
+    manager.start()
+    try:
+        job_id = manager.submit(io.BytesIO(b"a,b\n1,2\n"), "data.csv", {"force": True})
+        job = _wait_for(manager, job_id, "done")
+    finally:
+        manager.stop()
+
+    assert job["result"] == {"id": "report-of-data.csv"}
+    assert job["progress"] == 1.0
+    assert all(s["status"] == "done" for s in job["stages"].values())
+    filename, body, options = calls[0]
+    assert (filename, body, options["force"]) == ("data.csv", b"a,b\n1,2\n", True)
+    assert len(options["content_sha256"]) == 64
+    assert list((workdir / jobs.JOBS_DIR).iterdir()) == []
+
+
+def test_interrupted_jobs_resume_on_start(workdir):
+    # No workers: the jobs stay persisted, one of them as if a worker died mid-run
+    crashed = jobs.JobManager(_runner([]), STAGES, workers=0)
+    crashed.start()
+    running = crashed.submit(io.BytesIO(b"x\n1\n"), "running.csv")
+    queued = crashed.submit(io.BytesIO(b"x\n2\n"), "queued.csv")
+    crashed._update(running, status="running")
+
+    calls = []
+    manager = jobs.JobManager(_runner(calls), STAGES, workers=1)
+    manager.start()
+    try:
+        for job_id in (running, queued):
+            _wait_for(manager, job_id, "done")
+    finally:
+        manager.stop()
+
+    assert sorted(c[0] for c in calls) == ["queued.csv", "running.csv"]
+
+
+def test_stop_with_a_full_queue_leaves_jobs_queued(workdir):
+    gate, calls = threading.Event(), []
+    manager = jobs.JobManager(_runner(calls, gate), STAGES, workers=1, queue_size=1)
+    manager.start()
+    first = manager.submit(io.BytesIO(b"x\n1\n"), "first.csv")
+    _wait_for(manager, first, "running")
+    second = manager.submit(io.BytesIO(b"x\n2\n"), "second.csv")
+    assert manager._queue.full()
+
+    stopper = threading.Thread(target=manager.stop)
+    stopper.start()
+    gate.set()
+    stopper.join(timeout=5)
+
+    assert not stopper.is_alive()
+    assert manager.get(first)["status"] == "done"
+    assert manager.get(second)["status"] == "queued"
+
+    resumed = jobs.JobManager(_runner(calls), STAGES, workers=1)
+    resumed.start()
+    try:
+        _wait_for(resumed, second, "done")
+    finally:
+        resumed.stop()
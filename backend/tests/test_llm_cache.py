@@ -0,0 +1,118 @@
+import types
+
+import pytest
+
+from agents import advisor_simple
+from benchmarks.llm_stub import REPORT, start_stub
+from utils import llm_cache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def cache(workdir, monkeypatch):
+    """Empty cache in the test catalog, with fresh metrics and a clock the test moves."""
+    clock = Clock()
+    monkeypatch.setattr(llm_cache, "_initialized", False)
+    monkeypatch.setattr(llm_cache, "_metrics", {"hits": 0, "misses": 0, "evictions": 0})
+    monkeypatch.setattr(llm_cache, "time", types.SimpleNamespace(time=clock.time))
+    return clock
+
+
+@pytest.fixture
+def stub(cache, monkeypatch):
+    """The advisor talking to the local LLM stub instead of OpenAI."""
+    server, base_url = start_stub(latency_ms=0)
+    monkeypatch.setenv("OPENAI_BASE_URL", base_url)
+    monkeypatch.setenv("OPENAI_API_KEY", "stub")
+    advisor_simple.get_llm.cache_clear()
+    yield server
+    advisor_simple.get_llm.cache_clear()
+    server.shutdown()
+
+
+def _analysis(score: int = 80, worst_row: int = 17) -> dict:
+    return {
+        "statistics": {"rows": 3000},
+        "quality_analysis": {"score": score, "issues": ["Revenue has 12 missing values"]},
+        "anomalies": {"columns": {"Revenue": {
+            "iqr_outliers": 4, "lower_fence": 800.0, "upper_fence": 1200.0,
+            "top_rows": [{"row": worst_row, "value": 5000.0, "robust_z": 81.2}],
+        }}},
+    }
+
+
+def test_hits_and_misses(stub):
+    assert advisor_simple.run_advisor_agent(_analysis()) == REPORT
+    streamed = []
+    assert advisor_simple.run_advisor_agent(_analysis(), on_token=streamed.append) == REPORT
+
+    assert stub.config.requests == 1
+    # A cached response arrives as one piece
+    assert streamed == [REPORT]
+    assert llm_cache.stats() == {"hits": 1, "misses": 1, "evictions": 0, "entries": 1, "hit_ratio": 0.5}
+
+
+def test_key_leaves_out_row_numbers(stub):
+    advisor_simple.run_advisor_agent(_analysis(worst_row=17))
+    advisor_simple.run_advisor_agent(_analysis(worst_row=2999))
+    advisor_simple.run_advisor_agent(_analysis(score=79))
+
+    # Same figures at other rows share the entry; a different score does not
+    assert stub.config.requests == 2
+    assert "worst row 2999" in advisor_simple.build_prompt(_analysis(worst_row=2999))
+    assert "2999" not in advisor_simple.build_prompt(_analysis(worst_row=2999), row_ids=False)
+
+
+def test_bypass_skips_the_lookup_but_refreshes_the_entry(stub):
+    advisor_simple.run_advisor_agent(_analysis(), use_cache=False)
+    advisor_simple.run_advisor_agent(_analysis(), use_cache=False)
+
+    assert stub.config.requests == 2
+    assert llm_cache.stats()["hits"] + llm_cache.stats()["misses"] == 0
+
+    advisor_simple.run_advisor_agent(_analysis())
+    assert stub.config.requests == 2
+    assert llm_cache.stats()["hits"] == 1
+
+
+def test_entries_expire_after_the_ttl(cache, monkeypatch):
+    monkeypatch.setattr(llm_cache, "TTL_SECONDS", 60)
+    llm_cache.put("k", "model", "value")
+
+    cache.now += 60
+    assert llm_cache.get("k") == "value"
+    cache.now += 1
+    assert llm_cache.get("k") is None
+
+    assert llm_cache.stats() == {"hits": 1, "misses": 1, "evictions": 1, "entries": 0, "hit_ratio": 0.5}
+
+
+def test_least_recently_used_entry_is_evicted(cache, monkeypatch):
+    monkeypatch.setattr(llm_cache, "MAX_ENTRIES", 2)
+    for key in ("a", "b"):
+        llm_cache.put(key, "model", key)
+        cache.now += 1
+    # Reading "a" makes "b" the least recently used
+    assert llm_cache.get("a") == "a"
+    cache.now += 1
+
+    llm_cache.put("c", "model", "c")
+
+    assert [llm_cache.get(key) for key in ("a", "b", "c")] == ["a", None, "c"]
+    assert llm_cache.stats()["evictions"] == 1
+    assert llm_cache.stats()["entries"] == 2
+
+
+def test_key_covers_the_model_parameters():
+    key = llm_cache.cache_key("prompt", model="m", temperature=0.7)
+
+    assert key == llm_cache.cache_key("prompt", temperature=0.7, model="m")
+    assert key != llm_cache.cache_key("prompt", model="m", temperature=0.2)
+    assert key != llm_cache.cache_key("prompt ", model="m", temperature=0.7)
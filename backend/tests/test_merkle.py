@@ -0,0 +1,78 @@
+import hashlib
+
+import pytest
+
+from utils import merkle
+
+
+def _hashes(count: int) -> list:
+    return [hashlib.sha256(str(i).encode()).hexdigest() for i in range(count)]
+
+
+@pytest.mark.parametrize("count", [1, 2, 3, 5, 6, 7, 8, 9, 13])
+def test_every_leaf_proves_against_the_root(count):
+    hashes = _hashes(count)
+    levels = merkle.build_levels(hashes)
+    root = merkle.merkle_root(hashes)
+
+    assert len(levels[-1]) == 1
+    for i, h in enumerate(hashes):
+        proof = merkle.inclusion_proof(levels, i)
+        assert merkle.verify_proof(h, proof, root)
+        assert merkle.verify_proof("0x" + h.upper(), proof, root)
+
+
+def test_odd_node_is_carried_up_unchanged():
+    a, b, c = _hashes(3)
+    levels = merkle.build_levels([a, b, c])
+
+    assert levels[1] == [merkle.node_hash(merkle.leaf_hash(a), merkle.leaf_hash(b)), merkle.leaf_hash(c)]
+    # The carried leaf has no sibling on the first level
+    assert merkle.inclusion_proof(levels, 2) == [merkle.to_hex(levels[1][0])]
+    assert merkle.merkle_root([a]) == merkle.to_hex(merkle.leaf_hash(a))
+
+
+def test_pairs_are_sorted():
+    a, b = _hashes(2)
+    assert merkle.merkle_root([a, b]) == merkle.merkle_root([b, a])
+
+
+def test_wrong_proofs_fail():
+    hashes = _hashes(5)
+    levels = merkle.build_levels(hashes)
+    root = merkle.merkle_root(hashes)
+    proof = merkle.inclusion_proof(levels, 1)
+
+    assert not merkle.verify_proof(hashes[2], proof, root)
+    assert not merkle.verify_proof(_hashes(6)[5], proof, root)
+    assert not merkle.verify_proof(hashes[1], proof[:-1], root)
+    assert not merkle.verify_proof(hashes[1], proof, merkle.merkle_root(hashes[:4]))
+    assert not merkle.verify_proof("not-a-hash", proof, root)
+    # An inner node is not accepted as a leaf
+    inner = merkle.to_hex(levels[1][0])
+    assert not merkle.verify_proof(inner, merkle.inclusion_proof(levels[1:], 0), root)
+
+
+def test_invalid_input():
+    with pytest.raises(ValueError):
+        merkle.build_levels([])
+    with pytest.raises(ValueError):
+        merkle.to_bytes32("0x1234")
+    with pytest.raises(ValueError):
+        merkle.to_bytes32(123)
+    hashes = _hashes(2)
+    assert not merkle.verify_proof(hashes[0], [None], merkle.merkle_root(hashes))
+
+
+@pytest.mark.parametrize("proof", [[123], [{"hash": "ab" * 32}], "ab" * 32, None])
+def test_endpoint_rejects_malformed_proofs(client, proof):
+    hashes = _hashes(2)
+    body = {"report_hash": hashes[0], "proof": proof, "merkle_root": merkle.merkle_root(hashes)}
+
+    response = client.post("/verify_proof", json=body)
+
+    assert response.status_code == 400
+    assert "proof element" in response.json()["detail"]
+
+    body["proof"] = merkle.inclusion_proof(merkle.build_levels(hashes), 0)
+    assert client.post("/verify_proof", json=body).json()["valid"]
@@ -0,0 +1,53 @@
+from utils.pdf_gen import generate_pdf_report, render_pdf_file
+
+ANALYSIS = {"quality_analysis": {"score": 87, "issues": ["Revenue: 3 rows outside allowed range [0, 1e6]"]}}
+RECOMMENDATIONS = "# Executive Summary\nAll good."
+
+
+def test_rendering_is_deterministic_per_report(tmp_path):
+    first = render_pdf_file(str(tmp_path / "a.pdf"), ANALYSIS, RECOMMENDATIONS, "data.csv", "report-1")
+    again = render_pdf_file(str(tmp_path / "b.pdf"), ANALYSIS, RECOMMENDATIONS, "data.csv", "report-1")
+
+    assert first == again
+    assert (tmp_path / "a.pdf").read_bytes() == (tmp_path / "b.pdf").read_bytes()
+    assert first[1] == len((tmp_path / "a.pdf").read_bytes())
+    assert [p.name for p in tmp_path.iterdir() if p.suffix == ".tmp"] == []
+
+
+def test_identical_analyses_of_different_reports_hash_differently(tmp_path):
+    first, _ = render_pdf_file(str(tmp_path / "a.pdf"), ANALYSIS, RECOMMENDATIONS, "data.csv", "report-1")
+    second, _ = render_pdf_file(str(tmp_path / "b.pdf"), ANALYSIS, RECOMMENDATIONS, "data.csv", "report-2")
+
+    assert first != second
+
+
+def test_in_memory_rendering_matches_the_file(tmp_path):
+    _, size = render_pdf_file(str(tmp_path / "a.pdf"), ANALYSIS, RECOMMENDATIONS, "data.csv", "report-1")
+    buffer = generate_pdf_report(ANALYSIS, RECOMMENDATIONS, "data.csv", "report-1")
+
+    assert buffer.getvalue() == (tmp_path / "a.pdf").read_bytes()
+    assert len(buffer.getvalue()) == size
+
+
+def test_generate_pdf_rejects_ids_that_are_not_report_ids(client, tmp_path):
+    (tmp_path / "secret.pdf").write_bytes(b"%PDF-1.4 not a report")
+
+    for report_id in ("../secret", "../../secret", ["x"]):
+        response = client.post("/generate_pdf", json={"id": report_id, "analysis": ANALYSIS})
+        assert response.status_code == 400
+
+
+def test_generate_pdf_serves_a_stored_report_and_renders_unknown_ids(client):
+    from utils import report_store
+
+    report_id = "0b6f1f9c-3f1e-4c57-9d7c-6f1b2f0a4e11"
+    report_store.save_report(report_id, {"id": report_id, "filename": "data.csv", "analysis": ANALYSIS})
+    with open(report_store.pdf_path(report_id), "wb") as f:
+        f.write(b"%PDF-1.4 stored")
+
+    stored = client.post("/generate_pdf", json={"id": report_id, "analysis": ANALYSIS, "filename": "data.csv"})
+    rendered = client.post("/generate_pdf", json={"id": "5c1d0a59-2f6e-4a43-8a8e-0d3e2b1c9f77", "analysis": ANALYSIS})
+
+    assert stored.content == b"%PDF-1.4 stored"
+    assert rendered.status_code == 200
+    assert rendered.content.startswith(b"%PDF") and rendered.content != stored.content
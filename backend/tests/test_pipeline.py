@@ -0,0 +1,106 @@
+import os
+
+import pytest
+
+import pipeline
+from benchmarks.datasets import write_csv
+from utils import report_store
+
+
+@pytest.fixture
+def batch_pool(workdir):
+    # Pool processes are spawned lazily and keep the working directory they started in
+    pipeline.shutdown_process_pool()
+    yield
+    pipeline.shutdown_process_pool()
+
+
+def test_failed_batch_entry_leaves_no_files(batch_pool, monkeypatch, tmp_path):
+    def failing_advisor(analysis, use_cache=True):
+        raise RuntimeError("LLM unavailable")
+
+    monkeypatch.setattr(pipeline, "run_advisor_agent", failing_advisor)
+    path = str(tmp_path / "upload.csv")
+    write_csv(path, rows=200)
+
+    manifest = pipeline.run_batch([(path, "upload.csv")])
+
+    assert [(r["status"], r["error"]) for r in manifest["results"]] == [("error", "LLM unavailable")]
+    assert os.listdir(report_store.REPORTS_DIR) == []
+
+
+def test_audit_reports_each_stage_around_real_work(workdir, monkeypatch, tmp_path):
+    monkeypatch.setattr(pipeline, "run_advisor_agent", lambda analysis, use_cache=True, on_token=None: "ok")
+    path = str(tmp_path / "upload.csv")
+    write_csv(path, rows=200)
+    events = []
+
+    with open(path, "rb") as f:
+        result = pipeline.run_audit(f, "upload.csv", on_stage=lambda name, state: events.append((name, state)))
+
+    assert events == [(name, state) for name in pipeline.STAGES for state in ("running", "done")]
+    assert set(result["metrics"]["stages"]) >= set(pipeline.STAGES)
+
+
+@pytest.fixture
+def upload(workdir, monkeypatch, tmp_path):
+    """Audits the same CSV bytes on each call, counting the advisor runs."""
+    calls = []
+
+    def advisor(analysis, use_cache=True, on_token=None):
+        calls.append(analysis)
+        return "ok"
+
+    monkeypatch.setattr(pipeline, "run_advisor_agent", advisor)
+    path = str(tmp_path / "upload.csv")
+    write_csv(path, rows=200)
+
+    def run(**kwargs) -> dict:
+        with open(path, "rb") as f:
+            return pipeline.run_audit(f, "upload.csv", **kwargs)
+
+    run.calls = calls
+    return run
+
+
+def test_identical_upload_reuses_the_report(upload):
+    first = upload()
+    events = []
+
+    second = upload(on_stage=lambda name, state: events.append((name, state)))
+
+    assert second["cached"] and second["id"] == first["id"]
+    assert second["report_hash_preview"] == first["report_hash_preview"]
+    assert events == [(name, "cached") for name in pipeline.STAGES]
+    assert len(upload.calls) == 1
+
+
+def test_changed_config_or_model_misses(upload, monkeypatch, tmp_path):
+    from agents import quality_rules
+
+    first = upload()
+
+    config = tmp_path / "quality_constraints.json"
+    with open(quality_rules.CONFIG_PATH) as f:
+        config.write_text(f.read().rstrip() + "\n\n")
+    monkeypatch.setattr(quality_rules, "CONFIG_PATH", str(config))
+    changed_config = upload()
+    monkeypatch.setattr(pipeline, "MODEL_NAME", "another-model")
+    changed_model = upload()
+
+    ids = {first["id"], changed_config["id"], changed_model["id"]}
+    assert len(ids) == 3
+    assert not changed_config.get("cached") and not changed_model.get("cached")
+    # Each configuration now has its own report to reuse
+    assert upload()["id"] == changed_model["id"]
+
+
+def test_force_bypasses_the_cache(upload):
+    first = upload()
+
+    forced = upload(force=True)
+
+    assert not forced.get("cached") and forced["id"] != first["id"]
+    assert len(upload.calls) == 2
+    # The newest report answers from then on
+    assert upload()["id"] == forced["id"]
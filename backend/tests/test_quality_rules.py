@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from agents.quality_rules import RuleEngine, compile_rules, violation_issues
+
+CONFIG = {
+    "allowed_ranges": {"age": [0, 120]},
+    "rules": [
+        {"type": "enum", "column": "dept", "values": ["Sales", "HR"]},
+        {"type": "regex", "column": "month", "pattern": "[0-9]{4}-[0-9]{2}"},
+        {"type": "unique", "column": "invoice"},
+        {"type": "dtype", "column": "qty", "dtype": "integer"},
+        {"type": "not_null", "column": "dept", "name": "dept_required", "penalty": 10},
+        {"type": "compare", "left": "start", "op": "<=", "right": "end"},
+        {"type": "expression", "expr": "qty >= 0", "name": "qty_positive"},
+    ],
+}
+
+
+def _frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        "age": [30, -1, 150, None, 45, 60],
+        "dept": ["Sales", "HR", "IT", None, "Sales", "Ops"],
+        "month": ["2024-01", "2024-1", "2024-02", None, "Jan", "2024-03"],
+        "invoice": ["a", "b", "a", "c", "b", None],
+        "qty": [1, 2.5, 3, -4, None, 6],
+        "start": [1, 5, 3, None, 2, 9],
+        "end": [2, 4, 3, 1, 1, 10],
+    })
+
+
+def test_violation_counts():
+    result = RuleEngine(CONFIG).evaluate(_frame())
+
+    assert result.counts == {
+        "age:range": 2,
+        "dept:enum": 2,
+        "month:regex": 2,
+        "invoice:unique": 2,
+        "qty:dtype": 1,
+        "dept_required": 1,
+        "start:compare": 2,
+        "qty_positive": 2,
+    }
+    assert result.mask("age:range").tolist() == [False, True, True, False, False, False]
+    # Missing values only fail not_null and the expression (NaN >= 0 is False)
+    assert result.mask("qty_positive").tolist() == [False, False, False, True, True, False]
+    assert result.any_violation("drop").tolist() == [False, True, True, False, False, False]
+    assert result.any_violation().tolist() == [False, True, True, True, True, True]
+
+
+def test_chunks_count_like_the_full_frame():
+    df = _frame()
+    full = RuleEngine(CONFIG).evaluate(df).counts
+
+    engine = RuleEngine(CONFIG)
+    chunked = {}
+    for start in range(0, len(df), 2):
+        for name, n in engine.evaluate(df.iloc[start:start + 2]).counts.items():
+            chunked[name] = chunked.get(name, 0) + n
+    assert chunked == full
+
+    # The "unique" state survives a save/load between uploads
+    resumed = RuleEngine(CONFIG)
+    resumed.load_seen_state(engine.seen_state())
+    again = resumed.evaluate(pd.DataFrame({"invoice": ["c", "d"], "qty": [1, 2]}))
+    assert again.counts == {"invoice:unique": 1, "qty:dtype": 0, "qty_positive": 0}
+
+
+def test_rules_on_missing_columns_are_skipped():
+    # Expression rules always run; the others only when their columns are present
+    result = RuleEngine(CONFIG).evaluate(pd.DataFrame({"age": [10, 200], "qty": [1, -1]}))
+    assert result.counts == {"age:range": 1, "qty:dtype": 0, "qty_positive": 1}
+    assert result.matrix.shape == (3, 2)
+
+
+def test_issues_and_penalties():
+    rules = compile_rules(CONFIG)
+    issues = violation_issues(rules, {"dept_required": 3, "age:range": 2, "dept:enum": 0})
+    assert issues == [
+        ("age:range: 2 rows outside allowed range [0, 120]", 0),
+        ("dept_required: 3 rows missing values", 10),
+    ]
+
+    engine = RuleEngine({"required_columns": ["id"], "max_missing_per_column": 0.5, "min_rows": 10})
+    assert engine.dataset_issues(4, ["a"], {"a": 3}) == [
+        ("Missing required column: id", 20),
+        ("a: missing ratio 0.75 too high", 10),
+        ("Dataset too small", 20),
+    ]
+
+
+def test_unknown_rule_type():
+    with pytest.raises(ValueError, match="Unknown quality rule type"):
+        compile_rules({"rules": [{"type": "spellcheck", "column": "a"}]})
+    assert np.array_equal(RuleEngine({}).evaluate(_frame()).any_violation(), np.zeros(6, dtype=bool))
+
+
+@pytest.mark.parametrize("op", ["=<", "=", None])
+def test_unknown_compare_op(op):
+    rule = {"type": "compare", "left": "start", "op": op, "right": "end"}
+    if op is None:
+        del rule["op"]
+
+    with pytest.raises(ValueError, match="Unknown compare op in quality rule start"):
+        compile_rules({"rules": [rule]})
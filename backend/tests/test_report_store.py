@@ -0,0 +1,105 @@
+import io
+import os
+
+import pandas as pd
+import pytest
+
+from utils import report_store
+
+
+def _frame(start: int, rows: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        "order_id": range(start, start + rows),
+        "department": [f"dept_{i % 3}" for i in range(start, start + rows)],
+        "revenue": [i * 1.5 for i in range(start, start + rows)],
+    })
+
+
+def _report(report_id: str, **fields) -> dict:
+    return dict({"id": report_id, "filename": "data.csv", "analysis": {"quality_analysis": {"score": 90}}}, **fields)
+
+
+def test_frame_round_trip(workdir):
+    df = _frame(0, 50)
+    report_store.save_report("a", _report("a"), df)
+
+    data = report_store.load_metadata("a")
+    assert data["dataset"] == {"format": "parquet", "file": "a" + report_store.PARQUET_SUFFIX, "rows": 50}
+    pd.testing.assert_frame_equal(report_store.load_dataset_frame(data), df)
+    assert pd.read_json(io.StringIO(report_store.load_dataset_json(data))).shape == (50, 3)
+
+
+def test_chunked_writer_round_trip(workdir):
+    writer = report_store.ChunkedDatasetWriter()
+    for start in (0, 20, 40):
+        writer.write(_frame(start, 20))
+    report_store.save_report("c", _report("c"), dataset_writer=writer)
+
+    data = report_store.load_metadata("c")
+    assert data["dataset"]["format"] == "csv.gz"
+    assert data["dataset"]["rows"] == 60
+    pd.testing.assert_frame_equal(report_store.load_dataset_frame(data), _frame(0, 60), check_dtype=False)
+    assert not [n for n in os.listdir(report_store.REPORTS_DIR) if n.endswith(".tmp")]
+
+
+def test_delta_reports_follow_their_base(workdir):
+    report_store.save_report("base", _report("base"), _frame(0, 30))
+    report_store.save_report("delta", _report("delta", base_report_id="base"), _frame(30, 10))
+
+    data = report_store.load_metadata("delta")
+    assert data["dataset"]["rows"] == 10
+    pd.testing.assert_frame_equal(report_store.load_dataset_frame(data), _frame(0, 40))
+
+
+def test_update_metadata_keeps_dataset(workdir):
+    report_store.save_report("a", _report("a"), _frame(0, 5))
+    report_store.update_metadata("a", is_certified=True, report_hash="ab" * 32)
+
+    data = report_store.load_metadata("a")
+    assert data["is_certified"] is True
+    assert data["report_hash"] == "ab" * 32
+    pd.testing.assert_frame_equal(report_store.load_dataset_frame(data), _frame(0, 5))
+
+
+def test_legacy_inline_dataset_is_split_on_update(workdir):
+    legacy = _frame(0, 5).to_json()
+    report_store._write_json_atomic(report_store.metadata_path("old"), _report("old", analysis={"final_data": legacy}))
+
+    assert report_store.load_dataset_json(report_store.load_metadata("old")) == legacy
+    data = report_store.update_metadata("old", is_certified=True)
+    assert "final_data" not in data["analysis"]
+    assert data["dataset"]["format"] == "json.gz"
+    assert report_store.load_dataset_json(data) == legacy
+
+
+def test_delete_removes_every_file(workdir):
+    report_store.save_report("a", _report("a"), _frame(0, 5))
+    report_store.save_sketch("a", {"rows": 5})
+    with open(report_store.pdf_path("a"), "wb") as f:
+        f.write(b"%PDF-")
+    assert report_store.load_sketch("a") == {"rows": 5}
+
+    report_store.delete_report("a")
+    assert os.listdir(report_store.REPORTS_DIR) == []
+    assert report_store.load_sketch("a") is None
+    with pytest.raises(FileNotFoundError):
+        report_store.load_metadata("a")
+
+
+def test_report_with_delta_reports_cannot_be_deleted(client):
+    from utils import catalog
+
+    for report_id, base_id, start in (("base", None, 0), ("delta", "base", 5)):
+        data = _report(report_id, timestamp=f"2024-01-0{start // 5 + 1}T00:00:00", base_report_id=base_id)
+        report_store.save_report(report_id, data, _frame(start, 5))
+        catalog.upsert_report(data)
+
+    response = client.delete("/reports/base")
+
+    assert response.status_code == 409
+    assert "delta" in response.json()["detail"]
+    # The delta report still reads every row
+    assert len(report_store.load_dataset_frame(report_store.load_metadata("delta"))) == 10
+    assert client.delete("/reports/delta").status_code == 200
+    assert client.delete("/reports/base").status_code == 200
+    assert os.listdir(report_store.REPORTS_DIR) == []
@@ -0,0 +1,46 @@
+import json
+
+import main
+
+
+def _events(response) -> list:
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        event, data = block.split("\n")
+        # Strict parse, as in the browser: NaN / Infinity are rejected
+        events.append((event[len("event: "):], json.loads(data[len("data: "):], parse_constant=_reject)))
+    return events
+
+
+def _reject(name):
+    raise ValueError(f"non-standard JSON constant {name}")
+
+
+def test_stream_events_are_strict_json(client, monkeypatch):
+    def audit(fileobj, filename, *args, on_stage=None, on_analysis=None, on_token=None, **kwargs):
+        on_analysis({"statistics": {"numeric_summary": {"x": {"mean": float("nan"), "max": float("inf")}}}})
+        on_token("ok")
+        return {"status": "success", "id": "r1", "analysis": {}, "recommendations": "ok"}
+
+    monkeypatch.setattr(main, "run_audit", audit)
+
+    response = client.post("/upload_and_analyze/stream", files={"file": ("data.csv", b"x\n1\n")})
+
+    events = _events(response)
+    assert [name for name, _ in events] == ["analysis", "token", "done"]
+    assert events[0][1]["statistics"]["numeric_summary"]["x"] == {"mean": None, "max": None}
+
+
+def test_unserializable_event_becomes_error(client, monkeypatch):
+    def audit(fileobj, filename, *args, on_analysis=None, **kwargs):
+        on_analysis({(1, 2): "tuple keys are not JSON"})
+        return {"status": "success", "id": "r1"}
+
+    monkeypatch.setattr(main, "run_audit", audit)
+
+    response = client.post("/upload_and_analyze/stream", files={"file": ("data.csv", b"x\n1\n")})
+
+    events = _events(response)
+    assert [name for name, _ in events] == ["error"]
+    assert events[0][1]["status_code"] == 500
+    assert events[0][1]["detail"].startswith("Could not serialize analysis event")
@@ -0,0 +1,94 @@
+import hashlib
+
+import pytest
+
+from utils import batches, catalog, chain_indexer, report_store, verification
+
+
+def _save(report_id: str, pdf: bytes) -> str:
+    report_hash = hashlib.sha256(pdf).hexdigest()
+    with open(report_store.pdf_path(report_id), "wb") as f:
+        f.write(pdf)
+    data = {"id": report_id, "filename": f"{report_id}.csv", "timestamp": "2024-01-01T00:00:00",
+            "report_hash_preview": report_hash}
+    report_store.save_report(report_id, data)
+    catalog.upsert_report(data)
+    return report_hash
+
+
+def _index(report_hash: str, block: int, event: str = "ReportCertifiedV2"):
+    chain_indexer.ensure_schema()
+    with catalog.connect() as conn:
+        conn.execute(
+            "INSERT INTO chain_certifications (tx_hash, log_index, block_number, block_hash, contract, event, report_hash) "
+            "VALUES (?, 0, ?, ?, '0xc0', ?, ?)",
+            (f"0x{block:064x}", block, f"0x{block:064x}", event, report_hash),
+        )
+
+
+def test_verdicts(workdir):
+    certified = _save("certified", b"%PDF-certified")
+    tampered = _save("tampered", b"%PDF-original")
+    sibling = _save("sibling", b"%PDF-sibling")
+    batched = _save("batched", b"%PDF-batched")
+    _index(certified, 7)
+    _index(tampered, 8)
+    with open(report_store.pdf_path("tampered"), "wb") as f:
+        f.write(b"%PDF-edited")
+    batch = batches.create_batch(["batched", "sibling"])
+    _index(batch["merkle_root"][2:], 9, "BatchCertifiedV2")
+
+    result = verification.verify_bulk(
+        ["certified", "tampered", "batched", "missing", "certified"],
+        ["0x" + certified.upper(), "ff" * 32],
+    )
+
+    verdicts = [(r.get("report_id") or r["report_hash"], r["verdict"]) for r in result["results"]]
+    assert verdicts == [
+        ("certified", "match"),
+        ("tampered", "mismatch"),
+        ("batched", "match"),
+        ("missing", "not_found"),
+        (certified, "match"),
+        ("ff" * 32, "uncertified"),
+    ]
+    assert result["counts"] == {"match": 3, "mismatch": 1, "not_found": 1, "uncertified": 1}
+    by_id = {r.get("report_id"): r for r in result["results"]}
+    assert by_id["certified"]["onchain"]["block_number"] == 7
+    assert by_id["batched"]["onchain"]["event"] == "BatchCertifiedV2"
+    assert by_id["tampered"]["computed_hash"] != tampered
+
+    # Every leaf of the anchored batch is certified
+    assert verification.verify_bulk(["sibling"])["results"][0]["verdict"] == "match"
+    assert sibling in verification.onchain_records([sibling])
+
+
+def test_missing_pdf_is_checked_on_chain_only(workdir):
+    report_hash = _save("r", b"%PDF-r")
+    report_store.remove_report_files("r")
+    _index(report_hash, 3)
+
+    entry = verification.verify_bulk(["r"])["results"][0]
+    assert entry["verdict"] == "match"
+    assert entry["pdf_checked"] is False
+
+
+@pytest.mark.parametrize("report_ids, report_hashes", [
+    ([1, 2], None),
+    (None, ["ab" * 32, None]),
+    ("report-id", None),
+    (None, {"hash": "ab" * 32}),
+])
+def test_non_string_items_are_rejected(workdir, report_ids, report_hashes):
+    with pytest.raises(ValueError, match="must be a list of strings"):
+        verification.verify_bulk(report_ids, report_hashes)
+
+
+def test_bulk_endpoint_rejects_non_strings(client):
+    response = client.post("/verify/bulk", json={"report_hashes": [123]})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "report_hashes must be a list of strings"
+
+    response = client.post("/verify/bulk", json={"report_hashes": ["ab" * 32]})
+    assert response.status_code == 200
+    assert response.json()["counts"] == {"uncertified": 1}
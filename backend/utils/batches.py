@@ -0,0 +1,180 @@
+import datetime
+import uuid
+from typing import List
+
+from utils import catalog
+from utils import merkle
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (
+    id TEXT PRIMARY KEY,
+    merkle_root TEXT NOT NULL,
+    report_count INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    tx_hash TEXT,
+    anchored_at TEXT
+);
+CREATE TABLE IF NOT EXISTS batch_reports (
+    batch_id TEXT NOT NULL,
+    leaf_index INTEGER NOT NULL,
+    report_id TEXT NOT NULL,
+    report_hash TEXT NOT NULL,
+    PRIMARY KEY (batch_id, leaf_index)
+);
+CREATE INDEX IF NOT EXISTS idx_batch_reports_report ON batch_reports (report_id);
+CREATE INDEX IF NOT EXISTS idx_batches_root ON batches (merkle_root);
+"""
+
+_initialized = False
+
+
+def ensure_schema():
+    global _initialized
+    if _initialized:
+        return
+    with catalog.connect() as conn:
+        conn.executescript(_SCHEMA)
+    _initialized = True
+
+
+def _batch_dict(row) -> dict:
+    return {
+        "batch_id": row["id"],
+        "merkle_root": row["merkle_root"],
+        "report_count": row["report_count"],
+        "created_at": row["created_at"],
+        "tx_hash": row["tx_hash"],
+        "anchored": row["anchored_at"] is not None,
+        "anchored_at": row["anchored_at"],
+    }
+
+
+def create_batch(report_ids: List[str] = None) -> dict:
+    """
+    Builds a Merkle tree over the report hashes and records it as a pending
+    batch. Without `report_ids`, every uncertified report not yet in an
+    anchored batch is included. The root is what goes on-chain.
+    """
+    ensure_schema()
+    with catalog.connect() as conn:
+        if report_ids is None:
+            rows = conn.execute(
+                "SELECT id, report_hash FROM reports WHERE is_certified = 0 AND report_hash IS NOT NULL "
+                "AND id NOT IN (SELECT r.report_id FROM batch_reports r JOIN batches b ON b.id = r.batch_id "
+                "WHERE b.anchored_at IS NOT NULL) ORDER BY timestamp, id"
+            ).fetchall()
+            leaves = [(r["id"], r["report_hash"]) for r in rows]
+        else:
+            found = {
+                r["id"]: r["report_hash"]
+                for r in conn.execute(
+                    f"SELECT id, report_hash FROM reports WHERE id IN ({','.join('?' * len(report_ids))})",
+                    report_ids,
+                )
+            }
+            missing = [rid for rid in report_ids if not found.get(rid)]
+            if missing:
+                raise ValueError(f"Unknown reports or reports without a hash: {', '.join(missing)}")
+            leaves = [(rid, found[rid]) for rid in dict.fromkeys(report_ids)]
+
+    if not leaves:
+        raise ValueError("No reports to batch")
+
+    root = merkle.merkle_root([h for _, h in leaves])
+    batch_id = str(uuid.uuid4())
+    with catalog.connect() as conn:
+        conn.execute(
+            "INSERT INTO batches (id, merkle_root, report_count, created_at) VALUES (?, ?, ?, ?)",
+            (batch_id, root, len(leaves), datetime.datetime.now().isoformat()),
+        )
+        conn.executemany(
+            "INSERT INTO batch_reports (batch_id, leaf_index, report_id, report_hash) VALUES (?, ?, ?, ?)",
+            [(batch_id, i, rid, h) for i, (rid, h) in enumerate(leaves)],
+        )
+    return dict(get_batch(batch_id), report_ids=[rid for rid, _ in leaves])
+
+
+def get_batch(batch_id: str) -> dict:
+    ensure_schema()
+    with catalog.connect() as conn:
+        row = conn.execute("SELECT * FROM batches WHERE id = ?", (batch_id,)).fetchone()
+    return _batch_dict(row) if row else None
+
+
+def find_by_root(merkle_root: str) -> dict:
+    ensure_schema()
+    with catalog.connect() as conn:
+        row = conn.execute(
+            "SELECT * FROM batches WHERE merkle_root = ? ORDER BY anchored_at IS NULL, created_at DESC LIMIT 1",
+            (merkle_root.lower(),),
+        ).fetchone()
+    return _batch_dict(row) if row else None
+
+
+def mark_anchored(batch_id: str, tx_hash: str) -> List[str]:
+    """Records the anchoring transaction; returns the ids of the reports it certifies."""
+    ensure_schema()
+    with catalog.connect() as conn:
+        conn.execute(
+            "UPDATE batches SET tx_hash = ?, anchored_at = COALESCE(anchored_at, ?) WHERE id = ?",
+            (tx_hash, datetime.datetime.now().isoformat(), batch_id),
+        )
+        rows = conn.execute(
+            "SELECT report_id FROM batch_reports WHERE batch_id = ? ORDER BY leaf_index", (batch_id,)
+        ).fetchall()
+    return [r["report_id"] for r in rows]
+
+
+def clear_anchor(merkle_root: str, tx_hash: str) -> List[str]:
+    """
+    Forgets an anchoring transaction that a chain reorg dropped; returns the
+    ids of the reports of the batches it anchored.
+    """
+    ensure_schema()
+    with catalog.connect() as conn:
+        batch_ids = [
+            r["id"] for r in conn.execute(
+                "SELECT id FROM batches WHERE merkle_root = ? AND lower(tx_hash) = ?",
+                (merkle_root.lower(), tx_hash.lower()),
+            )
+        ]
+        conn.executemany("UPDATE batches SET tx_hash = NULL, anchored_at = NULL WHERE id = ?",
+                         [(b,) for b in batch_ids])
+        rows = conn.execute(
+            f"SELECT report_id FROM batch_reports WHERE batch_id IN ({','.join('?' * len(batch_ids))}) "
+            "ORDER BY batch_id, leaf_index",
+            batch_ids,
+        ).fetchall()
+    return [r["report_id"] for r in rows]
+
+
+def get_proof(report_id: str) -> dict:
+    """
+    Inclusion proof of a report in its batch, preferring the most recent
+    anchored batch over pending ones. None if the report was never batched.
+    """
+    ensure_schema()
+    with catalog.connect() as conn:
+        member = conn.execute(
+            "SELECT r.batch_id, r.leaf_index, r.report_hash FROM batch_reports r JOIN batches b ON b.id = r.batch_id "
+            "WHERE r.report_id = ? ORDER BY b.anchored_at IS NULL, b.created_at DESC LIMIT 1",
+            (report_id,),
+        ).fetchone()
+        if member is None:
+            return None
+        batch = conn.execute("SELECT * FROM batches WHERE id = ?", (member["batch_id"],)).fetchone()
+        hashes = [
+            r["report_hash"]
+            for r in conn.execute(
+                "SELECT report_hash FROM batch_reports WHERE batch_id = ? ORDER BY leaf_index", (member["batch_id"],)
+            )
+        ]
+
+    levels = merkle.build_levels(hashes)
+    return dict(
+        _batch_dict(batch),
+        report_id=report_id,
+        report_hash=member["report_hash"],
+        leaf_index=member["leaf_index"],
+        proof=merkle.inclusion_proof(levels, member["leaf_index"]),
+    )
@@ -0,0 +1,271 @@
+import sqlite3
+import base64
+import datetime
+import json
+import os
+from contextlib import contextmanager
+
+CATALOG_DB = "data/catalog.db"
+
+SORTABLE_FIELDS = ("timestamp", "quality_score", "filename")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    quality_score INTEGER NOT NULL DEFAULT 0,
+    is_certified INTEGER NOT NULL DEFAULT 0,
+    report_hash TEXT,
+    content_key TEXT,
+    base_report_id TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_reports_timestamp ON reports (timestamp, id);
+CREATE INDEX IF NOT EXISTS idx_reports_score ON reports (quality_score, id);
+CREATE INDEX IF NOT EXISTS idx_reports_filename ON reports (filename, id);
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    event TEXT NOT NULL,
+    report_id TEXT NOT NULL,
+    filename TEXT,
+    timestamp TEXT,
+    quality_score INTEGER,
+    is_certified INTEGER,
+    report_hash TEXT,
+    recorded_at TEXT NOT NULL
+);
+"""
+
+# Append-only audit event log (the export feed); seq is the watermark consumers resume from
+EVENT_COLUMNS = (
+    "seq", "event", "report_id", "filename", "timestamp",
+    "quality_score", "is_certified", "report_hash", "recorded_at",
+)
+
+# Columns added after the first release, applied to existing catalogs on start
+_MIGRATIONS = {
+    "content_key": "ALTER TABLE reports ADD COLUMN content_key TEXT",
+    "base_report_id": "ALTER TABLE reports ADD COLUMN base_report_id TEXT",
+}
+
+
+@contextmanager
+def connect():
+    """Opens a catalog connection, committing on success and always closing it."""
+    conn = sqlite3.connect(CATALOG_DB, timeout=30)
+    conn.row_factory = sqlite3.Row
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def summarize(data: dict) -> dict:
+    """Extracts the catalog row from a full report document."""
+    analysis = data.get("analysis") or {}
+    quality = analysis.get("quality_analysis") or {}
+    if isinstance(quality, str):
+        try:
+            quality = json.loads(quality)
+        except ValueError:
+            quality = {}
+    return {
+        "id": data.get("id"),
+        "filename": data.get("filename") or "",
+        "timestamp": data.get("timestamp") or "",
+        "quality_score": int(quality.get("score", 0) or 0),
+        "is_certified": bool(data.get("is_certified", False)),
+        "report_hash": data.get("report_hash_preview") or data.get("report_hash"),
+        "content_key": data.get("content_key"),
+        "base_report_id": data.get("base_report_id"),
+    }
+
+
+def init_catalog(reports_dir: str):
+    """Creates the catalog and indexes reports written before it existed."""
+    directory = os.path.dirname(CATALOG_DB)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+
+    with connect() as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        existing = {r["name"] for r in conn.execute("PRAGMA table_info(reports)")}
+        for column, statement in _MIGRATIONS.items():
+            if column not in existing:
+                conn.execute(statement)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_reports_content_key ON reports (content_key)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_reports_base ON reports (base_report_id)")
+        empty = conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0] == 0
+        # Delta reports saved before the column existed still need their base recorded
+        backfill_bases = not empty and "base_report_id" not in existing
+        if not empty and conn.execute("SELECT 1 FROM events LIMIT 1").fetchone() is None:
+            # Catalog older than the event log: start it with one "saved" event per report
+            conn.execute(
+                "INSERT INTO events (event, report_id, filename, timestamp, quality_score, is_certified, report_hash, recorded_at) "
+                "SELECT 'saved', id, filename, timestamp, quality_score, is_certified, report_hash, ? "
+                "FROM reports ORDER BY timestamp, id",
+                (datetime.datetime.now().isoformat(),),
+            )
+
+    # One-time backfill: the only full scan of the reports directory
+    if empty and os.path.exists(reports_dir):
+        for name in os.listdir(reports_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(reports_dir, name), "r") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            data.setdefault("id", name[:-len(".json")])
+            upsert_report(data)
+    elif backfill_bases and os.path.exists(reports_dir):
+        with connect() as conn:
+            for name in os.listdir(reports_dir):
+                if not name.endswith(".json"):
+                    continue
+                try:
+                    with open(os.path.join(reports_dir, name), "r") as f:
+                        base_id = json.load(f).get("base_report_id")
+                except (OSError, ValueError):
+                    continue
+                if base_id:
+                    conn.execute("UPDATE reports SET base_report_id = ? WHERE id = ?", (base_id, name[:-len(".json")]))
+
+
+def _record_event(conn, event: str, report_id: str):
+    """Appends `event` with the report's current catalog row, in the caller's transaction."""
+    conn.execute(
+        "INSERT INTO events (event, report_id, filename, timestamp, quality_score, is_certified, report_hash, recorded_at) "
+        "SELECT ?, id, filename, timestamp, quality_score, is_certified, report_hash, ? FROM reports WHERE id = ?",
+        (event, datetime.datetime.now().isoformat(), report_id),
+    )
+
+
+def upsert_report(data: dict):
+    row = summarize(data)
+    with connect() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO reports "
+            "(id, filename, timestamp, quality_score, is_certified, report_hash, content_key, base_report_id) "
+            "VALUES (:id, :filename, :timestamp, :quality_score, :is_certified, :report_hash, :content_key, :base_report_id)",
+            row,
+        )
+        _record_event(conn, "saved", row["id"])
+
+
+def set_certified(report_id: str, certified: bool = True):
+    with connect() as conn:
+        # Repeated confirmations (indexer, batch anchoring) change nothing and log nothing
+        changed = conn.execute(
+            "UPDATE reports SET is_certified = ? WHERE id = ? AND is_certified != ?",
+            (int(certified), report_id, int(certified)),
+        ).rowcount
+        if changed:
+            _record_event(conn, "certified" if certified else "uncertified", report_id)
+
+
+def remove_report(report_id: str):
+    with connect() as conn:
+        _record_event(conn, "deleted", report_id)
+        conn.execute("DELETE FROM reports WHERE id = ?", (report_id,))
+
+
+
+def find_by_content_key(content_key: str) -> str:
+    """Id of the most recent report produced from the same upload bytes and config."""
+    with connect() as conn:
+        row = conn.execute(
+            "SELECT id FROM reports WHERE content_key = ? ORDER BY timestamp DESC LIMIT 1",
+            (content_key,),
+        ).fetchone()
+    return row["id"] if row else None
+
+
+def dependent_reports(report_id: str) -> list:
+    """Ids of the delta reports whose rows are appended to `report_id`'s dataset."""
+    with connect() as conn:
+        rows = conn.execute("SELECT id FROM reports WHERE base_report_id = ? ORDER BY timestamp, id", (report_id,))
+        return [r["id"] for r in rows]
+
+
+def encode_cursor(sort_value, report_id: str) -> str:
+    raw = json.dumps([sort_value, report_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        sort_value, report_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    return sort_value, report_id
+
+
+def list_reports(
+    limit: int = 50,
+    cursor: str = None,
+    sort: str = "timestamp",
+    order: str = "desc",
+    filename: str = None,
+    certified: bool = None,
+    min_score: int = None,
+    max_score: int = None,
+) -> dict:
+    """
+    Keyset-paginated listing of report summaries.
+    Returns {"items": [...], "next_cursor": str | None}.
+    """
+    if sort not in SORTABLE_FIELDS:
+        raise ValueError(f"Cannot sort by '{sort}'")
+    if order not in ("asc", "desc"):
+        raise ValueError(f"Invalid order '{order}'")
+
+    clauses = []
+    params = []
+    if filename:
+        clauses.append("filename LIKE ?")
+        params.append(f"%{filename}%")
+    if certified is not None:
+        clauses.append("is_certified = ?")
+        params.append(int(certified))
+    if min_score is not None:
+        clauses.append("quality_score >= ?")
+        params.append(min_score)
+    if max_score is not None:
+        clauses.append("quality_score <= ?")
+        params.append(max_score)
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor)
+        op = "<" if order == "desc" else ">"
+        clauses.append(f"({sort} {op} ? OR ({sort} = ? AND id {op} ?))")
+        params.extend([sort_value, sort_value, last_id])
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    query = (
+        f"SELECT id, filename, timestamp, quality_score, is_certified FROM reports {where} "
+        f"ORDER BY {sort} {order.upper()}, id {order.upper()} LIMIT ?"
+    )
+    params.append(limit + 1)
+
+    with connect() as conn:
+        rows = conn.execute(query, params).fetchall()
+
+    items = [
+        {
+            "id": r["id"],
+            "filename": r["filename"],
+            "timestamp": r["timestamp"],
+            "quality_score": r["quality_score"],
+            "is_certified": bool(r["is_certified"]),
+        }
+        for r in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last[sort], last["id"])
+
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,390 @@
+"""
+Tails certification events from the chain into the catalog, so "is this report
+on-chain?" is a local lookup instead of one RPC per report.
+
+Logs of every known contract are fetched with eth_getLogs in block pages from
+a checkpoint. The last page-end block hashes are kept so a reorg is detected
+on the next pass: indexed rows above the fork point are dropped and re-read,
+and reports they had certified are marked uncertified until the new chain
+certifies them again.
+"""
+import json
+import os
+import threading
+import traceback
+from typing import List
+
+import requests
+
+from utils import batches
+from utils import catalog
+from utils import report_store
+
+RPC_URL = os.getenv("CHAIN_RPC_URL", "http://127.0.0.1:7545")
+# Comma-separated; defaults to the addresses in the truffle artifacts for the connected network
+CONTRACT_ADDRESSES = os.getenv("CHAIN_CONTRACT_ADDRESSES", "")
+PAGE_BLOCKS = int(os.getenv("CHAIN_LOG_PAGE_BLOCKS", "2000"))
+CONFIRMATIONS = int(os.getenv("CHAIN_CONFIRMATIONS", "0"))
+POLL_SECONDS = float(os.getenv("CHAIN_POLL_SECONDS", "5"))
+# The polling thread is opt-in, since a dev chain is not always running
+INDEXER_ENABLED = os.getenv("CHAIN_INDEXER_ENABLED", "0") == "1"
+REORG_DEPTH = int(os.getenv("CHAIN_REORG_DEPTH", "64"))
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ARTIFACTS = [
+    os.path.join(_ROOT, "frontend", "src", "contracts", "AuditTraceability.json"),
+    *(os.path.join(_ROOT, "build", "contracts", f"{name}.json")
+      for name in ("AuditTraceability", "ReportStorage", "AuditTraceabilityV2", "ReportStorageV2")),
+]
+
+# keccak256 of the event signatures (hashlib has no keccak)
+TOPICS = {
+    "0x7834a46024be3c62b85beb00b47c66af09719cf1696c62aa5f59458ef66a8b17": "ReportCertified",    # (uint256,string,string,address)
+    "0x2b8536774860dcd9e7776881e80bbdb8a41fb680e060c6a23105f23a05483be2": "ReportStored",       # (string,string,string,uint256)
+    "0xca062ca0f87d77096950d76722699ec6c8d7f8a5207a614c0cd97f7b0dc500d7": "BatchCertified",     # (uint256,bytes32,uint256,address)
+    "0x9727978ac78e23cdff19cfbf7c1e08acf264ac1d584594cb86a6a7ea796e94ac": "ReportCertifiedV2",  # (uint256,bytes32,address,uint64)
+    "0x34b854be330b14d7e747864f8622dc25bca662b172f6587d11b61135962648c6": "ReportStoredV2",     # (bytes16,bytes32,uint256,uint64)
+    "0xee23c1dc18406a2c788376056066756639c8393a56574e510e1c7910e0b875ab": "BatchCertifiedV2",   # (uint256,bytes32,address,uint32)
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chain_certifications (
+    tx_hash TEXT NOT NULL,
+    log_index INTEGER NOT NULL,
+    block_number INTEGER NOT NULL,
+    block_hash TEXT NOT NULL,
+    contract TEXT NOT NULL,
+    event TEXT NOT NULL,
+    report_hash TEXT NOT NULL,
+    onchain_id TEXT,
+    auditor TEXT,
+    report_date TEXT,
+    PRIMARY KEY (tx_hash, log_index)
+);
+CREATE INDEX IF NOT EXISTS idx_chain_cert_hash ON chain_certifications (report_hash, block_number);
+CREATE INDEX IF NOT EXISTS idx_chain_cert_block ON chain_certifications (block_number);
+CREATE TABLE IF NOT EXISTS chain_blocks (
+    block_number INTEGER PRIMARY KEY,
+    block_hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chain_checkpoint (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    block_number INTEGER NOT NULL
+);
+"""
+
+
+_initialized = False
+
+
+def ensure_schema():
+    global _initialized
+    if _initialized:
+        return
+    batches.ensure_schema()
+    with catalog.connect() as conn:
+        conn.executescript(_SCHEMA)
+    _initialized = True
+
+
+class RpcError(Exception):
+    pass
+
+
+def rpc(method: str, *params):
+    response = requests.post(
+        RPC_URL, json={"jsonrpc": "2.0", "id": 1, "method": method, "params": list(params)}, timeout=30
+    )
+    response.raise_for_status()
+    body = response.json()
+    if "error" in body:
+        raise RpcError(body["error"].get("message", str(body["error"])))
+    return body["result"]
+
+
+def normalize_hash(value: str) -> str:
+    """Report hashes are stored like report_hash_preview: 64 lowercase hex digits, no 0x."""
+    value = value.strip().lower()
+    return value[2:] if value.startswith("0x") else value
+
+
+def _words(data: str) -> List[str]:
+    raw = data[2:]
+    return [raw[i:i + 64] for i in range(0, len(raw), 64)]
+
+
+def _abi_string(words: List[str], offset_word: str) -> str:
+    start = int(offset_word, 16) // 32
+    length = int(words[start], 16)
+    raw = "".join(words[start + 1:start + 1 + (length + 31) // 32])
+    return bytes.fromhex(raw)[:length].decode("utf-8", errors="replace")
+
+
+def _address(word: str) -> str:
+    return "0x" + word[-40:]
+
+
+def decode_log(log: dict) -> dict:
+    """Flattens a certification event into a chain_certifications row, or None."""
+    topics = log["topics"]
+    event = TOPICS.get(topics[0]) if topics else None
+    if event is None:
+        return None
+    words = _words(log["data"])
+    t = [topic[2:] for topic in topics]
+
+    if event == "ReportCertified":
+        row = {"onchain_id": str(int(words[0], 16)), "report_date": _abi_string(words, words[1]),
+               "report_hash": _abi_string(words, words[2]), "auditor": _address(words[3])}
+    elif event == "ReportStored":
+        row = {"onchain_id": _abi_string(words, words[0]), "report_date": _abi_string(words, words[1]),
+               "report_hash": _abi_string(words, words[2]), "auditor": None}
+    elif event == "BatchCertified":
+        row = {"onchain_id": str(int(t[1], 16)), "report_hash": t[2], "auditor": _address(words[1]), "report_date": None}
+    elif event == "ReportCertifiedV2":
+        row = {"onchain_id": str(int(t[1], 16)), "report_hash": t[2], "auditor": _address(t[3]),
+               "report_date": str(int(words[0], 16))}
+    elif event == "ReportStoredV2":
+        row = {"onchain_id": t[1][:32], "report_hash": t[2], "auditor": None, "report_date": str(int(words[1], 16))}
+    else:  # BatchCertifiedV2
+        row = {"onchain_id": str(int(t[1], 16)), "report_hash": t[2], "auditor": _address(t[3]), "report_date": None}
+
+    row.update(
+        tx_hash=log["transactionHash"],
+        log_index=int(log["logIndex"], 16),
+        block_number=int(log["blockNumber"], 16),
+        block_hash=log["blockHash"],
+        contract=log["address"].lower(),
+        event=event,
+        report_hash=normalize_hash(row["report_hash"]),
+    )
+    return row
+
+
+def contract_addresses() -> List[str]:
+    if CONTRACT_ADDRESSES:
+        return [a.strip().lower() for a in CONTRACT_ADDRESSES.split(",") if a.strip()]
+    network_id = rpc("net_version")
+    addresses = []
+    for path in ARTIFACTS:
+        if not os.path.exists(path):
+            continue
+        with open(path, "r") as f:
+            deployed = json.load(f).get("networks", {}).get(network_id)
+        if deployed and deployed.get("address"):
+            addresses.append(deployed["address"].lower())
+    return sorted(set(addresses))
+
+
+def lookup(report_hash: str) -> List[dict]:
+    """On-chain records of a report hash (directly or through an anchored Merkle batch)."""
+    ensure_schema()
+    report_hash = normalize_hash(report_hash)
+    with catalog.connect() as conn:
+        rows = conn.execute(
+            "SELECT * FROM chain_certifications WHERE report_hash = ? "
+            "UNION SELECT c.* FROM chain_certifications c "
+            "JOIN batches b ON c.report_hash = substr(b.merkle_root, 3) "
+            "JOIN batch_reports r ON r.batch_id = b.id WHERE r.report_hash = ? "
+            "ORDER BY block_number",
+            (report_hash, report_hash),
+        ).fetchall()
+    return [dict(r) for r in rows]
+
+
+class ChainIndexer:
+    """Polling indexer thread; `sync()` can also be called directly for one pass."""
+
+    def __init__(self, poll_seconds: float = POLL_SECONDS, page_blocks: int = PAGE_BLOCKS):
+        self.poll_seconds = poll_seconds
+        self.page_blocks = page_blocks
+        self._stop = threading.Event()
+        self._thread = None
+        self._sync_lock = threading.Lock()
+        self.last_error = None
+
+    def start(self):
+        ensure_schema()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.sync()
+                self.last_error = None
+            except Exception as e:
+                # The dev chain may be down; report once per distinct error and keep polling
+                if str(e) != self.last_error:
+                    print(f"Chain indexer: {e}\n{traceback.format_exc()}")
+                self.last_error = str(e)
+            self._stop.wait(self.poll_seconds)
+
+    def checkpoint(self) -> int:
+        ensure_schema()
+        with catalog.connect() as conn:
+            row = conn.execute("SELECT block_number FROM chain_checkpoint WHERE id = 1").fetchone()
+        return row["block_number"] if row else -1
+
+    def status(self) -> dict:
+        return {"checkpoint": self.checkpoint(), "running": self._thread is not None, "last_error": self.last_error}
+
+    def sync(self) -> dict:
+        """Indexes everything from the checkpoint to the confirmed head; returns a summary."""
+        ensure_schema()
+        with self._sync_lock:
+            addresses = contract_addresses()
+            head = int(rpc("eth_blockNumber"), 16) - CONFIRMATIONS
+            rewound = self._handle_reorg()
+            start = self.checkpoint() + 1
+            indexed = 0
+            page = self.page_blocks
+            while start <= head and addresses:
+                end = min(head, start + page - 1)
+                try:
+                    logs = rpc("eth_getLogs", {
+                        "fromBlock": hex(start), "toBlock": hex(end),
+                        "address": addresses, "topics": [list(TOPICS)],
+                    })
+                except RpcError:
+                    # Providers cap results per query; retry the range in smaller pages
+                    if page == 1:
+                        raise
+                    page = max(1, page // 2)
+                    continue
+                end_hash = rpc("eth_getBlockByNumber", hex(end), False)["hash"]
+                indexed += self._store(logs, end, end_hash)
+                start = end + 1
+            return {"head": head, "checkpoint": self.checkpoint(), "indexed": indexed,
+                    "rewound_to": rewound, "contracts": addresses}
+
+    def _handle_reorg(self):
+        """Compares recorded block hashes with the chain and rewinds past a fork."""
+        with catalog.connect() as conn:
+            recorded = conn.execute(
+                "SELECT block_number, block_hash FROM chain_blocks ORDER BY block_number DESC"
+            ).fetchall()
+        if not recorded:
+            return None
+        for row in recorded:
+            block = rpc("eth_getBlockByNumber", hex(row["block_number"]), False)
+            if block is not None and block["hash"] == row["block_hash"]:
+                if row is recorded[0]:
+                    return None
+                fork = row["block_number"]
+                break
+        else:
+            fork = recorded[-1]["block_number"] - 1
+
+        with catalog.connect() as conn:
+            dropped = [
+                dict(r) for r in conn.execute(
+                    "SELECT tx_hash, event, report_hash FROM chain_certifications WHERE block_number > ?", (fork,)
+                )
+            ]
+            conn.execute("DELETE FROM chain_certifications WHERE block_number > ?", (fork,))
+            conn.execute("DELETE FROM chain_blocks WHERE block_number > ?", (fork,))
+            conn.execute("INSERT OR REPLACE INTO chain_checkpoint (id, block_number) VALUES (1, ?)", (fork,))
+        self._revoke(dropped)
+        print(f"Chain indexer: reorg detected, rewound to block {fork}")
+        return fork
+
+    def _set_checkpoint(self, block_number: int, block_hash: str):
+        with catalog.connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO chain_checkpoint (id, block_number) VALUES (1, ?)", (block_number,))
+            conn.execute("INSERT OR REPLACE INTO chain_blocks (block_number, block_hash) VALUES (?, ?)",
+                         (block_number, block_hash))
+            conn.execute("DELETE FROM chain_blocks WHERE block_number <= ?", (block_number - REORG_DEPTH,))
+
+    def _store(self, logs: List[dict], end: int, end_hash: str) -> int:
+        rows = [r for r in (decode_log(log) for log in logs if not log.get("removed")) if r is not None]
+        with catalog.connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO chain_certifications (tx_hash, log_index, block_number, block_hash, contract, "
+                "event, report_hash, onchain_id, auditor, report_date) VALUES (:tx_hash, :log_index, :block_number, "
+                ":block_hash, :contract, :event, :report_hash, :onchain_id, :auditor, :report_date)",
+                rows,
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO chain_blocks (block_number, block_hash) VALUES (?, ?)",
+                {(r["block_number"], r["block_hash"]) for r in rows},
+            )
+        self._set_checkpoint(end, end_hash)
+        self._reconcile(rows)
+        return len(rows)
+
+    def _reconcile(self, rows: List[dict]):
+        """Marks reports certified from what the chain says, so the flag cannot drift."""
+        report_hashes = [r["report_hash"] for r in rows if not r["event"].startswith("BatchCertified")]
+        report_ids = []
+        with catalog.connect() as conn:
+            for i in range(0, len(report_hashes), 500):
+                chunk = report_hashes[i:i + 500]
+                report_ids += [
+                    r["id"] for r in conn.execute(
+                        f"SELECT id FROM reports WHERE is_certified = 0 AND report_hash IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    )
+                ]
+
+        for row in rows:
+            if row["event"].startswith("BatchCertified"):
+                batch = batches.find_by_root("0x" + row["report_hash"])
+                if batch is not None:
+                    report_ids += batches.mark_anchored(batch["batch_id"], row["tx_hash"])
+
+        for report_id in dict.fromkeys(report_ids):
+            if report_store.report_exists(report_id):
+                report_store.update_metadata(report_id, is_certified=True)
+            catalog.set_certified(report_id)
+
+    def _revoke(self, rows: List[dict]):
+        """
+        Undoes _reconcile for rolled-back events: reports left without any
+        on-chain record are marked uncertified again and batches anchored by a
+        dropped transaction go back to pending. Events that made it into the
+        new chain certify them again when it is indexed.
+        """
+        report_hashes = [r["report_hash"] for r in rows if not r["event"].startswith("BatchCertified")]
+        report_ids = set()
+        with catalog.connect() as conn:
+            for i in range(0, len(report_hashes), 500):
+                chunk = report_hashes[i:i + 500]
+                report_ids.update(
+                    r["id"] for r in conn.execute(
+                        f"SELECT id FROM reports WHERE report_hash IN ({','.join('?' * len(chunk))})", chunk
+                    )
+                )
+
+        unanchored = set()
+        for row in rows:
+            if row["event"].startswith("BatchCertified"):
+                unanchored.update(batches.clear_anchor("0x" + row["report_hash"], row["tx_hash"]))
+        report_ids |= unanchored
+
+        ids = sorted(report_ids)
+        certified = []
+        with catalog.connect() as conn:
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                certified += conn.execute(
+                    f"SELECT id, report_hash FROM reports WHERE is_certified = 1 AND id IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+
+        for row in certified:
+            if row["report_hash"] and lookup(row["report_hash"]):
+                continue
+            if report_store.report_exists(row["id"]):
+                fields = {"is_certified": False}
+                if row["id"] in unanchored:
+                    fields["batch_id"] = None
+                report_store.update_metadata(row["id"], **fields)
+            catalog.set_certified(row["id"], False)
@@ -0,0 +1,136 @@
+"""
+Incremental export of the audit event log (catalog `events` table) for
+dashboards such as Power BI.
+
+Every catalog change appends an event (saved / certified / deleted) with
+the report's row at that moment, numbered by a monotonically increasing
+`seq`. A consumer keeps the largest `seq` it has loaded as its watermark and
+asks only for what came after it, so a refresh costs the size of the delta,
+not of the history. Rows are streamed from SQLite in batches into a CSV or
+Parquet file, so memory stays flat however large the delta is.
+"""
+import os
+from typing import Optional
+
+import pyarrow as pa
+
+from utils import catalog
+
+FORMATS = ("csv", "parquet")
+
+# Whole-stream codecs for CSV; per-page codecs for Parquet
+CSV_COMPRESSIONS = ("gzip", "zstd", "bz2")
+PARQUET_COMPRESSIONS = ("snappy", "gzip", "zstd")
+
+MEDIA_TYPES = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+CSV_EXTENSIONS = {"gzip": ".gz", "zstd": ".zst", "bz2": ".bz2"}
+
+BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", "50000"))
+
+SCHEMA = pa.schema([
+    ("seq", pa.int64()),
+    ("event", pa.string()),
+    ("report_id", pa.string()),
+    ("filename", pa.string()),
+    ("timestamp", pa.string()),
+    ("quality_score", pa.int64()),
+    ("is_certified", pa.bool_()),
+    ("report_hash", pa.string()),
+    ("recorded_at", pa.string()),
+])
+
+
+def validate(fmt: str, compression: Optional[str]):
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'; expected one of {', '.join(FORMATS)}")
+    allowed = CSV_COMPRESSIONS if fmt == "csv" else PARQUET_COMPRESSIONS
+    if compression is not None and compression not in allowed:
+        raise ValueError(f"Unsupported {fmt} compression '{compression}'; expected one of {', '.join(allowed)}")
+
+
+def file_name(fmt: str, compression: Optional[str]) -> str:
+    name = f"audit_history.{fmt}"
+    if fmt == "csv" and compression:
+        name += CSV_EXTENSIONS[compression]
+    return name
+
+
+def _batch(rows: list) -> pa.RecordBatch:
+    columns = list(zip(*rows))
+    arrays = []
+    for values, field in zip(columns, SCHEMA):
+        if field.type == pa.bool_():
+            # SQLite stores flags as 0/1
+            arrays.append(pa.array(values, type=pa.int64()).cast(pa.bool_()))
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=SCHEMA)
+
+
+class _CsvSink:
+    def __init__(self, path: str, compression: Optional[str]):
+        from pyarrow import csv as pa_csv
+
+        self._stream = pa.CompressedOutputStream(path, compression) if compression else pa.OSFile(path, "wb")
+        self._writer = pa_csv.CSVWriter(self._stream, SCHEMA)
+
+    def write(self, batch: pa.RecordBatch):
+        self._writer.write_batch(batch)
+
+    def close(self):
+        self._writer.close()
+        self._stream.close()
+
+
+class _ParquetSink:
+    def __init__(self, path: str, compression: Optional[str]):
+        import pyarrow.parquet as pq
+
+        self._writer = pq.ParquetWriter(path, SCHEMA, compression=compression or "none")
+
+    def write(self, batch: pa.RecordBatch):
+        # One row group per batch keeps readers able to skip by seq statistics
+        self._writer.write_batch(batch)
+
+    def close(self):
+        self._writer.close()
+
+
+def export_events(path: str, since: int = 0, fmt: str = "csv", compression: Optional[str] = None,
+                  limit: Optional[int] = None) -> dict:
+    """
+    Writes the events with seq > `since` (at most `limit`, oldest first) to
+    `path`. Returns {"rows", "watermark", "has_more"}: `watermark` is the
+    last exported seq (`since` if nothing was new), to pass as the next
+    `since`; `has_more` is set when `limit` cut the delta short.
+    """
+    validate(fmt, compression)
+    with catalog.connect() as conn:
+        # Pin the upper bound first so events appended while streaming wait for the next refresh
+        latest = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM events").fetchone()[0]
+        upper = latest
+        if limit is not None:
+            row = conn.execute(
+                "SELECT MAX(seq) FROM (SELECT seq FROM events WHERE seq > ? ORDER BY seq LIMIT ?)", (since, limit)
+            ).fetchone()
+            upper = row[0] if row[0] is not None else since
+
+        # Plain tuples: sqlite3.Row objects cost more than the rest of the export
+        conn.row_factory = None
+        sink = _CsvSink(path, compression) if fmt == "csv" else _ParquetSink(path, compression)
+        rows = 0
+        try:
+            cursor = conn.execute(
+                f"SELECT {', '.join(catalog.EVENT_COLUMNS)} FROM events WHERE seq > ? AND seq <= ? ORDER BY seq",
+                (since, upper),
+            )
+            while True:
+                batch = cursor.fetchmany(BATCH_ROWS)
+                if not batch:
+                    break
+                sink.write(_batch(batch))
+                rows += len(batch)
+        finally:
+            sink.close()
+
+    return {"rows": rows, "watermark": max(upper, since), "has_more": upper < latest}
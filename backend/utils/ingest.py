@@ -0,0 +1,338 @@
+import hashlib
+import os
+import re
+import shutil
+import time
+import zipfile
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# Rows per chunk in streaming mode; peak memory scales with this, not the file size
+CHUNK_ROWS = int(os.getenv("INGEST_CHUNK_ROWS", "100000"))
+
+# Uploads larger than this are ingested in streaming mode unless told otherwise
+STREAMING_THRESHOLD_BYTES = int(os.getenv("INGEST_STREAMING_THRESHOLD_BYTES", str(64 * 1024 * 1024)))
+
+
+# Compact dtypes at ingest: sampled categoricals, narrowest lossless numeric widths, parsed dates
+COMPACT_DTYPES = os.getenv("INGEST_COMPACT_DTYPES", "1") != "0"
+
+# "c" (pandas' parser) or "pyarrow" (Arrow's multithreaded reader, Arrow-backed dtypes; full reads only)
+CSV_ENGINE = os.getenv("INGEST_CSV_ENGINE", "c")
+
+# Rows read with default dtypes to choose column types (and to estimate the default parse)
+SAMPLE_ROWS = int(os.getenv("INGEST_SAMPLE_ROWS", "10000"))
+
+# Text columns become categoricals when at most this share of sampled values are distinct
+CATEGORY_MAX_RATIO = 0.5
+
+_ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+SUPPORTED_EXTENSIONS = ('.csv', '.xlsx')
+
+
+def upload_size(fileobj: BinaryIO) -> int:
+    pos = fileobj.tell()
+    fileobj.seek(0, os.SEEK_END)
+    size = fileobj.tell()
+    fileobj.seek(pos)
+    return size
+
+
+def hash_upload(fileobj: BinaryIO, block_size: int = 1024 * 1024) -> str:
+    """SHA-256 of the upload bytes, read in fixed-size blocks; the file is rewound afterwards."""
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for block in iter(lambda: fileobj.read(block_size), b""):
+        digest.update(block)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def _memory(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True, index=False).sum())
+
+
+def _is_text(s: pd.Series) -> bool:
+    return pd.api.types.is_string_dtype(s.dtype) and not isinstance(s.dtype, pd.CategoricalDtype)
+
+
+def infer_dtypes(sample: pd.DataFrame, keep_columns: Iterable[str] = ()) -> Dict[str, List[str]]:
+    """
+    Chooses column types from a default-dtype sample: low-cardinality text
+    becomes categorical and high-cardinality ISO dates/timestamps are
+    parsed. `keep_columns` (the ones quality rules evaluate) are left alone.
+    """
+    keep = set(keep_columns)
+    categorical, dates = [], []
+    for col in sample.columns:
+        s = sample[col]
+        if col in keep or not _is_text(s):
+            continue
+        values = s.dropna()
+        if values.empty:
+            continue
+        if values.nunique() <= CATEGORY_MAX_RATIO * len(values):
+            categorical.append(col)
+        elif _ISO_DATE.match(str(values.iloc[0])) \
+                and pd.to_datetime(values, errors="coerce", format="ISO8601").notna().all():
+            dates.append(col)
+    return {"categorical": categorical, "dates": dates}
+
+
+def _narrowest(s: pd.Series):
+    """Smallest numeric dtype that holds every value of `s` exactly, or None to keep it."""
+    arrow = isinstance(s.dtype, pd.ArrowDtype)
+    kind = s.dtype.numpy_dtype.kind if arrow else s.dtype.kind
+    if kind == "i":
+        low, high = s.min(), s.max()
+        if pd.isna(low):
+            return None
+        for candidate in (np.int8, np.int16, np.int32):
+            info = np.iinfo(candidate)
+            if info.min <= low and high <= info.max:
+                break
+        else:
+            return None
+    elif kind == "f":
+        values = s.to_numpy(dtype="float64", na_value=np.nan)
+        # Values beyond float32's range become inf and fail the comparison
+        with np.errstate(over="ignore"):
+            narrowed = values.astype(np.float32)
+        if not np.array_equal(narrowed.astype(np.float64), values, equal_nan=True):
+            return None
+        candidate = np.float32
+    else:
+        return None
+    if np.dtype(candidate) == (s.dtype.numpy_dtype if arrow else s.dtype):
+        return None
+    return pd.ArrowDtype(pa.from_numpy_dtype(candidate)) if arrow else np.dtype(candidate)
+
+
+def compact_frame(df: pd.DataFrame, categorical: Iterable[str] = (), keep_columns: Iterable[str] = ()) -> pd.DataFrame:
+    """
+    Downcasts numeric columns losslessly and turns `categorical` text
+    columns into categoricals; `keep_columns` keep their dtypes.
+    """
+    keep = set(keep_columns)
+    changes = {}
+    for col in df.columns:
+        s = df[col]
+        if col in keep:
+            continue
+        if col in categorical and _is_text(s):
+            changes[col] = s.astype("category")
+        elif pd.api.types.is_numeric_dtype(s.dtype) and not pd.api.types.is_bool_dtype(s.dtype):
+            target = _narrowest(s)
+            if target is not None:
+                changes[col] = s.astype(target)
+    if changes:
+        df = df.copy(deep=False)
+        for col, s in changes.items():
+            df[col] = s
+    return df
+
+
+def _sample(fileobj: BinaryIO) -> Tuple[pd.DataFrame, float, bool]:
+    """(default-dtype sample, seconds taken, whether it is the whole file); the file is rewound."""
+    pos = fileobj.tell()
+    started = time.perf_counter()
+    sample = pd.read_csv(fileobj, nrows=SAMPLE_ROWS)
+    seconds = time.perf_counter() - started
+    # A file of exactly SAMPLE_ROWS rows is treated as longer, which only costs a second parse
+    whole = sample.shape[0] < SAMPLE_ROWS
+    fileobj.seek(pos)
+    return sample, seconds, whole
+
+
+def _summary(info: dict, engine: str, rows: int, seconds: float, memory: int,
+             dtypes: dict, baseline_memory=None, baseline_seconds=None, estimated=False, streaming=False):
+    """Fills `info` with what was parsed and how it compares with a default-dtype parse."""
+    info.update({
+        "engine": engine,
+        "compact_dtypes": COMPACT_DTYPES,
+        "streaming": streaming,
+        "rows": rows,
+        "parse_seconds": round(seconds, 4),
+        "memory_bytes": memory,
+        "baseline_memory_bytes": baseline_memory,
+        "memory_saved_pct": round(100 * (1 - memory / baseline_memory), 1) if baseline_memory else None,
+        "baseline_parse_seconds": round(baseline_seconds, 4) if baseline_seconds is not None else None,
+        "parse_speedup": round(baseline_seconds / seconds, 2) if baseline_seconds and seconds else None,
+        # Baselines scaled up from the sample rather than measured on the whole file
+        "baseline_estimated": estimated,
+        "dtypes": {str(col): str(dtype) for col, dtype in dtypes.items()},
+    })
+
+
+def _read_csv_arrow(fileobj: BinaryIO, sample: pd.DataFrame, plan: Dict[str, List[str]]) -> pd.DataFrame:
+    import pyarrow.csv as pa_csv
+
+    # Text columns are typed explicitly so Arrow's own date inference only applies to chosen ones
+    column_types = {}
+    for col in sample.columns:
+        if col in plan["categorical"]:
+            column_types[col] = pa.dictionary(pa.int32(), pa.string())
+        elif _is_text(sample[col]) and col not in plan["dates"]:
+            column_types[col] = pa.string()
+    table = pa_csv.read_csv(fileobj, convert_options=pa_csv.ConvertOptions(column_types=column_types))
+    # Dictionary columns convert to pandas categoricals, everything else stays Arrow-backed
+    return table.to_pandas(types_mapper=lambda t: None if pa.types.is_dictionary(t) else pd.ArrowDtype(t))
+
+
+def read_full(fileobj: BinaryIO, filename: str, info: dict = None, keep_columns: Iterable[str] = ()) -> pd.DataFrame:
+    """
+    Parses a whole upload. With COMPACT_DTYPES, CSV column types are chosen
+    from a sample before the full parse; `info` (if given) receives the
+    parse time, dtypes and memory compared with a default-dtype parse.
+    """
+    info = {} if info is None else info
+    if not filename.endswith('.csv'):
+        started = time.perf_counter()
+        df = pd.read_excel(fileobj)
+        baseline = _memory(df)
+        if COMPACT_DTYPES:
+            df = compact_frame(df, keep_columns=keep_columns)
+        _summary(info, "excel", df.shape[0], time.perf_counter() - started, _memory(df), df.dtypes.to_dict(), baseline)
+        return df
+
+    if not COMPACT_DTYPES and CSV_ENGINE != "pyarrow":
+        started = time.perf_counter()
+        df = pd.read_csv(fileobj)
+        _summary(info, "c", df.shape[0], time.perf_counter() - started, _memory(df), df.dtypes.to_dict())
+        return df
+
+    sample, sample_seconds, whole = _sample(fileobj)
+    plan = infer_dtypes(sample, keep_columns) if COMPACT_DTYPES else {"categorical": [], "dates": []}
+    started = time.perf_counter()
+    if CSV_ENGINE == "pyarrow":
+        df = _read_csv_arrow(fileobj, sample, plan)
+    elif whole:
+        # The sample already is the file: convert it instead of parsing twice
+        df = sample.copy()
+        for col in plan["dates"]:
+            df[col] = pd.to_datetime(df[col], errors="coerce", format="ISO8601")
+    else:
+        df = pd.read_csv(
+            fileobj, dtype={col: "category" for col in plan["categorical"]},
+            parse_dates=plan["dates"], date_format="ISO8601",
+        )
+    if COMPACT_DTYPES:
+        df = compact_frame(df, plan["categorical"], keep_columns)
+    seconds = time.perf_counter() - started
+    if whole:
+        # A sample-only file is parsed once, so count the sample against it
+        seconds += sample_seconds
+
+    rows = df.shape[0]
+    scale = rows / sample.shape[0] if sample.shape[0] else 0
+    _summary(
+        info, CSV_ENGINE, rows, seconds, _memory(df), df.dtypes.to_dict(),
+        baseline_memory=int(_memory(sample) * scale), baseline_seconds=sample_seconds * scale,
+        estimated=not whole,
+    )
+    return df
+
+
+def _iter_excel_chunks(fileobj: BinaryIO, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    # openpyxl's read-only mode streams sheet rows instead of building the whole workbook
+    from openpyxl import load_workbook
+
+    wb = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunk_rows:
+                yield pd.DataFrame(batch, columns=header).infer_objects()
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header).infer_objects()
+    finally:
+        wb.close()
+
+
+def iter_chunks(
+    fileobj: BinaryIO, filename: str, chunk_rows: int = CHUNK_ROWS,
+    info: dict = None, keep_columns: Iterable[str] = (),
+) -> Iterator[pd.DataFrame]:
+    """
+    Yields the upload as DataFrames of at most `chunk_rows` rows, with the
+    same dtype handling as read_full. Only pandas' parser is used: Arrow's
+    streaming reader fixes column types from its first block, so a later
+    block could fail to parse. `info` is filled in after the last chunk.
+    """
+    info = {} if info is None else info
+    plan = {"categorical": [], "dates": []}
+    sample = None
+    sample_seconds = 0.0
+    if filename.endswith('.csv'):
+        engine = "c"
+        if COMPACT_DTYPES:
+            sample, sample_seconds, _ = _sample(fileobj)
+            plan = infer_dtypes(sample, keep_columns)
+        chunks = pd.read_csv(
+            fileobj, chunksize=chunk_rows, dtype={col: "category" for col in plan["categorical"]},
+            parse_dates=plan["dates"], date_format="ISO8601",
+        )
+    else:
+        engine = "excel"
+        chunks = _iter_excel_chunks(fileobj, chunk_rows)
+
+    rows = memory = baseline_memory = 0
+    seconds = 0.0
+    dtypes = {}
+    try:
+        while True:
+            started = time.perf_counter()
+            chunk = next(chunks, None)
+            if chunk is None:
+                break
+            if sample is None:
+                baseline_memory += _memory(chunk)
+            if COMPACT_DTYPES:
+                chunk = compact_frame(chunk, plan["categorical"], keep_columns)
+            seconds += time.perf_counter() - started
+            rows += chunk.shape[0]
+            memory += _memory(chunk)
+            dtypes = chunk.dtypes.to_dict()
+            yield chunk
+    finally:
+        if hasattr(chunks, "close"):
+            chunks.close()
+
+    scale = rows / sample.shape[0] if sample is not None and sample.shape[0] else 0
+    if sample is not None:
+        baseline_memory = int(_memory(sample) * scale)
+    _summary(
+        info, engine, rows, seconds, memory, dtypes,
+        baseline_memory=baseline_memory or None,
+        baseline_seconds=sample_seconds * scale if sample is not None else None,
+        estimated=sample is not None, streaming=True,
+    )
+
+
+def extract_archive(fileobj: BinaryIO, target_dir: str) -> List[Tuple[str, str]]:
+    """
+    Extracts the CSV/Excel members of a zip upload into `target_dir` and
+    returns (path, filename) pairs. Members are written under generated
+    names, so archive paths never decide where files land.
+    """
+    extracted = []
+    with zipfile.ZipFile(fileobj) as archive:
+        for i, info in enumerate(archive.infolist()):
+            filename = os.path.basename(info.filename)
+            if info.is_dir() or filename.startswith('.') or not filename.endswith(SUPPORTED_EXTENSIONS):
+                continue
+            path = os.path.join(target_dir, f"{i}{os.path.splitext(filename)[1]}")
+            with archive.open(info) as src, open(path, "wb") as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            extracted.append((path, filename))
+    return extracted
@@ -0,0 +1,218 @@
+import datetime
+import hashlib
+import json
+import os
+import queue
+import threading
+import traceback
+import uuid
+from typing import BinaryIO, Callable, Sequence
+
+from utils import catalog
+
+JOBS_DIR = "data/jobs"
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "16"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    upload_path TEXT NOT NULL,
+    options TEXT NOT NULL,
+    status TEXT NOT NULL,
+    stages TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+"""
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at capacity; callers should retry later."""
+
+
+def _now() -> str:
+    return datetime.datetime.now().isoformat()
+
+
+class JobManager:
+    """
+    Local in-process job backend: a bounded queue drained by worker threads.
+
+    Job state and the uploaded file are persisted under data/, so jobs that
+    were queued or running when the process stopped are re-run on start.
+    `runner(fileobj, filename, options, on_stage)` does the actual work and
+    returns a JSON-serializable result.
+    """
+
+    def __init__(
+        self,
+        runner: Callable,
+        stages: Sequence[str],
+        workers: int = JOB_WORKERS,
+        queue_size: int = JOB_QUEUE_SIZE,
+    ):
+        self.runner = runner
+        self.stages = tuple(stages)
+        self.workers = workers
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._threads = []
+        self._stopping = threading.Event()
+
+    def start(self):
+        self._stopping.clear()
+        # Anything left from a previous run is re-read from the jobs table below
+        self._queue = queue.Queue(maxsize=self._queue.maxsize)
+        if not os.path.exists(JOBS_DIR):
+            os.makedirs(JOBS_DIR)
+        with catalog.connect() as conn:
+            conn.executescript(_SCHEMA)
+            pending = [
+                r["id"] for r in conn.execute(
+                    "SELECT id FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at"
+                )
+            ]
+            # Interrupted jobs restart from the first stage
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', stages = ?, updated_at = ? WHERE status = 'running'",
+                (json.dumps(self._initial_stages()), _now()),
+            )
+
+        for _ in range(self.workers):
+            t = threading.Thread(target=self._work, daemon=True)
+            t.start()
+            self._threads.append(t)
+
+        if pending:
+            # Off the startup path, so recovery respects the queue bound without stalling startup
+            threading.Thread(target=self._requeue, args=(pending,), daemon=True).start()
+
+    def _requeue(self, job_ids: list):
+        for job_id in job_ids:
+            while not self._stopping.is_set():
+                try:
+                    self._queue.put(job_id, timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
+
+    def stop(self):
+        # Workers check the flag before each job; the sentinels only wake idle ones,
+        # so a full queue cannot block shutdown (its jobs stay queued for the next start)
+        self._stopping.set()
+        for _ in self._threads:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+        for t in self._threads:
+            t.join(timeout=5)
+        self._threads = []
+
+    def _initial_stages(self) -> dict:
+        return {name: {"status": "pending"} for name in self.stages}
+
+    def submit(self, fileobj: BinaryIO, filename: str, options: dict = None) -> str:
+        if self._queue.full():
+            raise QueueFullError("Job queue is full")
+
+        job_id = str(uuid.uuid4())
+        upload_path = os.path.join(JOBS_DIR, job_id + os.path.splitext(filename)[1])
+        # Hash the bytes while they are copied, so the runner does not re-read them
+        digest = hashlib.sha256()
+        with open(upload_path, "wb") as f:
+            for block in iter(lambda: fileobj.read(1024 * 1024), b""):
+                digest.update(block)
+                f.write(block)
+        options = dict(options or {}, content_sha256=digest.hexdigest())
+
+        now = _now()
+        with catalog.connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, filename, upload_path, options, status, stages, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, filename, upload_path, json.dumps(options),
+                 json.dumps(self._initial_stages()), now, now),
+            )
+
+        try:
+            self._queue.put_nowait(job_id)
+        except queue.Full:
+            self._delete(job_id, upload_path)
+            raise QueueFullError("Job queue is full")
+        return job_id
+
+    def get(self, job_id: str) -> dict:
+        with catalog.connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        stages = json.loads(row["stages"])
+        done = sum(1 for s in stages.values() if s["status"] in ("done", "cached"))
+        return {
+            "job_id": row["id"],
+            "filename": row["filename"],
+            "status": row["status"],
+            "progress": round(done / len(stages), 2) if stages else 0.0,
+            "stages": stages,
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+        }
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def _delete(self, job_id: str, upload_path: str):
+        with catalog.connect() as conn:
+            conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        if os.path.exists(upload_path):
+            os.remove(upload_path)
+
+    def _update(self, job_id: str, **fields):
+        fields["updated_at"] = _now()
+        assignments = ", ".join(f"{k} = ?" for k in fields)
+        with catalog.connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def _work(self):
+        while True:
+            job_id = self._queue.get()
+            try:
+                if job_id is None or self._stopping.is_set():
+                    return
+                self._run(job_id)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job_id: str):
+        with catalog.connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None or row["status"] != "queued":
+            return
+
+        stages = self._initial_stages()
+        self._update(job_id, status="running", stages=json.dumps(stages))
+
+        def on_stage(name, state):
+            entry = stages.setdefault(name, {})
+            entry["status"] = state
+            entry["started_at" if state == "running" else "finished_at"] = _now()
+            self._update(job_id, stages=json.dumps(stages))
+
+        try:
+            with open(row["upload_path"], "rb") as f:
+                result = self.runner(f, row["filename"], json.loads(row["options"]), on_stage)
+            self._update(job_id, status="done", result=json.dumps(result))
+        except Exception as e:
+            print(f"Job {job_id} failed: {e}\n{traceback.format_exc()}")
+            self._update(job_id, status="failed", error=str(e))
+        finally:
+            if os.path.exists(row["upload_path"]):
+                os.remove(row["upload_path"])
@@ -0,0 +1,92 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from utils import catalog
+
+# Entries older than the TTL are treated as misses; beyond MAX_ENTRIES the least recently used go first
+TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    value TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache (last_access);
+"""
+
+_lock = threading.Lock()
+_metrics = {"hits": 0, "misses": 0, "evictions": 0}
+_initialized = False
+
+
+def _ensure_schema():
+    global _initialized
+    if _initialized:
+        return
+    with catalog.connect() as conn:
+        conn.executescript(_SCHEMA)
+    _initialized = True
+
+
+def _count(name: str, n: int = 1):
+    with _lock:
+        _metrics[name] += n
+
+
+def cache_key(prompt: str, **params) -> str:
+    """Canonical SHA-256 over the rendered prompt and the model parameters."""
+    payload = json.dumps({"prompt": prompt, "params": params}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get(key: str):
+    _ensure_schema()
+    now = time.time()
+    with catalog.connect() as conn:
+        row = conn.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is not None and now - row["created_at"] > TTL_SECONDS:
+            conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            _count("evictions")
+            row = None
+        if row is None:
+            _count("misses")
+            return None
+        conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+    _count("hits")
+    return row["value"]
+
+
+def put(key: str, model: str, value: str):
+    _ensure_schema()
+    now = time.time()
+    with catalog.connect() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, model, value, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+            (key, model, value, now, now),
+        )
+        evicted = conn.execute(
+            "DELETE FROM llm_cache WHERE key IN ("
+            "SELECT key FROM llm_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (MAX_ENTRIES,),
+        ).rowcount
+    if evicted:
+        _count("evictions", evicted)
+
+
+def stats() -> dict:
+    _ensure_schema()
+    with catalog.connect() as conn:
+        entries = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+    with _lock:
+        snapshot = dict(_metrics)
+    lookups = snapshot["hits"] + snapshot["misses"]
+    snapshot["entries"] = entries
+    snapshot["hit_ratio"] = round(snapshot["hits"] / lookups, 4) if lookups else 0.0
+    return snapshot
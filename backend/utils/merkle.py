@@ -0,0 +1,79 @@
+"""
+SHA-256 Merkle trees over report hashes, matching AuditTraceability.verifyReport.
+
+Leaves are sha256(0x00 || report_hash) and inner nodes sha256(0x01 || a || b)
+with the pair sorted, so proofs need no left/right flags and a leaf can never
+be passed off as an inner node. An odd node at the end of a level is carried
+up unchanged.
+"""
+import hashlib
+from typing import List
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+def to_bytes32(value: str) -> bytes:
+    """Parses a 64-digit hex string, with or without 0x, into 32 bytes."""
+    if not isinstance(value, str):
+        raise ValueError(f"Not a 32-byte hex value: {value!r}")
+    raw = value[2:] if value.startswith(("0x", "0X")) else value
+    try:
+        data = bytes.fromhex(raw)
+    except ValueError:
+        data = b""
+    if len(data) != 32:
+        raise ValueError(f"Not a 32-byte hex value: {value}")
+    return data
+
+
+def to_hex(value: bytes) -> str:
+    return "0x" + value.hex()
+
+
+def leaf_hash(report_hash: str) -> bytes:
+    return hashlib.sha256(LEAF_PREFIX + to_bytes32(report_hash)).digest()
+
+
+def node_hash(a: bytes, b: bytes) -> bytes:
+    low, high = (a, b) if a <= b else (b, a)
+    return hashlib.sha256(NODE_PREFIX + low + high).digest()
+
+
+def build_levels(report_hashes: List[str]) -> List[List[bytes]]:
+    """All tree levels, leaves first and the root level last."""
+    if not report_hashes:
+        raise ValueError("Cannot build a Merkle tree without leaves")
+    levels = [[leaf_hash(h) for h in report_hashes]]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def merkle_root(report_hashes: List[str]) -> str:
+    return to_hex(build_levels(report_hashes)[-1][0])
+
+
+def inclusion_proof(levels: List[List[bytes]], index: int) -> List[str]:
+    """Sibling hashes from the leaf at `index` up to the root."""
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append(to_hex(level[sibling]))
+        index //= 2
+    return proof
+
+
+def verify_proof(report_hash: str, proof: List[str], root: str) -> bool:
+    try:
+        node = leaf_hash(report_hash)
+        for sibling in proof:
+            node = node_hash(node, to_bytes32(sibling))
+        return node == to_bytes32(root)
+    except ValueError:
+        return False
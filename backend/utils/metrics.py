@@ -0,0 +1,288 @@
+"""
+Instrumentation of audit runs.
+
+Each run collects a RequestMetrics (per-stage seconds, rows and bytes
+ingested, LLM calls/tokens/latency, peak memory) that is stored with its
+report, and the same numbers feed process-wide counters and histograms that
+/metrics serves in the Prometheus text format. The registry is a few dicts
+behind a lock, like the LLM cache counters, so no client library is needed.
+
+Optionally a run can be profiled (cProfile, or pyinstrument when installed
+and PROFILER=pyinstrument); the trace is written to data/profiles.
+"""
+import contextvars
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Tuple
+
+PROFILES_DIR = "data/profiles"
+PROFILER = os.getenv("PROFILER", "cprofile")
+
+# Seconds; upper bounds of the histogram buckets (+Inf is implicit)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+_HELP = {
+    "audit_runs_total": ("counter", "Audit runs by outcome (success, cached, error)."),
+    "audit_run_seconds": ("histogram", "Wall time of whole audit runs."),
+    "audit_stage_seconds": ("histogram", "Wall time per pipeline stage (parse is part of analyst)."),
+    "audit_rows_total": ("counter", "Rows ingested by audit runs."),
+    "audit_bytes_total": ("counter", "Upload bytes ingested by audit runs."),
+    "audit_peak_rss_bytes": ("gauge", "Process peak resident memory during the last audit run."),
+    "llm_requests_total": ("counter", "Advisor LLM requests, by whether the response cache answered."),
+    "llm_tokens_total": ("counter", "Advisor LLM tokens, by direction."),
+    "llm_request_seconds": ("histogram", "Latency of advisor LLM calls that reached the model."),
+    "llm_first_token_seconds": ("histogram", "Time to the first token of streamed advisor LLM calls."),
+    "llm_cache_entries": ("gauge", "Entries in the advisor response cache."),
+}
+
+_lock = threading.Lock()
+_counters: Dict[Tuple[str, tuple], float] = {}
+_gauges: Dict[Tuple[str, tuple], float] = {}
+_histograms: Dict[Tuple[str, tuple], list] = {}
+
+_current: contextvars.ContextVar = contextvars.ContextVar("audit_metrics", default=None)
+
+
+def _key(name: str, labels: dict) -> Tuple[str, tuple]:
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name: str, value: float = 1, **labels):
+    with _lock:
+        key = _key(name, labels)
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def set_gauge(name: str, value: float, **labels):
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def observe(name: str, value: float, **labels):
+    with _lock:
+        # [per-bucket counts..., sum, count]
+        hist = _histograms.setdefault(_key(name, labels), [0] * len(LATENCY_BUCKETS) + [0.0, 0])
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                hist[i] += 1
+        hist[-2] += value
+        hist[-1] += 1
+
+
+def _labels(labels: tuple, extra: str = None) -> str:
+    parts = [f'{k}="{v}"' for k, v in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    with _lock:
+        counters, gauges = dict(_counters), dict(_gauges)
+        histograms = {k: list(v) for k, v in _histograms.items()}
+
+    lines = []
+    for name, (kind, text) in _HELP.items():
+        source = {"counter": counters, "gauge": gauges, "histogram": histograms}[kind]
+        series = sorted((labels, value) for (n, labels), value in source.items() if n == name)
+        if not series:
+            continue
+        lines.append(f"# HELP {name} {text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in series:
+            if kind != "histogram":
+                lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                continue
+            for bound, count in zip(LATENCY_BUCKETS, value):
+                le = 'le="%g"' % bound
+                lines.append(f"{name}_bucket{_labels(labels, le)} {count}")
+            le = 'le="+Inf"'
+            lines.append(f"{name}_bucket{_labels(labels, le)} {value[-1]}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(value[-2])}")
+            lines.append(f"{name}_count{_labels(labels)} {value[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+def _reset_peak_rss():
+    # Linux: writing 5 resets the VmHWM high-water mark (harmless to skip elsewhere)
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_bytes() -> int:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # ru_maxrss is KiB on Linux, bytes on macOS, and never reset
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RequestMetrics:
+    """
+    Measurements of one audit run. Peak memory is the process high-water
+    mark since the run started, so runs that overlap share it; pass
+    track_memory=False where other work dominates the process (batches).
+    """
+
+    def __init__(self, track_memory: bool = True):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.rows = 0
+        self.bytes = 0
+        self.llm = {"requests": 0, "cached": 0, "input_tokens": 0, "output_tokens": 0, "seconds": 0.0,
+                    "first_token_seconds": None}
+        self.track_memory = track_memory
+        self._open: Dict[str, float] = {}
+        if track_memory:
+            _reset_peak_rss()
+
+    def start_stage(self, name: str):
+        self._open[name] = time.perf_counter()
+
+    def end_stage(self, name: str):
+        started = self._open.pop(name, None)
+        if started is not None:
+            self.add_stage(name, time.perf_counter() - started)
+
+    def add_stage(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+        observe("audit_stage_seconds", seconds, stage=name)
+
+    @contextmanager
+    def stage(self, name: str):
+        self.start_stage(name)
+        try:
+            yield
+        finally:
+            self.end_stage(name)
+
+    def add_input(self, rows: int, size: int):
+        self.rows += rows
+        self.bytes += size
+        inc("audit_rows_total", rows)
+        inc("audit_bytes_total", size)
+
+    def finish(self, status: str) -> dict:
+        seconds = time.perf_counter() - self.started
+        inc("audit_runs_total", status=status)
+        if status != "cached":
+            observe("audit_run_seconds", seconds)
+        peak = peak_rss_bytes() if self.track_memory else None
+        if peak is not None:
+            set_gauge("audit_peak_rss_bytes", peak)
+        llm = dict(self.llm, seconds=round(self.llm["seconds"], 4))
+        if llm["first_token_seconds"] is not None:
+            llm["first_token_seconds"] = round(llm["first_token_seconds"], 4)
+        return {
+            "seconds": round(seconds, 4),
+            "stages": {name: round(s, 4) for name, s in self.stages.items()},
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "llm": llm,
+            "peak_rss_bytes": peak,
+        }
+
+
+@contextmanager
+def activate(request: RequestMetrics):
+    """Makes `request` the run that record_llm() attributes calls to, in this thread/context."""
+    token = _current.set(request)
+    try:
+        yield request
+    finally:
+        _current.reset(token)
+
+
+def record_llm(seconds: float = 0.0, input_tokens: int = 0, output_tokens: int = 0, cached: bool = False,
+               first_token_seconds: float = None):
+    inc("llm_requests_total", cached="true" if cached else "false")
+    if not cached:
+        observe("llm_request_seconds", seconds)
+        if first_token_seconds is not None:
+            observe("llm_first_token_seconds", first_token_seconds)
+        inc("llm_tokens_total", input_tokens, direction="input")
+        inc("llm_tokens_total", output_tokens, direction="output")
+    request = _current.get()
+    if request is not None:
+        request.llm["requests"] += 1
+        request.llm["cached"] += int(cached)
+        request.llm["input_tokens"] += input_tokens
+        request.llm["output_tokens"] += output_tokens
+        request.llm["seconds"] += seconds
+        if first_token_seconds is not None:
+            request.llm["first_token_seconds"] = first_token_seconds
+
+
+def profile_path(report_id: str) -> Optional[str]:
+    """Stored trace of a profiled run of the report, if any."""
+    for suffix in (".prof", ".html"):
+        path = os.path.join(PROFILES_DIR, report_id + suffix)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def remove_profile(report_id: str):
+    path = profile_path(report_id)
+    if path is not None:
+        os.remove(path)
+
+
+def run_profiled(fn: Callable, *args, **kwargs) -> dict:
+    """
+    Calls `fn` (which returns an upload response with an "id") under the
+    profiler and stores the trace as data/profiles/<id>.prof (cProfile,
+    readable with pstats/snakeviz) or .html (pyinstrument).
+    """
+    os.makedirs(PROFILES_DIR, exist_ok=True)
+    pyinstrument = None
+    if PROFILER == "pyinstrument":
+        try:
+            import pyinstrument
+        except ImportError:
+            pass
+
+    if pyinstrument is not None:
+        profiler = pyinstrument.Profiler()
+        profiler.start()
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            profiler.stop()
+        remove_profile(result["id"])
+        path = os.path.join(PROFILES_DIR, result["id"] + ".html")
+        with open(path, "w") as f:
+            f.write(profiler.output_html())
+        fmt = "pyinstrument-html"
+    else:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        try:
+            result = profiler.runcall(fn, *args, **kwargs)
+        finally:
+            profiler.disable()
+        remove_profile(result["id"])
+        path = os.path.join(PROFILES_DIR, result["id"] + ".prof")
+        profiler.dump_stats(path)
+        fmt = "cprofile"
+
+    result["profile"] = {"file": os.path.basename(path), "format": fmt}
+    return result
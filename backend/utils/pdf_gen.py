@@ -1,66 +1,201 @@
 from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
+from functools import lru_cache
+from xml.sax.saxutils import escape
+from typing import BinaryIO, Tuple
+import hashlib
 import io
 import json
+import os
 
-def generate_pdf_report(analysis_data: dict, recommendations: str, filename: str = "report.pdf") -> io.BytesIO:
-    """
-    Generates a PDF report containing analysis stats and recommendations.
-    Returns a BytesIO object.
-    """
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    styles = getSampleStyleSheet()
-    story = []
-
-
-
-    title_style = styles['Title']
-    story.append(Paragraph(f"Audit & Traceability Report: {filename}", title_style))
-    story.append(Spacer(1, 12))
-
-
-
-    story.append(Paragraph("1. Data Analysis Summary", styles['Heading1']))
-    
 
+@lru_cache(maxsize=1)
+def get_styles() -> dict:
+    """Paragraph styles, built once per process instead of once per report."""
+    styles = getSampleStyleSheet()
+    return {
+        "title": styles['Title'],
+        "h1": styles['Heading1'],
+        "h3": styles['Heading3'],
+        "normal": styles['Normal'],
+        # spaceAfter replaces the Spacer flowable that used to follow every line
+        "line": ParagraphStyle("ReportLine", parent=styles['Normal'], spaceAfter=4),
+    }
+
+
+def _text(value) -> str:
+    # Paragraph parses its text as markup; report content is plain text
+    return escape(str(value))
+
+
+# Value columns shown per line in the group statistics section
+PDF_GROUP_COLUMNS = 4
+
+
+def _number(value) -> str:
+    return "n/a" if value is None else f"{value:,.2f}"
+
+
+def _change(stats: dict) -> str:
+    pct = stats.get("pct_change")
+    return "" if pct is None else f" ({pct:+.1f}% MoM)"
+
+
+def iter_group_story(groups: dict, styles: dict):
+    """Per-period and per-group means, with month-over-month changes."""
+    normal = styles['normal']
+    yield Paragraph("Group Statistics", styles['h3'])
+    by_period = groups.get("by_period") or {}
+    if by_period:
+        yield Paragraph(f"By {_text(groups['period_column'])}:", normal)
+        for period, entry in by_period.items():
+            cols = list(entry["columns"].items())[:PDF_GROUP_COLUMNS]
+            parts = "; ".join(f"{_text(c)} mean {_number(s['mean'])}{_change(s)}" for c, s in cols)
+            yield Paragraph(f"- {_text(period)}: {entry['rows']:,} rows; {parts}", normal)
+
+    for dim, values in (groups.get("dimensions") or {}).items():
+        yield Paragraph(f"By {_text(dim)}:", normal)
+        for value, entry in values.items():
+            latest = list(entry.get("periods", {}).values())[-1:]
+            parts = []
+            for col, stats in list(entry["columns"].items())[:PDF_GROUP_COLUMNS]:
+                change = _change(latest[0]["columns"].get(col, {})) if latest else ""
+                parts.append(f"{_text(col)} mean {_number(stats['mean'])}{change}")
+            yield Paragraph(f"- {_text(value)}: {entry['rows']:,} rows; {'; '.join(parts)}", normal)
+
+
+def iter_anomaly_story(anomalies: dict, styles: dict):
+    """Per-column outlier counts with the worst rows."""
+    normal = styles['normal']
+    yield Paragraph("Anomalies", styles['h3'])
+    flagged = [(c, e) for c, e in anomalies.get("columns", {}).items() if e.get("iqr_outliers")]
+    if not flagged:
+        yield Paragraph("No outliers outside the IQR fences.", normal)
+    for col, e in flagged:
+        approx = "~" if e.get("approximate") else ""
+        worst = ", ".join(f"row {r['row']} ({_number(r['value'])}, z={r['robust_z']:.1f})" for r in e["top_rows"][:3])
+        yield Paragraph(
+            f"- {_text(col)}: {approx}{e['iqr_outliers']:,} rows outside "
+            f"[{_number(e['lower_fence'])}, {_number(e['upper_fence'])}], "
+            f"{approx}{e['zscore_outliers']:,} with |robust z| > {anomalies['settings']['z_threshold']}"
+            + (f"; worst: {_text(worst)}" if worst else ""),
+            normal,
+        )
+    forest = anomalies.get("isolation_forest")
+    if forest:
+        top = ", ".join(f"row {r['row']} ({r['score']:.2f})" for r in forest["top_rows"][:5])
+        yield Paragraph(
+            f"- Isolation forest: {forest['flagged']:,} of {forest['scored_rows']:,} rows scored above "
+            f"{forest['threshold']}" + (f"; highest: {top}" if top else ""),
+            normal,
+        )
+
+
+def iter_story(analysis_data: dict, recommendations: str, filename: str, report_id: str = None):
+    """Yields the report flowables in order."""
+    styles = get_styles()
+    normal = styles['normal']
+    yield Paragraph(f"Audit & Traceability Report: {_text(filename)}", styles['title'])
+    if report_id:
+        yield Paragraph(f"Report ID: {_text(report_id)}", normal)
+    yield Spacer(1, 12)
+    yield Paragraph("1. Data Analysis Summary", styles['h1'])
 
     qual = analysis_data.get("quality_analysis")
     if qual:
-
-
         if isinstance(qual, str):
             try:
                 qual = json.loads(qual)
-            except:
+            except ValueError:
                 pass
-        
+
         if isinstance(qual, dict):
             score = qual.get("score", "N/A")
-            story.append(Paragraph(f"Data Quality Score: {score}/100", styles['Normal']))
+            yield Paragraph(f"Data Quality Score: {_text(score)}/100", normal)
             issues = qual.get("issues", [])
             if issues:
-                story.append(Paragraph("Issues Found:", styles['Heading3']))
+                yield Paragraph("Issues Found:", styles['h3'])
                 for issue in issues:
-                    story.append(Paragraph(f"- {issue}", styles['Normal']))
+                    yield Paragraph(f"- {_text(issue)}", normal)
         else:
-             story.append(Paragraph(f"Quality Analysis: {str(qual)}", styles['Normal']))
-
-    story.append(Spacer(1, 12))
-
+            yield Paragraph(f"Quality Analysis: {_text(qual)}", normal)
 
+    groups = (analysis_data.get("statistics") or {}).get("group_statistics")
+    if groups:
+        yield from iter_group_story(groups, styles)
 
-    story.append(Paragraph("2. AI Recommendations", styles['Heading1']))
+    anomalies = analysis_data.get("anomalies")
+    if anomalies:
+        yield from iter_anomaly_story(anomalies, styles)
 
+    yield Spacer(1, 12)
+    yield Paragraph("2. AI Recommendations", styles['h1'])
 
-    
+    line_style = styles['line']
     for line in recommendations.split('\n'):
         if line.strip():
-            story.append(Paragraph(line, styles['Normal']))
-            story.append(Spacer(1, 4))
-            
-    doc.build(story)
+            yield Paragraph(_text(line), line_style)
+
+
+class HashingWriter:
+    """Write-through file wrapper computing the SHA-256 of everything written."""
+
+    def __init__(self, target: BinaryIO):
+        self.target = target
+        self.size = 0
+        self._digest = hashlib.sha256()
+
+    def write(self, data: bytes) -> int:
+        self._digest.update(data)
+        self.size += len(data)
+        return self.target.write(data)
+
+    def flush(self):
+        self.target.flush()
+
+    def hexdigest(self) -> str:
+        return self._digest.hexdigest()
+
+
+def write_pdf_report(out: BinaryIO, analysis_data: dict, recommendations: str, filename: str = "report.pdf",
+                     report_id: str = None):
+    """Renders the report into any writable binary file object."""
+    # invariant: no creation date or random document id, so the same report renders to the same bytes.
+    # The printed report id is what keeps two reports of identical analyses from sharing a hash,
+    # which the V2 contracts would reject as already certified.
+    doc = SimpleDocTemplate(out, pagesize=letter, invariant=1, pageCompression=1)
+    doc.build(list(iter_story(analysis_data, recommendations, filename, report_id)))
+
+
+def render_pdf_file(path: str, analysis_data: dict, recommendations: str, filename: str = "report.pdf",
+                    report_id: str = None) -> Tuple[str, int]:
+    """
+    Renders to `path` (atomically), hashing the bytes on their way to disk.
+    Returns (sha256 hex, size). reportlab assembles the whole document in
+    memory before writing it, so memory grows with the report; what this
+    saves is the extra BytesIO copy and a second pass to hash it.
+    """
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            writer = HashingWriter(f)
+            write_pdf_report(writer, analysis_data, recommendations, filename, report_id)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return writer.hexdigest(), writer.size
+
+
+def generate_pdf_report(analysis_data: dict, recommendations: str, filename: str = "report.pdf",
+                        report_id: str = None) -> io.BytesIO:
+    """
+    Generates a PDF report containing analysis stats and recommendations.
+    Returns a BytesIO object.
+    """
+    buffer = io.BytesIO()
+    write_pdf_report(buffer, analysis_data, recommendations, filename, report_id)
     buffer.seek(0)
     return buffer
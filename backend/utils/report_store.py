@@ -0,0 +1,230 @@
+import gzip
+import io
+import json
+import os
+import uuid
+from typing import TYPE_CHECKING
+
+# pandas is only needed for dataset payloads; metadata-only callers (listing,
+# certification, verification) never import it
+if TYPE_CHECKING:
+    import pandas as pd
+
+REPORTS_DIR = "data/reports"
+
+# Dataset payload encodings, keyed by file suffix
+PARQUET_SUFFIX = ".data.parquet"
+JSON_GZ_SUFFIX = ".data.json.gz"
+CSV_GZ_SUFFIX = ".data.csv.gz"
+PDF_SUFFIX = ".pdf"
+SKETCH_SUFFIX = ".sketch.json.gz"
+
+
+def metadata_path(report_id: str) -> str:
+    return os.path.join(REPORTS_DIR, report_id + ".json")
+
+
+def pdf_path(report_id: str) -> str:
+    """Where the exact PDF bytes that were hashed are kept, for re-verification and serving."""
+    return os.path.join(REPORTS_DIR, report_id + PDF_SUFFIX)
+
+
+def sketch_path(report_id: str) -> str:
+    """Mergeable analysis state, resumed when rows are appended to the report's dataset."""
+    return os.path.join(REPORTS_DIR, report_id + SKETCH_SUFFIX)
+
+
+def save_sketch(report_id: str, state: dict):
+    path = sketch_path(report_id)
+    tmp_path = path + ".tmp"
+    # Mostly base64 hash arrays that barely compress; favour speed
+    with gzip.open(tmp_path, "wt", compresslevel=1) as f:
+        json.dump(state, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def load_sketch(report_id: str) -> dict:
+    """The report's saved analysis state, or None for reports saved before sketches existed."""
+    try:
+        with gzip.open(sketch_path(report_id), "rt") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _write_json_atomic(path: str, data: dict):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def save_dataset(report_id: str, df: "pd.DataFrame") -> dict:
+    """
+    Writes the dataset payload next to the metadata document.
+    Parquet is preferred; frames pyarrow cannot encode fall back to gzipped JSON.
+    """
+    path = os.path.join(REPORTS_DIR, report_id + PARQUET_SUFFIX)
+    try:
+        df.to_parquet(path, compression="zstd")
+        return {"format": "parquet", "file": os.path.basename(path), "rows": int(df.shape[0])}
+    except Exception:
+        if os.path.exists(path):
+            os.remove(path)
+
+    path = os.path.join(REPORTS_DIR, report_id + JSON_GZ_SUFFIX)
+    with gzip.open(path, "wt", compresslevel=6) as f:
+        f.write(df.to_json())
+    return {"format": "json.gz", "file": os.path.basename(path), "rows": int(df.shape[0])}
+
+
+class ChunkedDatasetWriter:
+    """
+    Appends DataFrame chunks to a gzipped CSV payload as they are ingested,
+    so the full dataset never has to be held in memory.
+    """
+
+    def __init__(self):
+        self.tmp_path = os.path.join(REPORTS_DIR, f".{uuid.uuid4().hex}{CSV_GZ_SUFFIX}.tmp")
+        self._file = gzip.open(self.tmp_path, "wt", compresslevel=6, newline="")
+        self.rows = 0
+
+    def write(self, chunk: "pd.DataFrame"):
+        chunk.to_csv(self._file, header=self.rows == 0, index=False)
+        self.rows += int(chunk.shape[0])
+
+    def commit(self, report_id: str) -> dict:
+        self._file.close()
+        path = os.path.join(REPORTS_DIR, report_id + CSV_GZ_SUFFIX)
+        os.replace(self.tmp_path, path)
+        return {"format": "csv.gz", "file": os.path.basename(path), "rows": self.rows}
+
+    def discard(self):
+        self._file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+def _split_legacy(report_id: str, data: dict) -> dict:
+    """Moves an inline `final_data` string (pre-split layout) into its own blob."""
+    final_data = data.get("analysis", {}).pop("final_data", None)
+    if final_data is None:
+        return data
+    path = os.path.join(REPORTS_DIR, report_id + JSON_GZ_SUFFIX)
+    with gzip.open(path, "wt", compresslevel=6) as f:
+        f.write(final_data)
+    data["dataset"] = {"format": "json.gz", "file": os.path.basename(path)}
+    return data
+
+
+def save_report(report_id: str, data: dict, df: "pd.DataFrame" = None, dataset_writer: ChunkedDatasetWriter = None):
+    """Persists the metadata document and, when given, the dataset payload."""
+    data.get("analysis", {}).pop("final_data", None)
+    if df is not None:
+        data["dataset"] = save_dataset(report_id, df)
+    elif dataset_writer is not None:
+        data["dataset"] = dataset_writer.commit(report_id)
+    _write_json_atomic(metadata_path(report_id), data)
+
+
+def is_report_id(value) -> bool:
+    """Whether `value` has the form of a report id (a UUID), so it cannot name a path outside REPORTS_DIR."""
+    try:
+        return str(uuid.UUID(value)) == value
+    except (AttributeError, TypeError, ValueError):
+        return False
+
+
+def report_exists(report_id: str) -> bool:
+    return os.path.exists(metadata_path(report_id))
+
+
+def load_metadata(report_id: str) -> dict:
+    with open(metadata_path(report_id), "r") as f:
+        return json.load(f)
+
+
+def _read_dataset(data: dict) -> "pd.DataFrame":
+    """The report's own rows as a frame (a delta report stores only its appended rows)."""
+    import pandas as pd
+
+    legacy = data.get("analysis", {}).get("final_data")
+    if legacy is not None:
+        return pd.read_json(io.StringIO(legacy))
+
+    dataset = data.get("dataset")
+    if not dataset:
+        return None
+    path = os.path.join(REPORTS_DIR, dataset["file"])
+    if dataset["format"] == "parquet":
+        return pd.read_parquet(path)
+    if dataset["format"] == "csv.gz":
+        return pd.read_csv(path)
+    with gzip.open(path, "rt") as f:
+        return pd.read_json(f)
+
+
+def load_dataset_frame(data: dict) -> "pd.DataFrame":
+    """Full dataset of a report, following `base_report_id` links back through appended deltas."""
+    import pandas as pd
+
+    frames = []
+    while data is not None:
+        frame = _read_dataset(data)
+        if frame is not None:
+            frames.append(frame)
+        base_id = data.get("base_report_id")
+        data = load_metadata(base_id) if base_id and report_exists(base_id) else None
+    if not frames:
+        return None
+    return pd.concat(frames[::-1], ignore_index=True)
+
+
+def load_dataset_json(data: dict) -> str:
+    """Returns the dataset in the historical `df.to_json()` form."""
+    import pandas as pd
+
+    if data.get("base_report_id"):
+        df = load_dataset_frame(data)
+        return None if df is None else df.to_json()
+
+    legacy = data.get("analysis", {}).get("final_data")
+    if legacy is not None:
+        return legacy
+
+    dataset = data.get("dataset")
+    if not dataset:
+        return None
+    path = os.path.join(REPORTS_DIR, dataset["file"])
+    if dataset["format"] == "parquet":
+        return pd.read_parquet(path).to_json()
+    if dataset["format"] == "csv.gz":
+        return pd.read_csv(path).to_json()
+    with gzip.open(path, "rt") as f:
+        return f.read()
+
+
+def update_metadata(report_id: str, **fields) -> dict:
+    """Updates top-level metadata fields without touching the dataset payload."""
+    data = load_metadata(report_id)
+    data = _split_legacy(report_id, data)
+    data.update(fields)
+    _write_json_atomic(metadata_path(report_id), data)
+    return data
+
+
+def remove_report_files(report_id: str):
+    """
+    Removes the files stored next to a report's metadata (dataset payload in
+    any encoding, PDF, sketches), also when no metadata was written, e.g.
+    after a failed run.
+    """
+    for suffix in (PARQUET_SUFFIX, JSON_GZ_SUFFIX, CSV_GZ_SUFFIX, PDF_SUFFIX, SKETCH_SUFFIX):
+        path = os.path.join(REPORTS_DIR, report_id + suffix)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def delete_report(report_id: str):
+    remove_report_files(report_id)
+    os.remove(metadata_path(report_id))
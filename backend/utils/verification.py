@@ -0,0 +1,146 @@
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from utils import catalog
+from utils import chain_indexer
+from utils import report_store
+
+VERIFY_WORKERS = int(os.getenv("VERIFY_WORKERS", str(min(32, (os.cpu_count() or 1) * 4))))
+MAX_VERIFY_ITEMS = int(os.getenv("MAX_VERIFY_ITEMS", "100000"))
+
+# SQLite's default host parameter limit is 999 on older builds
+_SQL_CHUNK = 900
+
+
+def _chunks(items: List[str]):
+    for i in range(0, len(items), _SQL_CHUNK):
+        yield items[i:i + _SQL_CHUNK]
+
+
+def hash_file(path: str) -> str:
+    """SHA-256 of a stored PDF, or None if it is missing."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+
+def _recorded_hashes(report_ids: List[str]) -> Dict[str, str]:
+    found = {}
+    with catalog.connect() as conn:
+        for chunk in _chunks(report_ids):
+            for row in conn.execute(
+                f"SELECT id, report_hash FROM reports WHERE id IN ({','.join('?' * len(chunk))})", chunk
+            ):
+                found[row["id"]] = row["report_hash"]
+    return found
+
+
+def onchain_records(report_hashes: List[str]) -> Dict[str, dict]:
+    """
+    First indexed on-chain record per hash, either a direct certification or
+    the anchoring of a Merkle batch containing the hash. Served entirely from
+    the local event index, in a handful of queries for any number of hashes.
+    """
+    chain_indexer.ensure_schema()
+    records = {}
+    with catalog.connect() as conn:
+        for chunk in _chunks(sorted(set(report_hashes))):
+            marks = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT report_hash AS leaf, tx_hash, block_number, event, contract FROM chain_certifications "
+                f"WHERE report_hash IN ({marks}) "
+                f"UNION ALL SELECT r.report_hash AS leaf, c.tx_hash, c.block_number, c.event, c.contract "
+                f"FROM batch_reports r JOIN batches b ON b.id = r.batch_id "
+                f"JOIN chain_certifications c ON c.report_hash = substr(b.merkle_root, 3) "
+                f"WHERE r.report_hash IN ({marks}) ORDER BY block_number",
+                chunk + chunk,
+            )
+            for row in rows:
+                records.setdefault(row["leaf"], {
+                    "tx_hash": row["tx_hash"],
+                    "block_number": row["block_number"],
+                    "event": row["event"],
+                    "contract": row["contract"],
+                })
+    return records
+
+
+def _string_list(value, field: str) -> List[str]:
+    if value is None:
+        return []
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        raise ValueError(f"{field} must be a list of strings")
+    return value
+
+
+def verify_bulk(report_ids: List[str] = None, report_hashes: List[str] = None) -> dict:
+    """
+    Per-item verdicts for report ids (stored PDF re-hashed and compared with
+    the recorded hash, then looked up on-chain) and bare hashes (on-chain only):
+
+        match        hash re-computed from the PDF (if any) is certified on-chain
+        mismatch     the stored PDF no longer hashes to the recorded value
+        uncertified  the hash is not in the indexed chain events
+        not_found    unknown report id
+    """
+    report_ids = list(dict.fromkeys(_string_list(report_ids, "report_ids")))
+    report_hashes = [
+        chain_indexer.normalize_hash(h) for h in dict.fromkeys(_string_list(report_hashes, "report_hashes"))
+    ]
+    if len(report_ids) + len(report_hashes) > MAX_VERIFY_ITEMS:
+        raise ValueError(f"At most {MAX_VERIFY_ITEMS} items per request")
+
+    started = time.perf_counter()
+    recorded = _recorded_hashes(report_ids)
+    known_ids = [rid for rid in report_ids if rid in recorded]
+
+    # hashlib releases the GIL on large buffers, so threads re-hash in parallel
+    with ThreadPoolExecutor(max_workers=VERIFY_WORKERS) as pool:
+        computed = dict(zip(known_ids, pool.map(hash_file, (report_store.pdf_path(rid) for rid in known_ids))))
+
+    onchain = onchain_records(
+        [recorded[rid] for rid in known_ids if recorded[rid]] + report_hashes
+    )
+
+    results = []
+    for rid in report_ids:
+        if rid not in recorded:
+            results.append({"report_id": rid, "verdict": "not_found"})
+            continue
+        expected, actual = recorded[rid], computed[rid]
+        entry = {"report_id": rid, "report_hash": expected, "computed_hash": actual, "pdf_checked": actual is not None}
+        if actual is not None and actual != expected:
+            entry["verdict"] = "mismatch"
+        elif expected in onchain:
+            entry.update(verdict="match", onchain=onchain[expected])
+        else:
+            entry["verdict"] = "uncertified"
+        results.append(entry)
+
+    for report_hash in report_hashes:
+        entry = {"report_hash": report_hash}
+        if report_hash in onchain:
+            entry.update(verdict="match", onchain=onchain[report_hash])
+        else:
+            entry["verdict"] = "uncertified"
+        results.append(entry)
+
+    elapsed = time.perf_counter() - started
+    counts = {}
+    for entry in results:
+        counts[entry["verdict"]] = counts.get(entry["verdict"], 0) + 1
+    return {
+        "items": len(results),
+        "counts": counts,
+        "seconds": round(elapsed, 4),
+        "items_per_second": round(len(results) / elapsed) if elapsed else None,
+        "results": results,
+    }
@@ -9,10 +9,24 @@ contract AuditTraceability {
         address auditor;
     }
 
+    // One Merkle root certifies a whole batch of report hashes (see backend/utils/merkle.py)
+    struct Batch {
+        uint256 id;
+        bytes32 merkleRoot;
+        uint256 reportCount;
+        uint256 timestamp;
+        address auditor;
+    }
+
     mapping(uint256 => Report) public reports;
     uint256 public reportCount;
 
+    mapping(uint256 => Batch) public batches;
+    mapping(bytes32 => uint256) public batchIdByRoot;
+    uint256 public batchCount;
+
     event ReportCertified(uint256 id, string date, string reportHash, address auditor);
+    event BatchCertified(uint256 indexed id, bytes32 indexed merkleRoot, uint256 reportCount, address auditor);
 
     function certifyReport(string memory _date, string memory _reportHash) public {
         reportCount++;
@@ -24,4 +38,29 @@ contract AuditTraceability {
         Report memory r = reports[_id];
         return (r.id, r.date, r.reportHash, r.auditor);
     }
+
+    function certifyBatch(bytes32 _merkleRoot, uint256 _reportCount) public {
+        require(_merkleRoot != bytes32(0), "Empty Merkle root");
+        require(batchIdByRoot[_merkleRoot] == 0, "Batch already certified");
+        batchCount++;
+        batches[batchCount] = Batch(batchCount, _merkleRoot, _reportCount, block.timestamp, msg.sender);
+        batchIdByRoot[_merkleRoot] = batchCount;
+        emit BatchCertified(batchCount, _merkleRoot, _reportCount, msg.sender);
+    }
+
+    // True if _reportHash is a leaf of a certified batch with root _merkleRoot.
+    // Leaves are sha256(0x00 || hash), nodes sha256(0x01 || min || max).
+    function verifyReport(bytes32 _reportHash, bytes32[] calldata _proof, bytes32 _merkleRoot) public view returns (bool) {
+        if (batchIdByRoot[_merkleRoot] == 0) {
+            return false;
+        }
+        bytes32 node = sha256(abi.encodePacked(bytes1(0x00), _reportHash));
+        for (uint256 i = 0; i < _proof.length; i++) {
+            bytes32 sibling = _proof[i];
+            node = node <= sibling
+                ? sha256(abi.encodePacked(bytes1(0x01), node, sibling))
+                : sha256(abi.encodePacked(bytes1(0x01), sibling, node));
+        }
+        return node == _merkleRoot;
+    }
 }
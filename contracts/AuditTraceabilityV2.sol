@@ -0,0 +1,79 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.0;
+
+// Same flow as AuditTraceability with compact storage: the hash is a bytes32,
+// the date a uint64 unix timestamp, and timestamp + auditor share one slot.
+// Certification is looked up by hash in O(1) and events are indexed for eth_getLogs.
+contract AuditTraceabilityV2 {
+    struct Report {
+        bytes32 reportHash; // slot 0
+        uint64 timestamp;   // slot 1 (8 bytes)
+        address auditor;    // slot 1 (20 bytes)
+    }
+
+    struct Batch {
+        bytes32 merkleRoot; // slot 0
+        uint64 timestamp;   // slot 1 (8 bytes)
+        uint32 reportCount; // slot 1 (4 bytes)
+        address auditor;    // slot 1 (20 bytes)
+    }
+
+    mapping(uint256 => Report) public reports;
+    mapping(bytes32 => uint256) public reportIdByHash;
+    uint256 public reportCount;
+
+    mapping(uint256 => Batch) public batches;
+    mapping(bytes32 => uint256) public batchIdByRoot;
+    uint256 public batchCount;
+
+    event ReportCertified(uint256 indexed id, bytes32 indexed reportHash, address indexed auditor, uint64 timestamp);
+    event BatchCertified(uint256 indexed id, bytes32 indexed merkleRoot, address indexed auditor, uint32 reportCount);
+
+    function certifyReport(uint64 _timestamp, bytes32 _reportHash) public returns (uint256) {
+        require(_reportHash != bytes32(0), "Empty report hash");
+        require(reportIdByHash[_reportHash] == 0, "Report already certified");
+        uint256 id = ++reportCount;
+        reports[id] = Report(_reportHash, _timestamp, msg.sender);
+        reportIdByHash[_reportHash] = id;
+        emit ReportCertified(id, _reportHash, msg.sender, _timestamp);
+        return id;
+    }
+
+    function isCertified(bytes32 _reportHash) public view returns (bool) {
+        return reportIdByHash[_reportHash] != 0;
+    }
+
+    function getReport(uint256 _id) public view returns (uint256, uint64, bytes32, address) {
+        Report memory r = reports[_id];
+        return (r.reportHash == bytes32(0) ? 0 : _id, r.timestamp, r.reportHash, r.auditor);
+    }
+
+    function getReportByHash(bytes32 _reportHash) public view returns (uint256, uint64, bytes32, address) {
+        return getReport(reportIdByHash[_reportHash]);
+    }
+
+    function certifyBatch(bytes32 _merkleRoot, uint32 _reportCount) public returns (uint256) {
+        require(_merkleRoot != bytes32(0), "Empty Merkle root");
+        require(batchIdByRoot[_merkleRoot] == 0, "Batch already certified");
+        uint256 id = ++batchCount;
+        batches[id] = Batch(_merkleRoot, uint64(block.timestamp), _reportCount, msg.sender);
+        batchIdByRoot[_merkleRoot] = id;
+        emit BatchCertified(id, _merkleRoot, msg.sender, _reportCount);
+        return id;
+    }
+
+    // Same tree layout as AuditTraceability.verifyReport (backend/utils/merkle.py)
+    function verifyReport(bytes32 _reportHash, bytes32[] calldata _proof, bytes32 _merkleRoot) public view returns (bool) {
+        if (batchIdByRoot[_merkleRoot] == 0) {
+            return false;
+        }
+        bytes32 node = sha256(abi.encodePacked(bytes1(0x00), _reportHash));
+        for (uint256 i = 0; i < _proof.length; i++) {
+            bytes32 sibling = _proof[i];
+            node = node <= sibling
+                ? sha256(abi.encodePacked(bytes1(0x01), node, sibling))
+                : sha256(abi.encodePacked(bytes1(0x01), sibling, node));
+        }
+        return node == _merkleRoot;
+    }
+}
@@ -0,0 +1,47 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.0;
+
+// ReportStorage with compact records: the report UUID as bytes16 and the date
+// as a uint64 timestamp share one slot, the SHA-256 takes the other. Hashes
+// and report ids are indexed for O(1) lookups and filtered eth_getLogs.
+contract ReportStorageV2 {
+    struct Report {
+        bytes16 reportId;  // slot 0 (16 bytes)
+        uint64 timestamp;  // slot 0 (8 bytes)
+        bytes32 hashValue; // slot 1
+    }
+
+    Report[] public reports;
+    // index + 1, so 0 means "not stored"
+    mapping(bytes32 => uint256) private positionByHash;
+
+    event ReportStored(bytes16 indexed reportId, bytes32 indexed hashValue, uint256 index, uint64 timestamp);
+
+    function storeReport(bytes16 _reportId, uint64 _timestamp, bytes32 _hashValue) public returns (uint256) {
+        require(_hashValue != bytes32(0), "Empty report hash");
+        require(positionByHash[_hashValue] == 0, "Report already stored");
+        reports.push(Report(_reportId, _timestamp, _hashValue));
+        positionByHash[_hashValue] = reports.length;
+        emit ReportStored(_reportId, _hashValue, reports.length - 1, _timestamp);
+        return reports.length - 1;
+    }
+
+    function isCertified(bytes32 _hashValue) public view returns (bool) {
+        return positionByHash[_hashValue] != 0;
+    }
+
+    function indexOf(bytes32 _hashValue) public view returns (uint256) {
+        uint256 position = positionByHash[_hashValue];
+        require(position != 0, "Report not stored");
+        return position - 1;
+    }
+
+    function getReport(uint256 index) public view returns (bytes16, uint64, bytes32) {
+        Report memory r = reports[index];
+        return (r.reportId, r.timestamp, r.hashValue);
+    }
+
+    function getReportsCount() public view returns (uint256) {
+        return reports.length;
+    }
+}
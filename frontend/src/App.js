@@ -22,13 +22,25 @@ function App() {
 
     // History State
     const [reportHistory, setReportHistory] = useState([]);
+    const [historyCursor, setHistoryCursor] = useState(null);
+
+    // The catalog is paginated: each page carries the cursor of the next one (null on the last page)
+    const fetchHistoryPage = (cursor) => {
+        const url = cursor
+            ? `http://localhost:8000/reports?cursor=${encodeURIComponent(cursor)}`
+            : 'http://localhost:8000/reports';
+        return fetch(url)
+            .then(res => res.json())
+            .then(data => {
+                setReportHistory(prev => cursor ? [...prev, ...(data.items || [])] : (data.items || []));
+                setHistoryCursor(data.next_cursor || null);
+            })
+            .catch(err => console.error("Failed to fetch history", err));
+    };
 
     useEffect(() => {
         if (view === 'reports') {
-            fetch('http://localhost:8000/reports')
-                .then(res => res.json())
-                .then(data => setReportHistory(data))
-                .catch(err => console.error("Failed to fetch history", err));
+            fetchHistoryPage(null);
         }
     }, [view]);
 
@@ -229,6 +241,48 @@ function App() {
         }
     };
 
+    const handleBatchCertify = async () => {
+        if (!contract) {
+            toast.error("Blockchain not connected. Check MetaMask.");
+            return;
+        }
+
+        try {
+            // The backend builds the Merkle tree; a single transaction anchors its root
+            const res = await fetch('http://localhost:8000/batches', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({})
+            });
+            const batch = await res.json();
+            if (!res.ok) {
+                toast.error(batch.detail || "Nothing to certify");
+                return;
+            }
+
+            const tx = await contract.certifyBatch(batch.merkle_root, batch.report_count);
+            await tx.wait();
+
+            await fetch(`http://localhost:8000/batches/${batch.batch_id}/anchor`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ tx_hash: tx.hash })
+            });
+
+            const certified = new Set(batch.report_ids);
+            setReportHistory(prev => prev.map(r => certified.has(r.id) ? { ...r, is_certified: true } : r));
+            toast.success(`${batch.report_count} reports certified in one transaction: ${tx.hash.substring(0, 10)}...`);
+        } catch (err) {
+            console.error("Batch certification failed", err);
+
+            if (err.code === 4001 || (err.info && err.info.error && err.info.error.code === 4001)) {
+                toast.error("Transaction cancelled by user.");
+                return;
+            }
+
+            toast.error("Batch certification failed: " + (err.reason || err.message));
+        }
+    };
 
     const loadReport = async (id) => {
         try {
@@ -329,6 +383,9 @@ function App() {
                     <div style={{ maxWidth: '1000px', margin: '0 auto' }}>
                         <div style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center', marginBottom: '2rem' }}>
                             <h2 style={{ fontSize: '1.8rem', margin: 0 }}>Audit History</h2>
+                            <button className="primary-btn" onClick={handleBatchCertify}>
+                                Certify All Pending
+                            </button>
                         </div>
 
                         <div className="glass-panel" style={{ padding: 0, overflow: 'hidden' }}>
@@ -388,6 +445,13 @@ function App() {
                                     )}
                                 </tbody>
                             </table>
+                            {historyCursor && (
+                                <div style={{ padding: '1rem', textAlign: 'center', borderTop: '1px solid #e2e8f0' }}>
+                                    <button className="connect-btn" onClick={() => fetchHistoryPage(historyCursor)}>
+                                        Load more
+                                    </button>
+                                </div>
+                            )}
                         </div>
                     </div>
                 )}
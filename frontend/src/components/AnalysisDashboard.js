@@ -88,8 +88,15 @@ const AnalysisDashboard = ({ data, onCertify }) => {
                 <h3 style={{ color: 'var(--text-primary)' }}>Actions</h3>
                 <p style={{ color: 'var(--text-secondary)' }}>Report Hash: <span className="hash-code" style={{ fontFamily: 'monospace', background: '#f1f5f9', padding: '4px', borderRadius: '4px', color: 'var(--primary-color)' }}>{report_hash_preview}</span></p>
                 <div className="button-group" style={{ display: 'flex', gap: '1rem', marginTop: '1.5rem' }}>
-                    <button onClick={handleDownload} className="connect-btn">Download PDF Report</button>
-                    {data.is_certified ? (
+                    {!data.id ? (
+                        // Still streaming: the PDF and its hash exist once the report is saved
+                        <button disabled className="primary-btn" style={{ cursor: 'default' }}>
+                            Generating report...
+                        </button>
+                    ) : (
+                        <button onClick={handleDownload} className="connect-btn">Download PDF Report</button>
+                    )}
+                    {!data.id ? null : data.is_certified ? (
                         <button disabled className="primary-btn" style={{ background: 'var(--success-color)', cursor: 'default' }}>
                             Certified on Blockchain
                         </button>
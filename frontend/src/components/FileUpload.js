@@ -1,5 +1,5 @@
 import React, { useState } from 'react';
-import { uploadAndAnalyze } from '../services/api';
+import { uploadAndAnalyzeStream } from '../services/api';
 
 const FileUpload = ({ onAnalysisComplete }) => {
     const [file, setFile] = useState(null);
@@ -21,8 +21,19 @@ const FileUpload = ({ onAnalysisComplete }) => {
         setError('');
 
         try {
-            const result = await uploadAndAnalyze(file);
-            onAnalysisComplete(result);
+            // The dashboard opens on the statistics and fills in the recommendations as they stream
+            let partial = { filename: file.name, recommendations: '' };
+            const result = await uploadAndAnalyzeStream(file, {
+                onAnalysis: (analysis) => {
+                    partial = { ...partial, analysis };
+                    onAnalysisComplete(partial);
+                },
+                onToken: (text) => {
+                    partial = { ...partial, recommendations: partial.recommendations + text };
+                    onAnalysisComplete(partial);
+                },
+            });
+            onAnalysisComplete({ ...partial, ...result });
         } catch (err) {
             setError('Analysis failed. Please try again.');
             console.error(err);
@@ -21,11 +21,47 @@ export const uploadAndAnalyze = async (file) => {
     }
 };
 
+// Same audit as uploadAndAnalyze, read as Server-Sent Events: onAnalysis(analysis) fires as soon
+// as the statistics are ready, onToken(text) for each piece of the recommendations; resolves with
+// the final report fields (id, report_hash_preview, timestamp, ...).
+export const uploadAndAnalyzeStream = async (file, { onAnalysis, onToken } = {}) => {
+    const formData = new FormData();
+    formData.append('file', file);
+
+    const response = await fetch(`${API_BASE_URL}/upload_and_analyze/stream`, { method: 'POST', body: formData });
+    if (!response.ok) {
+        const body = await response.json().catch(() => ({}));
+        throw new Error(body.detail || `Upload failed (${response.status})`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let end;
+        while ((end = buffer.indexOf('\n\n')) !== -1) {
+            const message = buffer.slice(0, end);
+            buffer = buffer.slice(end + 2);
+            const event = (message.match(/^event: (.*)$/m) || [])[1];
+            const data = JSON.parse((message.match(/^data: (.*)$/m) || [])[1] || 'null');
+            if (event === 'analysis' && onAnalysis) onAnalysis(data);
+            else if (event === 'token' && onToken) onToken(data.text);
+            else if (event === 'done') return data;
+            else if (event === 'error') throw new Error(data.detail);
+        }
+    }
+    throw new Error('Stream ended before the report was saved');
+};
+
 export const downloadPDF = async (data) => {
     try {
-        const response = await axios.post(`${API_BASE_URL}/generate_pdf`, data, {
-            responseType: 'blob',
-        });
+        // Saved reports are served as the exact PDF that was hashed at upload time
+        const response = data.id
+            ? await axios.get(`${API_BASE_URL}/reports/${data.id}/pdf`, { responseType: 'blob' })
+            : await axios.post(`${API_BASE_URL}/generate_pdf`, data, { responseType: 'blob' });
         return response.data;
     } catch (error) {
         console.error("Error generating PDF:", error);
@@ -0,0 +1,7 @@
+const AuditTraceabilityV2 = artifacts.require("AuditTraceabilityV2");
+const ReportStorageV2 = artifacts.require("ReportStorageV2");
+
+module.exports = function (deployer) {
+    deployer.deploy(AuditTraceabilityV2);
+    deployer.deploy(ReportStorageV2);
+};
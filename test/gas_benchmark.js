@@ -0,0 +1,127 @@
+// Gas and lookup-cost comparison of the string-based certification contracts
+// with their compact bytes32 V2 versions.
+//
+//   npx truffle test test/gas_benchmark.js --network development
+//
+// GAS_BENCH_REPORTS sets how many reports are certified per contract (default 50);
+// GAS_BENCH_OUTPUT writes the results as JSON.
+const fs = require("fs");
+const crypto = require("crypto");
+
+const AuditTraceability = artifacts.require("AuditTraceability");
+const AuditTraceabilityV2 = artifacts.require("AuditTraceabilityV2");
+const ReportStorage = artifacts.require("ReportStorage");
+const ReportStorageV2 = artifacts.require("ReportStorageV2");
+
+const REPORTS = parseInt(process.env.GAS_BENCH_REPORTS || "50", 10);
+
+function sampleReports(n) {
+    return Array.from({ length: n }, (_, i) => {
+        const date = new Date(Date.UTC(2024, 0, 1) + i * 86400000);
+        return {
+            id: crypto.randomUUID(),
+            date: date.toISOString(),
+            timestamp: Math.floor(date.getTime() / 1000),
+            hash: crypto.createHash("sha256").update(`report-${i}`).digest("hex"),
+        };
+    });
+}
+
+async function totalGas(txs) {
+    const used = txs.map(tx => tx.receipt.gasUsed);
+    const sum = used.reduce((a, b) => a + b, 0);
+    return { total: sum, per_report: Math.round(sum / used.length) };
+}
+
+async function timed(fn) {
+    const start = process.hrtime.bigint();
+    const result = await fn();
+    return { result, ms: Number(process.hrtime.bigint() - start) / 1e6 };
+}
+
+contract("Certification gas benchmark", () => {
+    const reports = sampleReports(REPORTS);
+    const results = { reports: REPORTS };
+
+    it("certifies reports with AuditTraceability vs AuditTraceabilityV2", async () => {
+        const v1 = await AuditTraceability.new();
+        const v2 = await AuditTraceabilityV2.new();
+
+        const v1Txs = [];
+        const v2Txs = [];
+        for (const r of reports) {
+            v1Txs.push(await v1.certifyReport(r.date, r.hash));
+            v2Txs.push(await v2.certifyReport(r.timestamp, "0x" + r.hash));
+        }
+        results.audit_traceability = { v1: await totalGas(v1Txs), v2: await totalGas(v2Txs) };
+
+        // Worst case lookup by hash: the last report certified
+        const target = reports[reports.length - 1].hash;
+        const v1Lookup = await timed(async () => {
+            const count = (await v1.reportCount()).toNumber();
+            for (let id = 1; id <= count; id++) {
+                const r = await v1.getReport(id);
+                if (r[2] === target) return id;
+            }
+            return 0;
+        });
+        const v2Lookup = await timed(() => v2.isCertified("0x" + target));
+        assert.equal(v1Lookup.result, reports.length);
+        assert.isTrue(v2Lookup.result);
+
+        results.audit_traceability.lookup = {
+            v1: { rpc_calls: reports.length + 1, ms: v1Lookup.ms },
+            v2: { rpc_calls: 1, ms: v2Lookup.ms, gas: await v2.isCertified.estimateGas("0x" + target) },
+        };
+
+        const root = "0x" + crypto.createHash("sha256").update("root").digest("hex");
+        const v1Batch = await v1.certifyBatch(root, reports.length);
+        const v2Batch = await v2.certifyBatch(root, reports.length);
+        results.audit_traceability.batch = { v1: v1Batch.receipt.gasUsed, v2: v2Batch.receipt.gasUsed };
+    });
+
+    it("stores reports with ReportStorage vs ReportStorageV2", async () => {
+        const v1 = await ReportStorage.new();
+        const v2 = await ReportStorageV2.new();
+
+        const v1Txs = [];
+        const v2Txs = [];
+        for (const r of reports) {
+            v1Txs.push(await v1.storeReport(r.id, r.date, r.hash));
+            v2Txs.push(await v2.storeReport("0x" + r.id.replace(/-/g, ""), r.timestamp, "0x" + r.hash));
+        }
+        results.report_storage = { v1: await totalGas(v1Txs), v2: await totalGas(v2Txs) };
+
+        const target = reports[reports.length - 1].hash;
+        const v1Lookup = await timed(async () => {
+            const count = (await v1.getReportsCount()).toNumber();
+            for (let i = 0; i < count; i++) {
+                const r = await v1.getReport(i);
+                if (r[2] === target) return i;
+            }
+            return -1;
+        });
+        const v2Lookup = await timed(() => v2.indexOf("0x" + target));
+        assert.equal(v1Lookup.result, reports.length - 1);
+        assert.equal(v2Lookup.result.toNumber(), reports.length - 1);
+
+        results.report_storage.lookup = {
+            v1: { rpc_calls: reports.length + 1, ms: v1Lookup.ms },
+            v2: { rpc_calls: 1, ms: v2Lookup.ms },
+        };
+    });
+
+    after(() => {
+        const rows = {};
+        for (const name of ["audit_traceability", "report_storage"]) {
+            const r = results[name];
+            if (!r) continue;
+            rows[`${name} (v1)`] = { gas_per_report: r.v1.per_report, lookup_calls: r.lookup.v1.rpc_calls, lookup_ms: r.lookup.v1.ms.toFixed(1) };
+            rows[`${name} (v2)`] = { gas_per_report: r.v2.per_report, lookup_calls: r.lookup.v2.rpc_calls, lookup_ms: r.lookup.v2.ms.toFixed(1) };
+        }
+        console.table(rows);
+        if (process.env.GAS_BENCH_OUTPUT) {
+            fs.writeFileSync(process.env.GAS_BENCH_OUTPUT, JSON.stringify(results, null, 2));
+        }
+    });
+});
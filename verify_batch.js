@@ -0,0 +1,74 @@
+const { ethers } = require("ethers");
+const fs = require("fs");
+const path = require("path");
+
+// End-to-end check of batch certification against Ganache (or anvil on 7545):
+// the backend builds the Merkle batch, one transaction anchors the root, and
+// every report's inclusion proof is verified by the contract itself.
+const API = process.env.API_URL || "http://localhost:8000";
+const RPC = process.env.RPC_URL || "http://127.0.0.1:7545";
+
+async function api(method, route, body) {
+    const res = await fetch(`${API}${route}`, {
+        method,
+        headers: { "Content-Type": "application/json" },
+        body: body ? JSON.stringify(body) : undefined,
+    });
+    const data = await res.json();
+    if (!res.ok) throw new Error(`${method} ${route}: ${data.detail || res.status}`);
+    return data;
+}
+
+async function main() {
+    const provider = new ethers.JsonRpcProvider(RPC);
+
+    const artifactPath = path.join(__dirname, "frontend", "src", "contracts", "AuditTraceability.json");
+    const artifact = JSON.parse(fs.readFileSync(artifactPath, "utf8"));
+    const network = await provider.getNetwork();
+    const deployedNetwork = artifact.networks[network.chainId.toString()] || artifact.networks["5777"];
+
+    const signer = await provider.getSigner(0);
+    const contract = new ethers.Contract(deployedNetwork.address, artifact.abi, signer);
+
+    // 1. Build the batch over all pending reports
+    const batch = await api("POST", "/batches", {});
+    console.log(`Batch ${batch.batch_id}: ${batch.report_count} reports, root ${batch.merkle_root}`);
+
+    // 2. Anchor the root in one transaction
+    const tx = await contract.certifyBatch(batch.merkle_root, batch.report_count);
+    const receipt = await tx.wait();
+    console.log(`Anchored in tx ${tx.hash} (gas used: ${receipt.gasUsed})`);
+    await api("POST", `/batches/${batch.batch_id}/anchor`, { tx_hash: tx.hash });
+
+    // 3. Every proof must verify on-chain and against the backend
+    let failures = 0;
+    for (const reportId of batch.report_ids) {
+        const p = await api("GET", `/reports/${reportId}/proof`);
+        const onChain = await contract.verifyReport("0x" + p.report_hash, p.proof, p.merkle_root);
+        const local = await api("POST", "/verify_proof", {
+            report_hash: p.report_hash, proof: p.proof, merkle_root: p.merkle_root,
+        });
+        if (!onChain || !local.valid || !local.anchored) {
+            failures++;
+            console.error(`Proof failed for ${reportId}: on-chain=${onChain} backend=${local.valid}`);
+        }
+    }
+
+    // 4. A tampered hash must be rejected
+    const p = await api("GET", `/reports/${batch.report_ids[0]}/proof`);
+    const tampered = "0x" + "ff" + p.report_hash.slice(2);
+    if (await contract.verifyReport(tampered, p.proof, p.merkle_root)) {
+        failures++;
+        console.error("Tampered hash was accepted!");
+    }
+
+    if (failures) {
+        process.exit(1);
+    }
+    console.log(`SUCCESS: ${batch.report_ids.length} inclusion proofs verified on-chain.`);
+}
+
+main().catch((err) => {
+    console.error(err);
+    process.exit(1);
+});